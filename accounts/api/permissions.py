@@ -1,38 +1,23 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from accounts.models import Librarian, Member
+from accounts.roles import get_roles
 
 
 class IsAdminOrLibrarian(BasePermission):
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        if request.user.is_staff:
-            return True
-        if Librarian.objects.filter(user=request.user).exists():
-            return True
-        return False
+        return get_roles(request).is_admin_or_librarian
 
 
 class IsMember(BasePermission):
     """Permission class to check if user is a member"""
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        return Member.objects.filter(user=request.user).exists()
+        return get_roles(request).is_member
 
 
 class IsMemberOrAdminOrLibrarian(BasePermission):
     """Permission class that allows members, admins, and librarians"""
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        if request.user.is_staff:
-            return True
-        if Librarian.objects.filter(user=request.user).exists():
-            return True
-        if Member.objects.filter(user=request.user).exists():
-            return True
-        return False
+        roles = get_roles(request)
+        return roles.is_admin_or_librarian or roles.is_member
 
 
 class IsMemberOrReadOnly(BasePermission):
@@ -41,23 +26,11 @@ class IsMemberOrReadOnly(BasePermission):
         # Allow read operations for everyone (including anonymous)
         if request.method in SAFE_METHODS:
             return True
-        
+
+        roles = get_roles(request)
         # Allow create for authenticated members
         if request.method == "POST":
-            if request.user.is_authenticated:
-                if request.user.is_staff:
-                    return True
-                if Librarian.objects.filter(user=request.user).exists():
-                    return True
-                if Member.objects.filter(user=request.user).exists():
-                    return True
-            return False
-        
+            return roles.is_admin_or_librarian or roles.is_member
+
         # Allow modify/delete only for admin/librarian
-        if not request.user or not request.user.is_authenticated:
-            return False
-        if request.user.is_staff:
-            return True
-        if Librarian.objects.filter(user=request.user).exists():
-            return True
-        return False
+        return roles.is_admin_or_librarian
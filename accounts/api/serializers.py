@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from rest_framework.serializers import ModelSerializer, ValidationError
 from rest_framework import serializers
 
+from core.values import ValuesSerializer
 from ..models import Librarian, Member
 
 
@@ -43,6 +44,24 @@ class MemberSerializer(ModelSerializer):
         fields = ("id", "membership_code", "user")
 
 
+class UserValues(ValuesSerializer):
+    """Read-only UserSerializer"""
+    model = get_user_model()
+    fields = {
+        "id": "id",
+        "username": "username",
+        "email": "email",
+        "first_name": "first_name",
+        "last_name": "last_name",
+    }
+
+
+class MemberValues(ValuesSerializer):
+    """Read-only MemberSerializer"""
+    model = Member
+    fields = {"id": "id", "membership_code": "membership_code", "user": UserValues("user")}
+
+
 class CreateLibrarianSerializer(ModelSerializer):
     user = UserSerializer()
 
@@ -22,6 +22,9 @@ User = get_user_model()
 class MemberViewset(ModelViewSet):
     queryset = Member.objects.select_related("user").all()
     permission_classes = [IsAdminOrLibrarian]
+    role_claims = True
+    ordering = ("id",)
+    query_budget = {"list": 4, "retrieve": 4}
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -36,6 +39,9 @@ class MemberViewset(ModelViewSet):
 class LibrarianViewset(ModelViewSet):
     queryset = Librarian.objects.select_related("user").all()
     permission_classes = [IsAdminUser]
+    role_claims = True
+    ordering = ("id",)
+    query_budget = {"list": 3, "retrieve": 3}
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -0,0 +1,47 @@
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import TOKEN_VERSION_CLAIM, ClaimsUser, get_token_version, role_claims_enabled
+
+
+# View attribute opting in to request.user being a ClaimsUser
+ROLE_CLAIMS_ATTRIBUTE = "role_claims"
+
+
+def view_accepts_role_claims(request):
+    view = (getattr(request, "parser_context", None) or {}).get("view")
+    return getattr(view, ROLE_CLAIMS_ATTRIBUTE, False)
+
+
+class RoleClaimsJWTCookieAuthentication(JWTCookieAuthentication):
+    """
+    JWT cookie/header authentication that trusts the role claims of tokens
+    issued with JWT_ROLE_CLAIMS (see accounts/tokens.py) instead of loading
+    the user, on views that only need the user's roles and set
+    `role_claims = True`. Other views (e.g. dj-rest-auth's user details and
+    password change) and tokens without the claims get the real user.
+    """
+
+    def authenticate(self, request):
+        # Authenticators are instantiated per request
+        self.accepts_claims = view_accepts_role_claims(request)
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if (
+            not getattr(self, "accepts_claims", False)
+            or not role_claims_enabled()
+            or TOKEN_VERSION_CLAIM not in validated_token
+        ):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if get_token_version(user_id) != validated_token[TOKEN_VERSION_CLAIM]:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        return ClaimsUser(validated_token)
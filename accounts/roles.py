@@ -0,0 +1,115 @@
+"""
+Per-request role resolution.
+
+`get_roles(request)` answers "is this user staff, a librarian, a member, and
+which profile rows" with one query, memoized on the request so permission
+classes and views can all ask without repeating it. The profile ids are also
+kept in the default cache for ROLE_CACHE_TTL seconds (0 disables), and
+dropped when a Member or Librarian row of the user is saved or deleted
+(see accounts/signals/handlers.py). The drop only reaches other processes
+when the default cache is shared (Redis in the docker and production
+settings, enforced by core/checks.py); with a per-process cache a demoted
+librarian keeps access elsewhere for up to ROLE_CACHE_TTL seconds.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.db.models import OuterRef, Subquery
+
+from core.metrics import record_cache_lookup
+from .models import Librarian, Member
+
+
+REQUEST_ATTRIBUTE = "_resolved_roles"
+
+
+class Roles:
+    def __init__(self, user, member_id=None, librarian_id=None):
+        self.user = user
+        self.is_authenticated = bool(user and user.is_authenticated)
+        self.is_staff = self.is_authenticated and user.is_staff
+        self.member_id = member_id
+        self.librarian_id = librarian_id
+
+    @property
+    def is_librarian(self):
+        return self.librarian_id is not None
+
+    @property
+    def is_member(self):
+        return self.member_id is not None
+
+    @property
+    def is_admin_or_librarian(self):
+        return self.is_staff or self.is_librarian
+
+    @property
+    def member(self):
+        """The member profile as a deferred instance (fields load on first access)"""
+        if self.member_id is None:
+            return None
+        db = router.db_for_read(Member)
+        return Member.from_db(db, ["id", "user_id"], [self.member_id, self.user.pk])
+
+    def __repr__(self):
+        return (
+            f"Roles(user={getattr(self.user, 'pk', None)}, staff={self.is_staff}, "
+            f"member={self.member_id}, librarian={self.librarian_id})"
+        )
+
+
+def role_cache_key(user_id):
+    return f"accounts:roles:{user_id}"
+
+
+def first_profile_pk(model):
+    return Subquery(model.objects.filter(user=OuterRef("pk")).order_by("pk").values("pk")[:1])
+
+
+def load_profile_ids(user_id):
+    """(member_id, librarian_id) of a user in a single query"""
+    row = (
+        get_user_model().objects.filter(pk=user_id)
+        .annotate(member_id=first_profile_pk(Member), librarian_id=first_profile_pk(Librarian))
+        .values_list("member_id", "librarian_id")
+        .first()
+    )
+    return row or (None, None)
+
+
+def resolve_roles(user):
+    if not user or not user.is_authenticated:
+        return Roles(user)
+    claims = getattr(user, "role_claims", None)
+    if claims is not None:
+        # accounts.tokens.ClaimsUser: the token already says
+        return Roles(user, *claims)
+    key = role_cache_key(user.pk)
+    # Read per call, like ROLE_CLAIMS_ENABLED, so override_settings applies
+    ttl = getattr(settings, "ROLE_CACHE_TTL", 60)
+    profile_ids = cache.get(key) if ttl else None
+    if ttl:
+        record_cache_lookup("roles", profile_ids is not None)
+    if profile_ids is None:
+        profile_ids = load_profile_ids(user.pk)
+        if ttl:
+            cache.set(key, profile_ids, ttl)
+    member_id, librarian_id = profile_ids
+    return Roles(user, member_id=member_id, librarian_id=librarian_id)
+
+
+def get_roles(request):
+    """Roles of request.user, resolved once per request"""
+    # DRF's Request wraps the HttpRequest; memoize on the latter so both share it
+    http_request = getattr(request, "_request", request)
+    user = getattr(request, "user", None)
+    roles = getattr(http_request, REQUEST_ATTRIBUTE, None)
+    if roles is None or roles.user is not user:
+        roles = resolve_roles(user)
+        setattr(http_request, REQUEST_ATTRIBUTE, roles)
+    return roles
+
+
+def invalidate_roles(user_id):
+    cache.delete(role_cache_key(user_id))
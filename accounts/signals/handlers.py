@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from ..models import Librarian, Member
+from ..roles import invalidate_roles
+from ..tokens import REVOKING_USER_FIELDS, forget_token_version, revoke_tokens, role_claims_enabled
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+@receiver(post_save, sender=Librarian)
+@receiver(post_delete, sender=Librarian)
+def invalidate_cached_roles(sender, instance, **kwargs):
+    invalidate_roles(instance.user_id)
+    if role_claims_enabled():
+        # Tokens carry the old member_id/librarian_id
+        revoke_tokens(instance.user_id)
+
+
+@receiver(pre_save, sender=get_user_model())
+def revoke_tokens_on_privilege_change(sender, instance, update_fields=None, **kwargs):
+    if not role_claims_enabled() or instance._state.adding:
+        return
+    if update_fields is not None and not set(REVOKING_USER_FIELDS).intersection(update_fields):
+        return
+
+    previous = sender.objects.filter(pk=instance.pk).values_list(*REVOKING_USER_FIELDS).first()
+    if previous is None or previous == tuple(getattr(instance, f) for f in REVOKING_USER_FIELDS):
+        return
+    if update_fields is None:
+        # A full save writes token_version too, so bump it on the instance
+        instance.token_version += 1
+        forget_token_version(instance.pk)
+    else:
+        revoke_tokens(instance.pk)
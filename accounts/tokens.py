@@ -0,0 +1,110 @@
+"""
+Role claims in JWT access tokens.
+
+With JWT_ROLE_CLAIMS on, tokens issued at login carry is_staff, member_id,
+librarian_id and the user's token_version. On API views that opt in with
+`role_claims = True`, RoleClaimsJWTCookieAuthentication
+(accounts/authentication.py) then builds a ClaimsUser from the token instead
+of loading core.User, and accounts.roles reads the roles off it, so
+authorization costs no query. Every other view gets the real user.
+
+A token stops being accepted once the user's token_version moves past the one
+it carries: revoke_tokens() bumps it, and so does a change to the user's
+Member/Librarian rows, is_staff, is_active or password. The current version
+is read from the default cache, with a single primary key lookup on a miss;
+that cache must be shared (e.g. Redis, enforced by core/checks.py) for
+revocation to reach every process at once.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from core.metrics import record_cache_lookup
+from .roles import load_profile_ids
+
+
+TOKEN_VERSION_CACHE_TTL = getattr(settings, "TOKEN_VERSION_CACHE_TTL", 300)
+
+TOKEN_VERSION_CLAIM = "ver"
+
+# Changes to these User fields revoke the user's tokens
+REVOKING_USER_FIELDS = ("is_staff", "is_superuser", "is_active", "password")
+
+
+def role_claims_enabled():
+    # Read per call so override_settings and settings changes take effect
+    return getattr(settings, "JWT_ROLE_CLAIMS", False)
+
+
+def token_version_cache_key(user_id):
+    return f"accounts:token-version:{user_id}"
+
+
+def get_token_version(user_id):
+    """Current token_version of a user, None if the user no longer exists"""
+    key = token_version_cache_key(user_id)
+    version = cache.get(key)
+    record_cache_lookup("token_version", version is not None)
+    if version is None:
+        version = (
+            get_user_model().objects.filter(pk=user_id)
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        if version is not None:
+            cache.set(key, version, TOKEN_VERSION_CACHE_TTL)
+    return version
+
+
+def forget_token_version(user_id):
+    # After commit, so a concurrent request cannot cache the old version again
+    transaction.on_commit(lambda: cache.delete(token_version_cache_key(user_id)))
+
+
+def revoke_tokens(user_id):
+    """Invalidate every role-claims token issued to the user so far"""
+    get_user_model().objects.filter(pk=user_id).update(token_version=F("token_version") + 1)
+    forget_token_version(user_id)
+
+
+def add_role_claims(token, user):
+    member_id, librarian_id = load_profile_ids(user.pk)
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+    token["member_id"] = member_id
+    token["librarian_id"] = librarian_id
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+class RoleClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair issued by dj_rest_auth's login (JWT_TOKEN_CLAIMS_SERIALIZER)"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        if role_claims_enabled():
+            add_role_claims(token, user)
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """request.user hydrated from access token claims, without a core.User row"""
+
+    @cached_property
+    def is_staff(self):
+        return bool(self.token.get("is_staff", False))
+
+    @cached_property
+    def is_superuser(self):
+        return bool(self.token.get("is_superuser", False))
+
+    @property
+    def role_claims(self):
+        """(member_id, librarian_id), read by accounts.roles"""
+        return self.token.get("member_id"), self.token.get("librarian_id")
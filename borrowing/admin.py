@@ -5,6 +5,8 @@ from .models import BorrowedBook
 
 @admin.register(BorrowedBook)
 class BorrowedBookAdmin(admin.ModelAdmin):
+    # __str__ reads book and borrower.user
+    list_select_related = ("book", "borrower__user")
     list_display = (
         "id",
         "book_item_id",
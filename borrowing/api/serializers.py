@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from accounts.models import Member
+from core.values import ValuesSerializer
 from library.models import BookItem
 from ..models import BorrowedBook
 
@@ -18,8 +20,33 @@ class BorrowedBookSerializer(serializers.ModelSerializer):
     book_item = BookItemSerializer()
 
 
+class BookItemValues(ValuesSerializer):
+    """Read-only BookItemSerializer"""
+    model = BookItem
+    fields = {
+        "id": "id",
+        "book": "book",
+        "barcode": "barcode",
+        "status": "status",
+        "publication_date": "publication_date",
+    }
+
+
+class BorrowedBookValues(ValuesSerializer):
+    """Read-only BorrowedBookSerializer"""
+    model = BorrowedBook
+    fields = {
+        "id": "id",
+        "book_item": BookItemValues("book_item"),
+        "borrower": "borrower",
+        "borrowed_date": "borrowed_date",
+        "due_date": "due_date",
+    }
+
+
 class BorrowedBookCreateSerializer(serializers.ModelSerializer):
-    borrower = serializers.PrimaryKeyRelatedField(required=False, read_only=True)
+    # Admins/librarians pick the borrower; members always borrow for themselves
+    borrower = serializers.PrimaryKeyRelatedField(queryset=Member.objects.all(), required=False)
     
     class Meta:
         model = BorrowedBook
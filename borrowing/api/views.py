@@ -1,14 +1,21 @@
 from rest_framework.viewsets import GenericViewSet
 from rest_framework import mixins
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import PermissionDenied, ValidationError
 
 from accounts.api.permissions import IsAdminOrLibrarian, IsMemberOrAdminOrLibrarian
-from accounts.models import Member
+from accounts.roles import get_roles
+from core.conditional import ConditionalGetMixin
+from core.exports import ExportView
+from core.values import ValuesReadMixin
+from library.models import BookItem
 from ..models import BorrowedBook
-from .serializers import BorrowedBookSerializer, BorrowedBookCreateSerializer
+from ..services import checkout, CheckoutError
+from .serializers import BorrowedBookSerializer, BorrowedBookCreateSerializer, BorrowedBookValues
 
 
 class BorrowedBookViewset(
+    ConditionalGetMixin,
+    ValuesReadMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.DestroyModelMixin,
@@ -17,6 +24,12 @@ class BorrowedBookViewset(
 ):
     queryset = BorrowedBook.objects.select_related("book_item").all()
     permission_classes = [IsMemberOrAdminOrLibrarian]
+    role_claims = True
+    ordering = ("due_date", "id")
+    values_serializer = BorrowedBookValues()
+    query_budget = {"list": 4, "retrieve": 5}
+    collection_tags = (BorrowedBook, BookItem)
+    last_modified_fields = ("updated_at", "book_item__updated_at")
 
     def get_serializer_class(self):
         if self.action in ("create"):
@@ -44,53 +57,65 @@ class BorrowedBookViewset(
         Admin/Librarian can see all borrows.
         """
         queryset = BorrowedBook.objects.select_related("book_item", "borrower__user").all()
-        
-        # Check if user is authenticated
-        if not self.request.user or not self.request.user.is_authenticated:
-            return BorrowedBook.objects.none()
-        
+        roles = get_roles(self.request)
+
         # If user is admin or librarian, return all
-        if self.request.user.is_staff:
-            return queryset
-        
-        # Check if user is librarian
-        from accounts.models import Librarian
-        if Librarian.objects.filter(user=self.request.user).exists():
+        if roles.is_admin_or_librarian:
             return queryset
-        
+
         # If user is member, return only their borrows
-        try:
-            member = Member.objects.get(user=self.request.user)
-            return queryset.filter(borrower=member)
-        except Member.DoesNotExist:
-            return BorrowedBook.objects.none()
+        if roles.is_member:
+            return queryset.filter(borrower_id=roles.member_id)
+        return BorrowedBook.objects.none()
 
     def perform_create(self, serializer):
         """
-        Automatically set the borrower to the current user's member profile
-        if they are a member.
+        Lend the requested copy through the checkout service.
+        The borrower is the current user's member profile for members.
         """
+        member = self.get_borrower(serializer)
+        try:
+            serializer.instance = checkout(
+                member,
+                book_item=serializer.validated_data["book_item"],
+                due_date=serializer.validated_data["due_date"],
+            )
+        except CheckoutError as exc:
+            raise ValidationError({"book_item": [str(exc)]})
+
+    def get_borrower(self, serializer):
+        roles = get_roles(self.request)
         # Check if user is authenticated
-        if not self.request.user or not self.request.user.is_authenticated:
-            from rest_framework.exceptions import PermissionDenied
+        if not roles.is_authenticated:
             raise PermissionDenied("You must be authenticated to borrow books.")
-        
-        # If user is admin/librarian, they can specify borrower in request
-        if self.request.user.is_staff:
-            serializer.save()
-            return
-        
-        # Check if user is librarian
-        from accounts.models import Librarian
-        if Librarian.objects.filter(user=self.request.user).exists():
-            serializer.save()
-            return
-        
+
+        # If user is admin/librarian, they specify the borrower in the request
+        if roles.is_admin_or_librarian:
+            borrower = serializer.validated_data.get("borrower")
+            if borrower is None:
+                raise ValidationError({"borrower": ["This field is required."]})
+            return borrower
+
         # If user is member, automatically set borrower to their member profile
-        try:
-            member = Member.objects.get(user=self.request.user)
-            serializer.save(borrower=member)
-        except Member.DoesNotExist:
+        if not roles.is_member:
             # This shouldn't happen due to permission check, but handle it
-            from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You must be a registered member to borrow books.")
+        return roles.member
+
+
+class BorrowedBookExportView(ExportView):
+    """Stream all loans as NDJSON or CSV, admin/librarian only"""
+    queryset = BorrowedBook.objects.all()
+    permission_classes = [IsAdminOrLibrarian]
+    role_claims = True
+    filterset_fields = ["borrower", "book", "due_date"]
+    filename = "loans"
+    columns = {
+        "id": "id",
+        "book_item": "book_item_id",
+        "barcode": "book_item__barcode",
+        "book": "book_id",
+        "borrower": "borrower_id",
+        "borrowed_date": "borrowed_date",
+        "due_date": "due_date",
+    }
@@ -0,0 +1,110 @@
+import threading
+from datetime import date
+from queue import Empty, Queue
+from time import perf_counter
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, OperationalError
+
+from accounts.models import Member
+from borrowing.services import checkout, AlreadyBorrowedError, NoCopyAvailableError
+from library.models import Book, BookItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Contention benchmark: many threads check out copies of one hot title "
+        "through the checkout service and the rate of successful checkouts is reported"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--copies", type=int, default=500)
+        parser.add_argument("--members", type=int, default=600)
+        parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+
+    def create_fixtures(self, run_id, copies, members):
+        User = get_user_model()
+        book = Book.objects.create(title=f"Checkout benchmark {run_id}", isbn=run_id[:13], subject="Benchmark")
+        BookItem.objects.bulk_create(
+            BookItem(
+                book=book,
+                barcode=f"{run_id[:9]}{index:06d}",
+                status=BookItem.STATUS_AVAILABLE,
+                publication_date=date.today(),
+            )
+            for index in range(copies)
+        )
+        # bulk_create skips BookItem.save(), so set the counters directly
+        Book.rebuild_counters(Book.objects.filter(pk=book.pk))
+
+        User.objects.bulk_create(
+            User(username=f"bench-{run_id}-{index}", email=f"bench-{run_id}-{index}@example.com", password="!")
+            for index in range(members)
+        )
+        users = User.objects.filter(username__startswith=f"bench-{run_id}-")
+        Member.objects.bulk_create(Member(user=user, membership_code="00000000") for user in users)
+        return book, users
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                "SKIP LOCKED needs PostgreSQL; results on this database are not meaningful."
+            ))
+
+        run_id = uuid4().hex
+        book, users = self.create_fixtures(run_id, options["copies"], options["members"])
+        pending = Queue()
+        for member in Member.objects.filter(user__in=users):
+            pending.put(member)
+
+        results = {"ok": 0, "already_borrowed": 0, "unavailable": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        member = pending.get_nowait()
+                    except Empty:
+                        return
+                    try:
+                        checkout(member, book=book)
+                        outcome = "ok"
+                    except AlreadyBorrowedError:
+                        outcome = "already_borrowed"
+                    except NoCopyAvailableError:
+                        outcome = "unavailable"
+                    except OperationalError:
+                        outcome = "errors"
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+        started = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - started
+
+        book.refresh_from_db()
+        double_lent = book.loans.count() != BookItem.objects.filter(
+            book=book, status=BookItem.STATUS_BORROWED
+        ).count()
+
+        self.stdout.write(
+            f"threads={options['threads']} copies={options['copies']} members={options['members']}\n"
+            f"checkouts={results['ok']} unavailable={results['unavailable']} "
+            f"already_borrowed={results['already_borrowed']} errors={results['errors']}\n"
+            f"elapsed={elapsed:.3f}s checkouts/s={results['ok'] / elapsed if elapsed else 0:.1f}\n"
+            f"available_copies counter={book.available_copies} consistent={not double_lent}"
+        )
+
+        if not options["keep"]:
+            book.delete()
+            users.delete()
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.13 on 2026-10-17 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('borrowing', '0002_alter_borrowedbook_borrower'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrowedbook',
+            index=models.Index(fields=['due_date', 'id'], name='borrowing_due_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 3.2.13 on 2026-10-17 16:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+import django.db.models.deletion
+
+
+def fill_loan_books(apps, schema_editor):
+    BorrowedBook = apps.get_model("borrowing", "BorrowedBook")
+    BookItem = apps.get_model("library", "BookItem")
+    BorrowedBook.objects.update(
+        book=Subquery(BookItem.objects.filter(pk=OuterRef("book_item")).values("book")[:1])
+    )
+
+
+def check_duplicate_loans(apps, schema_editor):
+    """
+    Members could borrow several copies of a title before this constraint;
+    stop with the offending loans listed instead of an IntegrityError, so
+    they can be returned (all but one per member and book) before migrating.
+    """
+    BorrowedBook = apps.get_model("borrowing", "BorrowedBook")
+    # Counted in SQL, ids fetched per listed group: no ArrayAgg, so it runs on SQLite too
+    duplicates = list(
+        BorrowedBook.objects.values("borrower_id", "book_id")
+        .annotate(loans=Count("id"))
+        .filter(loans__gt=1)
+        .order_by("borrower_id", "book_id")
+    )
+    if not duplicates:
+        return
+    lines = []
+    for row in duplicates[:50]:
+        loan_ids = BorrowedBook.objects.filter(
+            borrower_id=row["borrower_id"], book_id=row["book_id"]
+        ).order_by("id").values_list("id", flat=True)
+        lines.append(
+            f"  member {row['borrower_id']}, book {row['book_id']}: loans {', '.join(map(str, loan_ids))}"
+        )
+    if len(duplicates) > 50:
+        lines.append(f"  ... and {len(duplicates) - 50} more")
+    raise RuntimeError(
+        f"{len(duplicates)} members hold several copies of one book, which the "
+        "borrowing_one_copy_per_member constraint forbids. Return the extra loans, then migrate "
+        "again:\n" + "\n".join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0013_book_copy_counters'),
+        ('borrowing', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='borrowedbook',
+            name='book',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='loans', to='library.book'),
+        ),
+        migrations.RunPython(fill_loan_books, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='borrowedbook',
+            name='book',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='loans', to='library.book'),
+        ),
+        migrations.RunPython(check_duplicate_loans, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='borrowedbook',
+            constraint=models.UniqueConstraint(fields=('borrower', 'book'), name='borrowing_one_copy_per_member'),
+        ),
+    ]
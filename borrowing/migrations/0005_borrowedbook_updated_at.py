@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('borrowing', '0004_one_copy_per_member'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='borrowedbook',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -5,9 +5,30 @@ from django.core.validators import MinValueValidator
 
 class BorrowedBook(models.Model):
     book_item = models.OneToOneField("library.BookItem", on_delete=models.CASCADE)
+    # Denormalized from book_item so the one-copy-per-member rule is a DB constraint
+    book = models.ForeignKey(
+        "library.Book", on_delete=models.CASCADE, related_name="loans", editable=False
+    )
     borrower = models.ForeignKey("accounts.Member", on_delete=models.CASCADE)
     borrowed_date = models.DateField(auto_now_add=True)
     due_date = models.DateField(validators=[MinValueValidator(date.today)])
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order of BorrowedBookViewset
+            models.Index(fields=["due_date", "id"], name="borrowing_due_date_id_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["borrower", "book"], name="borrowing_one_copy_per_member"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.book_id is None and self.book_item_id is not None:
+            self.book_id = self.book_item.book_id
+        super().save(*args, **kwargs)
 
     def is_due_date_past(self):
         if self.due_date < date.today():
@@ -21,5 +42,5 @@ class BorrowedBook(models.Model):
 
     def __str__(self):
         return (
-            f"{self.book_item.book.title} borrowed from {self.borrower.user.username}"
+            f"{self.book.title} borrowed from {self.borrower.user.username}"
         )
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from library.models import BookItem
+from .models import BorrowedBook
+
+
+DEFAULT_LOAN_DAYS = 14
+
+
+class CheckoutError(Exception):
+    """Base class for checkout failures that should be reported to the user"""
+
+
+class AlreadyBorrowedError(CheckoutError):
+    pass
+
+
+class NoCopyAvailableError(CheckoutError):
+    pass
+
+
+def default_due_date():
+    return timezone.now().date() + timedelta(days=DEFAULT_LOAN_DAYS)
+
+
+def checkout(member, book=None, book_item=None, due_date=None):
+    """
+    Lend a copy to a member and return the new BorrowedBook.
+
+    With `book`, the first available copy that no concurrent checkout holds is
+    taken (SELECT ... FOR UPDATE SKIP LOCKED), so parallel borrowers of a hot
+    title never queue on the same row. With `book_item`, that exact copy is
+    locked and must be available. The item status and the loan change in one
+    transaction; the one-copy-per-member rule is enforced by the
+    borrowing_one_copy_per_member constraint.
+    """
+    if (book is None) == (book_item is None):
+        raise ValueError("Pass exactly one of book or book_item.")
+    if due_date is None:
+        due_date = default_due_date()
+
+    try:
+        with transaction.atomic():
+            if book_item is not None:
+                item = BookItem.objects.select_for_update().filter(pk=book_item.pk).first()
+                if item is None or not item.is_available():
+                    raise NoCopyAvailableError("This copy is not available.")
+            else:
+                item = (
+                    BookItem.objects.select_for_update(skip_locked=True)
+                    .filter(book=book, status=BookItem.STATUS_AVAILABLE)
+                    .order_by("id")
+                    .first()
+                )
+                if item is None:
+                    raise NoCopyAvailableError("All copies are borrowed.")
+
+            item.change_status(to=BookItem.STATUS_BORROWED)
+            return BorrowedBook.objects.create(
+                book_item=item,
+                book_id=item.book_id,
+                borrower=member,
+                due_date=due_date,
+            )
+    except IntegrityError:
+        book_id = book.pk if book is not None else book_item.book_id
+        if BorrowedBook.objects.filter(borrower=member, book_id=book_id).exists():
+            raise AlreadyBorrowedError("This member has already borrowed this book.")
+        raise NoCopyAvailableError("This copy is not available.")
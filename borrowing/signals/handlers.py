@@ -1,6 +1,7 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from core.response_cache import invalidate_tags
 from library.models import BookItem
 
 from ..models import BorrowedBook
@@ -18,3 +19,9 @@ def update_status_of_book_item_to_borrowed(sender, instance, created, **kwargs):
 def update_status_of_book_item_to_available(sender, instance, **kwargs):
     book_item = instance.book_item
     book_item.change_status(to=BookItem.STATUS_AVAILABLE)
+
+
+@receiver(post_save, sender=BorrowedBook)
+@receiver(post_delete, sender=BorrowedBook)
+def invalidate_loan_lists(sender, instance, **kwargs):
+    invalidate_tags(BorrowedBook)
@@ -1,7 +1,8 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 
-from .api.views import BorrowedBookViewset
+from core.exports import EXPORT_FORMAT_REGEX
+from .api.views import BorrowedBookViewset, BorrowedBookExportView
 
 
 router = DefaultRouter()
@@ -9,5 +10,10 @@ router.register("books", BorrowedBookViewset, basename="borrowed-books")
 
 
 urlpatterns = [
+    re_path(
+        rf"^export/loans\.(?P<export_format>{EXPORT_FORMAT_REGEX})$",
+        BorrowedBookExportView.as_view(),
+        name="borrowing-export-loans",
+    ),
     path("", include(router.urls)),
 ]
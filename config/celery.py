@@ -1,4 +1,3 @@
-
 import os
 from celery import Celery
 
@@ -6,4 +5,15 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.local")
 
 celery = Celery("library-management")
 celery.config_from_object("django.conf:settings", namespace="CELERY")
-celery.autodiscover_tasks()
\ No newline at end of file
+celery.autodiscover_tasks()
+
+
+@celery.on_after_configure.connect
+def setup_periodic_tasks(sender, **kwargs):
+    # Imported here so web processes, which load this module too, skip celery.schedules
+    from celery.schedules import crontab
+
+    # Incremental: runs after the first one each day are no-ops
+    sender.add_periodic_task(
+        crontab(minute=10), sender.signature("fines.tasks.create_fines"), name="create_fines"
+    )
@@ -1,6 +1,6 @@
+import os
 from pathlib import Path
 from datetime import timedelta
-from celery.schedules import crontab
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -13,6 +13,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "dj_rest_auth",   
@@ -27,14 +28,38 @@ INSTALLED_APPS = [
     "fines"
 ]
 
+# Lean runtime (LEAN_RUNTIME=1): keep the interactive API docs and debug tooling
+# out of the process; /api/schema/ still serves the prebuilt schema file
+LEAN_RUNTIME = os.environ.get("LEAN_RUNTIME", "0") == "1"
+
+API_DOCS_ENABLED = not LEAN_RUNTIME
+
+if LEAN_RUNTIME:
+    INSTALLED_APPS.remove("drf_spectacular")
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "dj_rest_auth.jwt_auth.JWTCookieAuthentication",
+        "accounts.authentication.RoleClaimsJWTCookieAuthentication",
     ),
     'DEFAULT_FILTER_BACKENDS': (
         "django_filters.rest_framework.DjangoFilterBackend",
     ),
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Stands in for drf_spectacular's AutoSchema until a schema is generated
+    "DEFAULT_SCHEMA_CLASS": "core.openapi.LazyAutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
+    # orjson for application/json, MessagePack for Accept: application/msgpack
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.ORJSONRenderer",
+        "core.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "rest_framework.parsers.JSONParser",
+        "core.renderers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SITE_ID = 1
@@ -47,6 +72,12 @@ JWT_AUTH_COOKIE = "library-auth"
 
 JWT_AUTH_REFRESH_COOKIE = "library-refresh-token"
 
+JWT_TOKEN_CLAIMS_SERIALIZER = "accounts.tokens.RoleClaimsTokenObtainPairSerializer"
+
+# Opt-in: put is_staff/member_id/librarian_id into access tokens and authorize
+# API requests from them without loading the user (see accounts/tokens.py)
+JWT_ROLE_CLAIMS = False
+
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("JWT",),
 }
@@ -56,8 +87,13 @@ SPECTACULAR_SETTINGS = {
     "DESCRIPTION": "This is API documentation for library management system.",
     "VERSION": "1.0.0",
     "SERVE_INCLUDE_SCHEMA": False,
+    "DEFAULT_GENERATOR_CLASS": "core.spectacular.SchemaGenerator",
+    "PREPROCESSING_HOOKS": ["core.spectacular.exclude_undocumented_endpoints"],
 }
 
+# Routes left out of the OpenAPI schema (core.spectacular)
+OPENAPI_EXCLUDED_PATH_PREFIXES = ("/fines/", "/reservation/")
+
 SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("JWT",),
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
@@ -68,8 +104,12 @@ INTERNAL_IPS = [
 ]
 
 MIDDLEWARE = [
+    "core.profiling.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.compression.CompressionMiddleware",
+    "core.metrics.MetricsMiddleware",
+    "core.queries.QueryInstrumentationMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -77,7 +117,6 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -142,9 +181,52 @@ MEDIA_ROOT = BASE_DIR / "mediafiles"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-CELERY_BEAT_SCHEDULE = {
-    "create_fines": {
-        "task": "fines.tasks.create_fines",
-        "schedule": crontab(hour=0, minute=10)
-    }
-}
\ No newline at end of file
+# Seconds a user's Member/Librarian ids stay in the default cache (accounts.roles);
+# 0 disables. With a per-process cache, role changes reach other processes
+# only after this long, so deployments share the cache (core/checks.py)
+ROLE_CACHE_TTL = 60
+
+# Make a per-process (locmem) alias used for cross-process state a system check
+# error instead of a warning (core/checks.py); the docker and production
+# settings point CACHES at Redis and set it
+SHARED_CACHE_REQUIRED = False
+
+# library.representations: cached API bodies of authors, books and copies.
+# The shared tier is this CACHES alias; each process keeps a small LRU in
+# front of it whose entries live REPRESENTATION_LOCAL_TTL seconds
+REPRESENTATION_CACHE_ALIAS = "default"
+REPRESENTATION_CACHE_TTL = 24 * 60 * 60
+REPRESENTATION_LOCAL_MAX_ENTRIES = 10_000
+REPRESENTATION_LOCAL_TTL = 5
+
+# core.response_cache: public list/retrieve responses, with a render lock
+# held up to RESPONSE_CACHE_LOCK_TIMEOUT seconds and waited on up to
+# RESPONSE_CACHE_WAIT seconds by concurrent requests for the same key
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TTL = 5 * 60
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+RESPONSE_CACHE_WAIT = 2.0
+
+# core.compression: gzip/brotli for compressible responses of at least
+# COMPRESSION_MIN_BYTES (brotli only when the package is installed)
+COMPRESSION_MIN_BYTES = 1024
+COMPRESSION_BROTLI_QUALITY = 4
+
+# core.metrics: /metrics answers scrapes from these addresses or with
+# `Authorization: Bearer <METRICS_TOKEN>`; Celery workers serve their own
+# metrics on CELERY_METRICS_ADDR:CELERY_METRICS_PORT when set, without access
+# control, so keep that address off public interfaces
+METRICS_ALLOWED_IPS = ("127.0.0.1",)
+METRICS_TOKEN = None
+CELERY_METRICS_PORT = None
+CELERY_METRICS_ADDR = "127.0.0.1"
+
+# core.queries: X-Query-* response headers (default: DEBUG), repeated-shape
+# threshold for N+1 reports, and raising on over-budget requests (for tests)
+QUERY_N_PLUS_ONE_THRESHOLD = 5
+QUERY_BUDGET_ENFORCE = False
+
+# core.profiling: fraction of requests run under cProfile (requests with a
+# signed X-Profile header always are); pstats files go to PROFILE_DIR
+PROFILE_SAMPLE_RATE = 0.0
+PROFILE_DIR = BASE_DIR / "profiles"
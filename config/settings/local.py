@@ -10,7 +10,9 @@ SECRET_KEY = env.str("SECRET_KEY")
 
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS")
 
-INSTALLED_APPS += ["debug_toolbar"]
+if not LEAN_RUNTIME:
+    INSTALLED_APPS += ["debug_toolbar"]
+    MIDDLEWARE += ["debug_toolbar.middleware.DebugToolbarMiddleware"]
 
 # PostgreSQL configuration
 # Make sure PostgreSQL is running and database/user are created
@@ -35,3 +37,6 @@ DATABASES = {
 # }
 
 CELERY_BROKER_URL = env.str("CELERY_BROKER_URL")
+
+# Chords (fines.tasks.create_fines_sharded) need a result backend
+CELERY_RESULT_BACKEND = env.str("CELERY_RESULT_BACKEND", default=CELERY_BROKER_URL)
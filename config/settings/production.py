@@ -22,3 +22,23 @@ DATABASES = {
 }
 
 CELERY_BROKER_URL = env.str("CELERY_BROKER_URL")
+
+# Chords (fines.tasks.create_fines_sharded) need a result backend
+CELERY_RESULT_BACKEND = env.str("CELERY_RESULT_BACKEND", default=CELERY_BROKER_URL)
+
+# Cached state is invalidated by whichever process handles a write, so every
+# web worker, Celery worker and management command must share it
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": env.str("CACHE_URL", default="redis://redis:6379/1"),
+    }
+}
+
+SHARED_CACHE_REQUIRED = True
+
+METRICS_TOKEN = env.str("METRICS_TOKEN", default=None)
+
+CELERY_METRICS_PORT = env.int("CELERY_METRICS_PORT", default=9808)
+# Reachable from the compose network only: the port is exposed, not published
+CELERY_METRICS_ADDR = env.str("CELERY_METRICS_ADDR", default="0.0.0.0")
@@ -1,16 +1,17 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
 
 # Import admin configuration to unregister models
 # This ensures Token is unregistered after all apps load their admin
 import config.admin
+from core.metrics import metrics_view
+from core.openapi import lazy_spectacular_view, schema_view
+from core.profiling import profile_detail_view, profile_list_view
 
 urlpatterns = [
+    path("admin/profiles/", profile_list_view, name="admin-profiles"),
+    path("admin/profiles/<str:name>/", profile_detail_view, name="admin-profile-detail"),
     path("admin/", admin.site.urls),
     path("auth/", include("dj_rest_auth.urls")),
     path("account/", include("accounts.urls")),  # HTML pages: /account/login, /account/register
@@ -19,8 +20,16 @@ urlpatterns = [
     path("reservation/", include("reservation.urls")),
     path("borrowing/", include("borrowing.urls")),
     path("fines/", include("fines.urls")),
-    path("__debug__/", include("debug_toolbar.urls")),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
-    path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger"),
-    path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
+    path("metrics", metrics_view, name="metrics"),
+    # Served from static/openapi/ when built (manage.py build_openapi_schema)
+    path("api/schema/", schema_view, name="schema"),
 ]
+
+if settings.API_DOCS_ENABLED:
+    urlpatterns += [
+        path("api/docs/", lazy_spectacular_view("SpectacularSwaggerView", url_name="schema"), name="swagger"),
+        path("api/redoc/", lazy_spectacular_view("SpectacularRedocView", url_name="schema"), name="redoc"),
+    ]
+
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    urlpatterns += [path("__debug__/", include("debug_toolbar.urls"))]
@@ -6,6 +6,11 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
+        # Registers the Celery task signal handlers of the metrics
+        import core.metrics
+        # Registers the shared cache system check
+        import core.checks
+
         # Unregister Auth Token from Django Admin
         # This runs when the app is ready, but Token might be registered later
         # So we also unregister it in config/urls.py as a backup
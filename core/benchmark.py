@@ -0,0 +1,557 @@
+"""
+Endpoint load benchmark.
+
+seed_dataset() creates a tagged synthetic library of a given size (books,
+copies, members, loans, overdue fines) in bounded batches; run_benchmark()
+drives every HTML and API route in-process through Django's test client as
+an anonymous user, a member and a librarian, and records latency
+percentiles, throughput and query counts per route. Everything runs offline
+against the configured database; results are plain dicts written as JSON and
+compared with compare_results() against a stored baseline.
+
+Routes that write are timed in pairs that undo each other (checkout and
+return, reserve and cancel) or on throwaway rows, so the dataset is left as
+it was. Not driven: the Django admin and /admin/profiles/ (staff tooling),
+/metrics (scrapers only), /api/docs/ and /api/redoc/ (static HTML shells),
+and dj-rest-auth under /auth/ (seeded users have no usable password; the
+member and librarian clients authenticate with JWTs and sessions instead).
+"""
+import json
+import math
+import platform
+from datetime import date, timedelta
+from itertools import islice
+from statistics import mean
+from time import perf_counter
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import Librarian, Member
+from borrowing.models import BorrowedBook
+from fines.accrual import accrue_fines
+from fines.models import Fine
+from library.models import Author, Book, BookItem
+from library.representations import invalidate_representations
+from library.search import update_search_vectors
+from reservation.models import ReservedBook
+from .queries import capture_queries
+from .response_cache import invalidate_tags
+
+
+SEED_BATCH_SIZE = 10_000
+
+SEED_SUBJECT = "Benchmark"
+
+# Barcodes, ISBNs and usernames of seeded rows start with these
+BARCODE_PREFIX = "BX"
+ISBN_PREFIX = "99"
+# Not "bench-": benchmark_checkout creates bench-<run>-<n> users, which
+# the startswith lookups here would count, pick as the member or delete
+USERNAME_PREFIX = "endpoint-bench-"
+# Users created by the register route, deleted after it is timed
+REGISTER_USERNAME_PREFIX = f"{USERNAME_PREFIX}register-"
+
+COPIES_PER_BOOK = 5
+BOOKS_PER_AUTHOR = 4
+
+# The debug toolbar only renders for INTERNAL_IPS; keep it out of the timings
+CLIENT_ADDRESS = "192.0.2.10"
+
+
+def batched(iterable, size=SEED_BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def seeded_counts():
+    return {
+        "books": Book.objects.filter(subject=SEED_SUBJECT).count(),
+        "items": BookItem.objects.filter(barcode__startswith=BARCODE_PREFIX).count(),
+        "members": Member.objects.filter(user__username__startswith=USERNAME_PREFIX).count(),
+    }
+
+
+def seed_dataset(items, members=1000, loan_ratio=0.1, overdue_ratio=0.2, log=print):
+    """
+    Create `items` copies of items // COPIES_PER_BOOK books, `members`
+    members and loans of loan_ratio of the copies, overdue_ratio of them past
+    due (and fined). A dataset already seeded with at least `items` copies is
+    reused as is.
+    """
+    existing = seeded_counts()
+    if existing["items"] >= items and existing["members"] >= members:
+        log(f"Reusing seeded dataset: {existing}")
+        return existing
+
+    clear_dataset()
+    User = get_user_model()
+    books = max(1, items // COPIES_PER_BOOK)
+    authors = max(1, books // BOOKS_PER_AUTHOR)
+    started = perf_counter()
+
+    for batch in batched(Author(name=f"Benchmark Author {n}") for n in range(authors)):
+        Author.objects.bulk_create(batch)
+    first_author = Author.objects.filter(name__startswith="Benchmark Author ").aggregate(Min("id"))["id__min"]
+    log(f"authors={authors} ({perf_counter() - started:.1f}s)")
+
+    for batch in batched(
+        Book(
+            title=f"Benchmark Book {n}",
+            isbn=f"{ISBN_PREFIX}{n:011d}",
+            subject=SEED_SUBJECT,
+            page_counts=100 + n % 900,
+        )
+        for n in range(books)
+    ):
+        Book.objects.bulk_create(batch)
+    book_ids = Book.objects.filter(subject=SEED_SUBJECT).aggregate(low=Min("id"), high=Max("id"))
+    low_book, high_book = book_ids["low"], book_ids["high"]
+
+    Through = Book.author.through
+    for batch in batched(
+        Through(book_id=book_id, author_id=first_author + (book_id - low_book) // BOOKS_PER_AUTHOR % authors)
+        for book_id in range(low_book, high_book + 1)
+    ):
+        Through.objects.bulk_create(batch)
+    log(f"books={books} ({perf_counter() - started:.1f}s)")
+
+    publication_date = date(2000, 1, 1)
+    for batch in batched(
+        BookItem(
+            book_id=low_book + n // COPIES_PER_BOOK,
+            barcode=f"{BARCODE_PREFIX}{n:012d}",
+            status=BookItem.STATUS_AVAILABLE,
+            publication_date=publication_date,
+        )
+        for n in range(books * COPIES_PER_BOOK)
+    ):
+        BookItem.objects.bulk_create(batch)
+    log(f"items={books * COPIES_PER_BOOK} ({perf_counter() - started:.1f}s)")
+
+    for batch in batched(
+        User(
+            username=f"{USERNAME_PREFIX}{n}",
+            email=f"{USERNAME_PREFIX}{n}@example.com",
+            password="!",
+            # The last user is the librarian; LibrarianViewset needs staff
+            is_staff=n == members,
+        )
+        for n in range(members + 1)
+    ):
+        User.objects.bulk_create(batch)
+    users = User.objects.filter(username__startswith=USERNAME_PREFIX).order_by("id")
+    librarian_user = users.get(username=f"{USERNAME_PREFIX}{members}")
+    Librarian.objects.create(user=librarian_user, staff_code="00000000")
+    for batch in batched(
+        Member(user_id=user_id, membership_code="00000000")
+        for user_id in users.exclude(pk=librarian_user.pk).values_list("id", flat=True).iterator()
+    ):
+        Member.objects.bulk_create(batch)
+    log(f"members={members} ({perf_counter() - started:.1f}s)")
+
+    seed_loans(int(books * COPIES_PER_BOOK * loan_ratio), overdue_ratio)
+    log(f"loans ({perf_counter() - started:.1f}s)")
+
+    # bulk_create skips BookItem.save() and the search vector signals
+    for low in range(low_book, high_book + 1, SEED_BATCH_SIZE):
+        span = Book.objects.filter(id__gte=low, id__lt=low + SEED_BATCH_SIZE)
+        Book.rebuild_counters(span)
+        update_search_vectors(span.values("pk"))
+    accrue_fines()
+    log(f"counters, search vectors and fines ({perf_counter() - started:.1f}s)")
+    return seeded_counts()
+
+
+def seed_loans(loans, overdue_ratio):
+    """
+    Lend the first copy of successive books to successive members (one copy
+    per member and book), overdue_ratio of them already past due.
+    """
+    member_ids = list(
+        Member.objects.filter(user__username__startswith=USERNAME_PREFIX).values_list("id", flat=True)
+    )
+    if not loans or not member_ids:
+        return
+    copies = (
+        BookItem.objects.filter(barcode__startswith=BARCODE_PREFIX)
+        .order_by("book_id", "id")
+        .distinct("book_id")
+        .values_list("id", "book_id")
+    )
+    today = date.today()
+    overdue_every = round(1 / overdue_ratio) if overdue_ratio else 0
+    for batch in batched(islice(copies.iterator(), loans)):
+        with transaction.atomic():
+            BorrowedBook.objects.bulk_create(
+                BorrowedBook(
+                    book_item_id=item_id,
+                    book_id=book_id,
+                    borrower_id=member_ids[n % len(member_ids)],
+                    due_date=today - timedelta(days=3)
+                    if overdue_every and n % overdue_every == 0
+                    else today + timedelta(days=14),
+                )
+                for n, (item_id, book_id) in enumerate(batch)
+            )
+            item_ids = [item_id for item_id, _ in batch]
+            BookItem.objects.filter(pk__in=item_ids).update(
+                status=BookItem.STATUS_BORROWED, updated_at=timezone.now()
+            )
+            invalidate_representations(BookItem, item_ids)
+            invalidate_tags(BookItem, BorrowedBook)
+
+
+def clear_dataset():
+    """Delete every seeded row (cascades to copies, loans, fines and ledger entries)"""
+    Book.objects.filter(subject=SEED_SUBJECT).delete()
+    Author.objects.filter(name__startswith="Benchmark Author ").delete()
+    get_user_model().objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+
+# Routes
+
+
+class Route:
+    def __init__(self, name, path, role=None, method="get", data=None, stream=False):
+        self.name = name
+        self.path = path
+        self.role = role
+        self.method = method
+        self.data = data
+        self.stream = stream
+
+
+def sample_ids():
+    """Ids of seeded rows the detail routes point at"""
+    member = Member.objects.filter(user__username__startswith=USERNAME_PREFIX).order_by("id").first()
+    loan = BorrowedBook.objects.filter(borrower=member).order_by("id").first()
+    book = Book.objects.filter(subject=SEED_SUBJECT).order_by("id").first()
+    return {
+        "book": book.pk,
+        "author": book.author.values_list("pk", flat=True).first(),
+        "item": book.book_items.values_list("pk", flat=True).first(),
+        "member": member.pk,
+        "loan": loan.pk if loan else 0,
+        "fine": Fine.objects.order_by("id").values_list("pk", flat=True).first() or 0,
+    }
+
+
+def build_routes(ids):
+    book, item = ids["book"], ids["item"]
+    return [
+        # HTML pages
+        Route("html.books", "/library/books/"),
+        Route("html.books.search", "/library/books/?search=benchmark+book+42"),
+        Route("html.books.member", "/library/books/", role="member"),
+        Route("html.book_detail", f"/library/books/{book}/", role="member"),
+        Route("html.login", "/account/login/"),
+        Route("html.register", "/account/register/"),
+        Route("api.schema", "/api/schema/"),
+        # Catalog API
+        Route("api.books", "/library/api/books/"),
+        Route("api.books.search", "/library/api/books/?search=benchmark+book+42"),
+        Route("api.books.count", "/library/api/books/?count=estimate"),
+        Route("api.book", f"/library/api/books/{book}/"),
+        Route("api.authors", "/library/api/authors/"),
+        Route("api.author", f"/library/api/authors/{ids['author']}/"),
+        Route("api.items", f"/library/api/books/{book}/items/"),
+        Route("api.item", f"/library/api/books/{book}/items/{item}/"),
+        Route("api.export.books", "/library/api/export/books.ndjson?title=Benchmark+Book+1", role="member", stream=True),
+        Route("api.export.items", "/library/api/export/items.ndjson?status=B", role="member", stream=True),
+        # Circulation API
+        Route("api.loans.member", "/borrowing/books/", role="member"),
+        Route("api.loans.librarian", "/borrowing/books/", role="librarian"),
+        Route("api.loan", f"/borrowing/books/{ids['loan']}/", role="librarian"),
+        Route(
+            "api.export.loans", f"/borrowing/export/loans.ndjson?borrower={ids['member']}",
+            role="librarian", stream=True,
+        ),
+        Route("api.reservations", "/reservation/books/", role="librarian"),
+        Route("api.fines", "/fines/", role="librarian"),
+        Route("api.fine", f"/fines/{ids['fine']}/", role="librarian"),
+        Route("api.fine_ledger", "/fines/ledger/", role="librarian"),
+        Route("api.balance", f"/fines/balances/{ids['member']}/", role="member"),
+        Route(
+            "api.export.fines", f"/fines/export/fines.ndjson?member={ids['member']}",
+            role="librarian", stream=True,
+        ),
+        # Accounts API
+        Route("api.members", "/accounts/members/", role="librarian"),
+        Route("api.librarians", "/accounts/librarians/", role="librarian"),
+    ]
+
+
+def make_clients():
+    """Test clients per role; API requests carry a JWT, HTML pages a session"""
+    librarian = Librarian.objects.filter(user__username__startswith=USERNAME_PREFIX).select_related("user").first()
+    member = Member.objects.filter(user__username__startswith=USERNAME_PREFIX).order_by("id").select_related("user").first()
+    clients = {None: Client(REMOTE_ADDR=CLIENT_ADDRESS)}
+    for role, user in (("member", member.user), ("librarian", librarian.user)):
+        token = RefreshToken.for_user(user).access_token
+        client = Client(REMOTE_ADDR=CLIENT_ADDRESS, HTTP_AUTHORIZATION=f"JWT {token}")
+        client.force_login(user)
+        clients[role] = client
+    return clients
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+class Sample:
+    """Timings, query counts and status codes of one route"""
+
+    def __init__(self):
+        self.timings = []
+        self.queries = []
+        self.statuses = set()
+
+    def send(self, send, *args, stream=False, **kwargs):
+        with capture_queries() as report:
+            started = perf_counter()
+            response = send(*args, **kwargs)
+            if stream:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = perf_counter() - started
+        self.timings.append(elapsed * 1000)
+        self.queries.append(report.count)
+        self.statuses.add(response.status_code)
+        return response
+
+    def summary(self, route, warmup):
+        return summarize(route, self.timings[warmup:], self.queries[warmup:], self.statuses)
+
+
+def time_route(client, route, requests, warmup):
+    sample = Sample()
+    send = getattr(client, route.method)
+    for _ in range(warmup + requests):
+        sample.send(send, route.path, stream=route.stream)
+    return sample.summary(route, warmup)
+
+
+def lendable_copies(member_id, count):
+    """(copy id, book id) of one available copy each of `count` books the member has not borrowed"""
+    return list(
+        BookItem.objects.filter(barcode__startswith=BARCODE_PREFIX, status=BookItem.STATUS_AVAILABLE)
+        .exclude(book__loans__borrower_id=member_id)
+        .order_by("-book_id", "id")
+        .distinct("book_id")
+        .values_list("id", "book_id")[:count]
+    )
+
+
+def time_checkout(client, member_id, requests, warmup):
+    """
+    POST a loan through the API and DELETE it again, on copies of books no
+    seeded loan touches; the dataset is left as it was.
+    """
+    copies = [item_id for item_id, _ in lendable_copies(member_id, warmup + requests)]
+    checkout, giveback = Sample(), Sample()
+    due_date = (date.today() + timedelta(days=14)).isoformat()
+    for item_id in copies:
+        response = checkout.send(
+            client.post,
+            "/borrowing/books/",
+            {"book_item": item_id, "borrower": member_id, "due_date": due_date},
+            content_type="application/json",
+        )
+        if response.status_code == 201:
+            giveback.send(client.delete, f"/borrowing/books/{response.json()['id']}/")
+    return (
+        checkout.summary(Route("api.checkout", "/borrowing/books/", "librarian", "post"), warmup),
+        giveback.summary(Route("api.return", "/borrowing/books/<id>/", "librarian", "delete"), warmup),
+    )
+
+
+def time_html_borrow(client, librarian_client, member_id, requests, warmup):
+    """Borrow through the catalog page's form; each loan is returned through the API, untimed"""
+    sample = Sample()
+    for _, book_id in lendable_copies(member_id, warmup + requests):
+        sample.send(client.post, f"/library/books/{book_id}/borrow/")
+        loan_id = BorrowedBook.objects.filter(borrower_id=member_id, book_id=book_id).values_list("pk", flat=True).first()
+        if loan_id is not None:
+            librarian_client.delete(f"/borrowing/books/{loan_id}/")
+    return sample.summary(Route("html.borrow", "/library/books/<id>/borrow/", "member", "post"), warmup)
+
+
+def time_reservation(client, member_id, requests, warmup):
+    """POST a reservation and DELETE it again, which makes the copy available again"""
+    reserve, cancel = Sample(), Sample()
+    due_time = (timezone.now() + timedelta(days=2)).isoformat()
+    for item_id, _ in lendable_copies(member_id, warmup + requests):
+        response = reserve.send(
+            client.post,
+            "/reservation/books/",
+            {"book_item": item_id, "reserver": member_id, "due_time": due_time},
+            content_type="application/json",
+        )
+        # The create serializer does not return the id
+        reservation_id = ReservedBook.objects.filter(book_item_id=item_id).values_list("pk", flat=True).first()
+        if response.status_code == 201 and reservation_id is not None:
+            cancel.send(client.delete, f"/reservation/books/{reservation_id}/")
+    return (
+        reserve.summary(Route("api.reservation.create", "/reservation/books/", "librarian", "post"), warmup),
+        cancel.summary(Route("api.reservation.cancel", "/reservation/books/<id>/", "librarian", "delete"), warmup),
+    )
+
+
+def time_register(client, requests, warmup):
+    """Register members through the public API; they are deleted afterwards"""
+    sample = Sample()
+    run = timezone.now().strftime("%H%M%S%f")
+    try:
+        for n in range(warmup + requests):
+            username = f"{REGISTER_USERNAME_PREFIX}{run}-{n}"
+            sample.send(
+                client.post,
+                "/accounts/api/register/",
+                {
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "password": "benchmark-password",
+                    "password_confirm": "benchmark-password",
+                },
+                content_type="application/json",
+            )
+    finally:
+        get_user_model().objects.filter(username__startswith=REGISTER_USERNAME_PREFIX).delete()
+    return sample.summary(Route("api.register", "/accounts/api/register/", None, "post"), warmup)
+
+
+def time_logout(user, requests, warmup):
+    """Log out of the HTML pages, each time from a fresh session"""
+    sample = Sample()
+    for _ in range(warmup + requests):
+        client = Client(REMOTE_ADDR=CLIENT_ADDRESS)
+        client.force_login(user)
+        sample.send(client.get, "/account/logout/")
+    return sample.summary(Route("html.logout", "/account/logout/", "member"), warmup)
+
+
+def time_import(client, book_id, requests, warmup):
+    """Upload a one-record feed that re-imports a seeded book unchanged"""
+    book = Book.objects.get(pk=book_id)
+    feed = json.dumps({
+        "isbn": book.isbn,
+        "title": book.title,
+        "subject": book.subject,
+        "page_counts": book.page_counts,
+        "authors": list(book.author.order_by("id").values_list("name", flat=True)),
+    }).encode()
+    sample = Sample()
+    for _ in range(warmup + requests):
+        sample.send(client.post, "/library/api/import/", {"file": SimpleUploadedFile("feed.jsonl", feed)})
+    return sample.summary(Route("api.import", "/library/api/import/", "librarian", "post"), warmup)
+
+
+def summarize(route, timings, queries, statuses):
+    requests = len(timings)
+    if not requests:
+        return {"path": route.path, "role": route.role or "anonymous", "status": sorted(statuses), "requests": 0}
+    timings = sorted(timings)
+    total_seconds = sum(timings) / 1000
+    return {
+        "path": route.path,
+        "role": route.role or "anonymous",
+        "status": sorted(statuses),
+        "requests": requests,
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "mean_ms": round(mean(timings), 3),
+        "throughput_rps": round(requests / total_seconds, 1) if total_seconds else None,
+        "queries_mean": round(mean(queries), 2),
+        "queries_max": max(queries),
+    }
+
+
+def run_benchmark(requests=50, warmup=5, only=None, log=print):
+    def selected(name):
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    ids = sample_ids()
+    routes = [route for route in build_routes(ids) if selected(route.name)]
+
+    results = {}
+    log(f"{'route':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'qs':>6}  status")
+    with override_settings(ALLOWED_HOSTS=["testserver"]):
+        clients = make_clients()
+        librarian, member = clients["librarian"], clients["member"]
+        for route in routes:
+            results[route.name] = time_route(clients[route.role], route, requests, warmup)
+        if selected("api.checkout"):
+            results["api.checkout"], results["api.return"] = time_checkout(
+                librarian, ids["member"], requests, warmup
+            )
+        if selected("html.borrow"):
+            results["html.borrow"] = time_html_borrow(member, librarian, ids["member"], requests, warmup)
+        if selected("api.reservation"):
+            results["api.reservation.create"], results["api.reservation.cancel"] = time_reservation(
+                librarian, ids["member"], requests, warmup
+            )
+        if selected("api.register"):
+            results["api.register"] = time_register(clients[None], requests, warmup)
+        if selected("api.import"):
+            results["api.import"] = time_import(librarian, ids["book"], requests, warmup)
+        if selected("html.logout"):
+            member_user = Member.objects.select_related("user").get(pk=ids["member"]).user
+            results["html.logout"] = time_logout(member_user, requests, warmup)
+
+    for name, result in results.items():
+        if result["requests"]:
+            log(
+                f"{name:<22}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{result['queries_max']:>6}  {result['status']}"
+            )
+        else:
+            log(f"{name:<22}  no requests (e.g. no available copies left)")
+
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "dataset": seeded_counts(),
+            "requests": requests,
+            "warmup": warmup,
+        },
+        "routes": results,
+    }
+
+
+def compare_results(results, baseline, tolerance=0.2):
+    """
+    Regressions of `results` against `baseline`: routes whose p95 grew by
+    more than `tolerance` (a fraction), that run more queries than before,
+    or that sent no requests this time although the baseline timed them.
+    Routes the baseline has no timings for are skipped.
+    """
+    regressions = []
+    for name, result in results["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if previous is None or "p95_ms" not in previous:
+            continue
+        if "p95_ms" not in result:
+            regressions.append(f"{name}: no requests were sent (status {result['status']})")
+            continue
+        if previous["p95_ms"] and result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {result['p95_ms']} ms")
+        if result["queries_max"] > previous["queries_max"]:
+            regressions.append(f"{name}: queries {previous['queries_max']} -> {result['queries_max']}")
+    return regressions
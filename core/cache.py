@@ -0,0 +1,110 @@
+"""
+Two-tier object cache.
+
+TieredCache puts a small in-process LRU in front of a Django cache backend
+(the shared tier, selected by alias, so tests can point it at a locmem or
+file backend). Lookups are batched: get_many() answers what it can from the
+LRU and fetches the rest with one shared-tier get_many().
+
+Deletes reach the shared tier and the LRU of the process that makes them;
+other processes keep their LRU copy for at most `local_ttl` seconds, which
+bounds how stale a read can be.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+from .metrics import record_cache_lookup
+
+
+class LocalLRU:
+    """Thread-safe LRU of (expires_at, value) entries"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        now = time.monotonic()
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, value = entry
+                if expires_at <= now:
+                    del self.entries[key]
+                    continue
+                self.entries.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, mapping):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        with self.lock:
+            for key, value in mapping.items():
+                self.entries[key] = (expires_at, value)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TieredCache:
+    def __init__(self, name, alias="default", timeout=None, local_max_entries=10_000, local_ttl=5):
+        self.name = name
+        self.alias = alias
+        self.timeout = timeout
+        self.local = LocalLRU(local_max_entries, local_ttl)
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def get_many(self, keys):
+        found = self.local.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self.shared.get_many(missing)
+            self.local.set_many(shared)
+            found.update(shared)
+        record_cache_lookup(self.name, True, len(found))
+        record_cache_lookup(self.name, False, len(keys) - len(found))
+        return found
+
+    def add(self, key, value):
+        """Store `value` unless the shared tier already has one; returns the value in effect"""
+        if not self.shared.add(key, value, timeout=self.timeout):
+            value = self.shared.get(key, value)
+        self.local.set_many({key: value})
+        return value
+
+    def set_many(self, mapping):
+        if not mapping:
+            return
+        self.shared.set_many(mapping, timeout=self.timeout)
+        self.local.set_many(mapping)
+
+    def delete_many(self, keys):
+        if not keys:
+            return
+        self.local.delete_many(keys)
+        self.shared.delete_many(keys)
+
+    def clear_local(self):
+        self.local.clear()
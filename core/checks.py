@@ -0,0 +1,52 @@
+"""
+System checks for state kept in Django caches.
+
+Some features keep state that every process has to agree on in a CACHES
+alias, and invalidate it from whichever process handles the write, including
+management commands such as import_catalog. A per-process backend
+(LocMemCache, Django's default when CACHES is not set) keeps an invalidation
+inside the process that made it: other gunicorn workers and Celery serve
+stale data until the entries expire.
+
+With SHARED_CACHE_REQUIRED (set by the docker and production settings) such
+an alias is an error, which stops `manage.py check`, migrate and runserver;
+otherwise it is a warning outside DEBUG.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+
+PER_PROCESS_BACKENDS = ("django.core.cache.backends.locmem.LocMemCache",)
+
+# (setting naming the CACHES alias or None, its default, what keeps shared state there)
+SHARED_STATE_CACHES = (
+    ("REPRESENTATION_CACHE_ALIAS", "default", "library.representations versions"),
+    ("RESPONSE_CACHE_ALIAS", "default", "core.response_cache generations, locks and collection ETags"),
+    (None, "default", "accounts.roles profile ids and accounts.tokens token versions"),
+)
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    required = getattr(settings, "SHARED_CACHE_REQUIRED", False)
+    if not required and settings.DEBUG:
+        return []
+
+    users = {}
+    for setting, default, user in SHARED_STATE_CACHES:
+        alias = getattr(settings, setting, default) if setting else default
+        users.setdefault(alias, []).append(user)
+
+    messages = []
+    for alias, alias_users in users.items():
+        backend = settings.CACHES.get(alias, {}).get("BACKEND")
+        if backend not in PER_PROCESS_BACKENDS:
+            continue
+        level, id = (Error, "core.E001") if required else (Warning, "core.W001")
+        messages.append(level(
+            f"CACHES[{alias!r}] is a per-process cache, but {', '.join(alias_users)} "
+            "must be shared by every web and Celery process.",
+            hint="Use a shared backend such as Redis (see config/settings/docker.py).",
+            id=id,
+        ))
+    return messages
@@ -0,0 +1,122 @@
+"""
+Response compression.
+
+CompressionMiddleware compresses API and export bodies (JSON, MessagePack,
+NDJSON, CSV, the OpenAPI schema) of at least COMPRESSION_MIN_BYTES with
+brotli when the client accepts `br` and the brotli package is installed, else
+gzip. HTML is left alone: the session-authenticated pages embed CSRF tokens,
+and compressing secrets next to reflected input is what BREACH exploits.
+Streaming responses (the bulk exports) are compressed chunk by chunk as
+they are sent, without buffering the whole body. As in Django's
+GZipMiddleware, a strong ETag becomes weak on compressed responses;
+conditional GETs compare ETags weakly, so 304s still work.
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+COMPRESSION_MIN_BYTES = getattr(settings, "COMPRESSION_MIN_BYTES", 1024)
+
+# Brotli quality for dynamic responses: 4 compresses about as fast as gzip -6, but smaller
+COMPRESSION_BROTLI_QUALITY = getattr(settings, "COMPRESSION_BROTLI_QUALITY", 4)
+
+COMPRESSIBLE_TYPES = re.compile(
+    r"^(application/(json|msgpack|x-ndjson|vnd\.oai\.openapi)|text/csv|application/[^;]*\+json)"
+)
+
+
+def accepted_encodings(request):
+    """Content codings the client accepts with a non-zero q-value"""
+    encodings = set()
+    for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, _, params = part.partition(";")
+        if quality(params) > 0:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+def quality(params):
+    """q-value of one Accept-Encoding entry, clamped to [0, 1]; unparseable counts as 0"""
+    match = re.search(r"q=([^;\s]*)", params)
+    if match is None:
+        return 1.0
+    try:
+        value = float(match.group(1))
+    except ValueError:
+        return 0.0
+    if not value > 0:  # also NaN
+        return 0.0
+    return min(value, 1.0)
+
+
+def choose_encoding(request):
+    encodings = accepted_encodings(request)
+    if brotli is not None and "br" in encodings:
+        return "br"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compress_body(content, encoding):
+    if encoding == "br":
+        return brotli.compress(content, quality=COMPRESSION_BROTLI_QUALITY)
+    return compress_string(content)
+
+
+def compress_stream(sequence, encoding):
+    if encoding == "br":
+        return brotli_sequence(sequence)
+    return compress_sequence(sequence)
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header("Content-Encoding"):
+            return response
+        if not COMPRESSIBLE_TYPES.match(response.get("Content-Type", "")):
+            return response
+        if not response.streaming and len(response.content) < COMPRESSION_MIN_BYTES:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response["Content-Length"]
+        else:
+            compressed = compress_body(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
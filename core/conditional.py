@@ -0,0 +1,114 @@
+"""
+Conditional GET for API views.
+
+ConditionalGetMixin gives list and retrieve responses a strong ETag and a
+Last-Modified date, and answers If-None-Match / If-Modified-Since with 304
+before the response is rendered:
+
+- retrieve is stamped by the object's `last_modified_fields` (updated_at
+  columns, possibly across relations such as "book__updated_at"), read with
+  one indexed lookup instead of loading and serializing the object;
+- list is stamped by the generations of `collection_tags` kept by
+  core.response_cache, so checking a collection runs no query at all. The
+  generations are only current in every process when RESPONSE_CACHE_ALIAS is
+  a shared cache, which core/checks.py enforces.
+
+Last-Modified has one-second resolution, so it names the end of the second
+of the latest change and is only sent (and If-Modified-Since only honored)
+once that second is over; otherwise a change later in the same second would
+be answered with 304.
+
+ETags also cover the view, URL kwargs, query string, negotiated media type
+and user, since those select what the body contains.
+"""
+import hashlib
+import time
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.generics import get_object_or_404
+
+from .response_cache import normalize_query, tag_generations
+
+
+def make_etag(request, view, *parts):
+    parts = [
+        f"{type(view).__module__}.{type(view).__qualname__}",
+        view.action,
+        repr(sorted(view.kwargs.items())),
+        repr(normalize_query(request.query_params)),
+        getattr(request, "accepted_media_type", ""),
+        str(request.user.pk),
+        *map(str, parts),
+    ]
+    digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+class ConditionalGetMixin:
+    # Columns whose latest value stamps one object; empty disables retrieve stamps
+    last_modified_fields = ("updated_at",)
+    # Models whose changes start a new version of every list of this view
+    collection_tags = ()
+
+    def get_resource_stamp(self, request):
+        """(ETag, time of the last change) of the requested object, or None if it is not visible"""
+        if not self.last_modified_fields:
+            return None
+        fields = [F(field) for field in self.last_modified_fields]
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .select_related(None)
+            .prefetch_related(None)
+            .only("pk")
+            .annotate(last_modified=Greatest(*fields) if len(fields) > 1 else fields[0])
+        )
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except Http404:
+            return None  # let the regular retrieve report it
+        self.check_object_permissions(request, instance)
+        etag = make_etag(request, self, instance.pk, instance.last_modified.isoformat())
+        return etag, instance.last_modified.timestamp()
+
+    def get_collection_stamp(self, request):
+        """(ETag, time of the last change) of the requested list, or None without `collection_tags`"""
+        if not self.collection_tags:
+            return None
+        generations = tag_generations(self.collection_tags)
+        modified_at = max(started_at for started_at, _ in generations)
+        return make_etag(request, self, *(token for _, token in generations)), modified_at
+
+    def conditional_response(self, request, stamp, render):
+        if stamp is None or request.method not in ("GET", "HEAD"):
+            return render()
+        etag, modified_at = stamp
+        last_modified = int(modified_at) + 1
+        if last_modified > time.time():
+            last_modified = None  # the second of the last change is not over yet
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            self.get_collection_stamp(request),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            self.get_resource_stamp(request),
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
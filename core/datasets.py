@@ -0,0 +1,324 @@
+"""
+Synthetic production-scale dataset.
+
+generate_dataset() samples authors, members, books with skewed popularity,
+copies, loans with an overdue tail and reservations from one seeded
+random.Random, so a seed always yields the same data. Primary keys are
+assigned up front, which lets every table, the Book.author link table
+included, be written without reading anything back: with PostgreSQL COPY
+in chunks of books, elsewhere with bulk_create. Fines are then accrued by
+the set-based fines.accrual job so the ledger and balances agree with them.
+"""
+import csv
+import io
+import math
+import random
+from datetime import date, timedelta
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts.models import Member
+from borrowing.models import BorrowedBook
+from fines.accrual import accrue_fines
+from library.models import Author, Book, BookItem
+from library.search import update_search_vectors
+from reservation.models import ReservedBook
+from .response_cache import invalidate_tags
+
+
+DATASET_CHUNK_SIZE = 10_000  # books per COPY round
+
+FIRST_NAMES = (
+    "Ada", "Alan", "Anna", "Boris", "Chen", "Clara", "David", "Elena", "Farah", "Grace",
+    "Hugo", "Ines", "Jonas", "Kenji", "Lena", "Marta", "Nadia", "Omar", "Priya", "Rosa",
+    "Sven", "Tomas", "Uma", "Victor", "Wen", "Yara", "Zoe",
+)
+LAST_NAMES = (
+    "Abbott", "Bauer", "Costa", "Dubois", "Eriksen", "Fischer", "Garcia", "Haddad", "Ivanova",
+    "Jensen", "Kowalski", "Larsen", "Moreau", "Nakamura", "Okafor", "Petrov", "Quinn", "Rossi",
+    "Santos", "Tanaka", "Urban", "Virtanen", "Weber", "Xu", "Young", "Zimmermann",
+)
+TITLE_WORDS = (
+    "Silent", "River", "Empire", "Garden", "Winter", "Glass", "Shadow", "Letters", "Northern",
+    "Machine", "History", "Harbor", "Secret", "Light", "Stone", "Orchard", "Theory", "Voyage",
+    "Kingdom", "Memory", "Ocean", "Fire", "Atlas", "Song", "Forest", "Algorithm", "Storm",
+)
+SUBJECTS = (
+    "Fiction", "History", "Science", "Mathematics", "Philosophy", "Poetry", "Biography",
+    "Computer Science", "Art", "Economics", "Travel", "Children", "Mystery", "Fantasy",
+)
+
+
+class DatasetOptions:
+    def __init__(
+        self,
+        seed=42,
+        scale=1.0,
+        authors=20_000,
+        books=100_000,
+        members=50_000,
+        mean_copies=5,
+        max_copies=200,
+        popularity_skew=1.1,
+        multi_author_ratio=0.2,
+        loan_ratio=0.1,
+        overdue_ratio=0.15,
+        mean_overdue_days=10,
+        reservation_ratio=0.02,
+        chunk_size=DATASET_CHUNK_SIZE,
+    ):
+        self.seed = seed
+        self.authors = max(1, int(authors * scale))
+        self.books = max(1, int(books * scale))
+        self.members = max(1, int(members * scale))
+        self.mean_copies = mean_copies
+        self.max_copies = max_copies
+        # Zipf exponent of title popularity: copies and loans follow rank ** -skew
+        self.popularity_skew = popularity_skew
+        self.multi_author_ratio = multi_author_ratio
+        self.loan_ratio = loan_ratio
+        self.overdue_ratio = overdue_ratio
+        self.mean_overdue_days = mean_overdue_days
+        self.reservation_ratio = reservation_ratio
+        self.chunk_size = chunk_size
+
+
+class TableWriter:
+    """
+    Rows of one model as tuples of `fields` (attnames, explicit primary key
+    first), written with COPY on PostgreSQL and bulk_create elsewhere.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.rows = []
+        self.written = 0
+
+    def add(self, *row):
+        self.rows.append(row)
+
+    def flush(self):
+        if not self.rows:
+            return
+        if connection.vendor == "postgresql":
+            self.copy()
+        else:
+            self.model.objects.bulk_create(
+                (self.model(**dict(zip(self.fields, row))) for row in self.rows),
+                batch_size=1000,
+            )
+        self.written += len(self.rows)
+        self.rows = []
+
+    def copy(self):
+        buffer = io.StringIO()
+        # Strings are quoted, so an unquoted empty field (None) is NULL and "" stays ""
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerows(self.rows)
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        columns = ", ".join(quote(self.model._meta.get_field(name).column) for name in self.fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {quote(self.model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+
+def next_id(model):
+    return (model.objects.aggregate(max_id=Max("pk"))["max_id"] or 0) + 1
+
+
+def reset_sequences(models):
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def zipf_weights(count, skew):
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+def cumulative(weights):
+    total = 0.0
+    sums = []
+    for weight in weights:
+        total += weight
+        sums.append(total)
+    return sums
+
+
+def random_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def random_title(rng):
+    words = rng.sample(TITLE_WORDS, rng.randint(1, 3))
+    return " ".join(["The", *words] if rng.random() < 0.4 else words)
+
+
+def generate_people(rng, options, log):
+    User = get_user_model()
+    first_author = next_id(Author)
+    authors = TableWriter(Author, ["id", "name", "description"])
+    for n in range(options.authors):
+        authors.add(first_author + n, random_name(rng), None)
+        if len(authors.rows) >= options.chunk_size:
+            authors.flush()
+    authors.flush()
+
+    first_user, first_member = next_id(User), next_id(Member)
+    users = TableWriter(
+        User,
+        ["id", "password", "last_login", "is_superuser", "username", "first_name", "last_name",
+         "email", "is_staff", "is_active", "date_joined", "token_version"],
+    )
+    members = TableWriter(Member, ["id", "user_id", "membership_code"])
+    joined = timezone.now()
+    for n in range(options.members):
+        user_id = first_user + n
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        users.add(
+            user_id, "!", None, False, f"reader{user_id}", first_name, last_name,
+            f"reader{user_id}@example.org", False, True, joined, 0,
+        )
+        members.add(first_member + n, user_id, f"{rng.randrange(10 ** 8):08d}")
+        if len(users.rows) >= options.chunk_size:
+            with transaction.atomic():
+                users.flush()
+                members.flush()
+    with transaction.atomic():
+        users.flush()
+        members.flush()
+    log(f"authors={authors.written} members={members.written}")
+    return first_author, first_member
+
+
+def generate_catalog(rng, options, first_author, first_member, log):
+    """Books, author links, copies, loans and reservations, one chunk of books per transaction"""
+    writers = {
+        # COPY skips model defaults; the counters are rebuilt once the chunk is in
+        "books": TableWriter(
+            Book,
+            ["id", "title", "isbn", "subject", "page_counts",
+             "total_copies", "available_copies", "borrowed_copies", "reserved_copies", "updated_at"],
+        ),
+        "links": TableWriter(Book.author.through, ["id", "book_id", "author_id"]),
+        "items": TableWriter(BookItem, ["id", "book_id", "barcode", "status", "publication_date", "updated_at"]),
+        "loans": TableWriter(
+            BorrowedBook,
+            ["id", "book_item_id", "book_id", "borrower_id", "borrowed_date", "due_date", "updated_at"],
+        ),
+        "reservations": TableWriter(ReservedBook, ["id", "book_item_id", "reserver_id", "reserved_at", "due_time"]),
+    }
+    ids = {
+        "books": next_id(Book),
+        "links": next_id(Book.author.through),
+        "items": next_id(BookItem),
+        "loans": next_id(BorrowedBook),
+        "reservations": next_id(ReservedBook),
+    }
+    first_book = ids["books"]
+
+    book_weights = zipf_weights(options.books, options.popularity_skew)
+    mean_weight = sum(book_weights) / options.books
+    # Prolific authors: author choice is skewed too, but flatter than titles
+    author_cum_weights = cumulative(zipf_weights(options.authors, options.popularity_skew / 2))
+    author_ids = range(first_author, first_author + options.authors)
+
+    today = date.today()
+    now = timezone.now()
+    first_publication = date(1950, 1, 1).toordinal()
+    publication_span = today.toordinal() - first_publication
+
+    def flush_chunk(low_book, high_book):
+        with transaction.atomic():
+            for writer in writers.values():
+                writer.flush()
+            chunk = Book.objects.filter(id__gte=low_book, id__lte=high_book)
+            Book.rebuild_counters(chunk)
+            update_search_vectors(chunk.values("pk"))
+            invalidate_tags(Author, Book, BookItem, BorrowedBook)
+
+    chunk_start = first_book
+    for rank in range(options.books):
+        book_id = ids["books"]
+        ids["books"] += 1
+        popularity = book_weights[rank] / mean_weight
+        writers["books"].add(
+            book_id, random_title(rng), f"979{book_id:010d}", rng.choice(SUBJECTS), rng.randint(48, 1200),
+            0, 0, 0, 0, now,
+        )
+
+        author_count = 1
+        if rng.random() < options.multi_author_ratio:
+            author_count = 2 if rng.random() < 0.75 else rng.randint(3, 5)
+        for author_id in set(rng.choices(author_ids, cum_weights=author_cum_weights, k=author_count)):
+            writers["links"].add(ids["links"], book_id, author_id)
+            ids["links"] += 1
+
+        copies = min(options.max_copies, max(1, round(options.mean_copies * popularity)))
+        # Popular titles are borrowed more: loan probability grows with sqrt(popularity)
+        loan_probability = min(0.95, options.loan_ratio * max(0.2, math.sqrt(popularity)))
+        borrowers = set()
+        publication_date = date.fromordinal(first_publication + rng.randrange(publication_span))
+        for _ in range(copies):
+            item_id = ids["items"]
+            ids["items"] += 1
+            status = BookItem.STATUS_AVAILABLE
+            if rng.random() < loan_probability and len(borrowers) < options.members:
+                status = BookItem.STATUS_BORROWED
+                borrower_id = first_member + rng.randrange(options.members)
+                while borrower_id in borrowers:
+                    borrower_id = first_member + rng.randrange(options.members)
+                borrowers.add(borrower_id)
+                if rng.random() < options.overdue_ratio:
+                    # Long tail of overdue days
+                    due_date = today - timedelta(days=1 + int(rng.expovariate(1 / options.mean_overdue_days)))
+                else:
+                    due_date = today + timedelta(days=rng.randint(0, 13))
+                writers["loans"].add(
+                    ids["loans"], item_id, book_id, borrower_id, due_date - timedelta(days=14), due_date, now
+                )
+                ids["loans"] += 1
+            elif rng.random() < options.reservation_ratio:
+                status = BookItem.STATUS_RESERVED
+                writers["reservations"].add(
+                    ids["reservations"],
+                    item_id,
+                    first_member + rng.randrange(options.members),
+                    now,
+                    now + timedelta(hours=rng.randint(1, 72)),
+                )
+                ids["reservations"] += 1
+            writers["items"].add(item_id, book_id, f"G{item_id:014d}", status, publication_date, now)
+
+        if ids["books"] - chunk_start >= options.chunk_size:
+            flush_chunk(chunk_start, ids["books"] - 1)
+            log(f"books={ids['books'] - first_book} items={writers['items'].written}")
+            chunk_start = ids["books"]
+    flush_chunk(chunk_start, ids["books"] - 1)
+    return {name: writer.written for name, writer in writers.items()}
+
+
+def generate_dataset(options, log=print):
+    """Generate and load a dataset; returns row counts per table and the elapsed seconds"""
+    started = perf_counter()
+    rng = random.Random(options.seed)
+    first_author, first_member = generate_people(rng, options, log)
+    counts = generate_catalog(rng, options, first_author, first_member, log)
+    reset_sequences([
+        Author, get_user_model(), Member, Book, Book.author.through, BookItem, BorrowedBook, ReservedBook,
+    ])
+    counts["fines"] = accrue_fines()["rows"]
+    counts["authors"] = options.authors
+    counts["members"] = options.members
+    counts["elapsed"] = round(perf_counter() - started, 1)
+    return counts
@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import clear_dataset, compare_results, run_benchmark, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic library and time every HTML and API route in-process; "
+        "writes p50/p95/p99 latency, throughput and query counts as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=10_000, help="Book copies to seed (10k to 10M)")
+        parser.add_argument("--members", type=int, default=1000)
+        parser.add_argument("--requests", type=int, default=50, help="Timed requests per route")
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--only", nargs="*", help="Route name prefixes, e.g. api.books html")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument("--baseline", help="Compare with a previous results file")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 growth (0.2 = 20%%)")
+        parser.add_argument("--clear", action="store_true", help="Delete the seeded rows afterwards")
+
+    def handle(self, *args, **options):
+        log = self.stdout.write
+        seed_dataset(options["items"], members=options["members"], log=log)
+        results = run_benchmark(
+            requests=options["requests"], warmup=options["warmup"], only=options["only"], log=log
+        )
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}."))
+        if options["clear"]:
+            clear_dataset()
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline:
+                regressions = compare_results(results, json.load(baseline), options["tolerance"])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.renderer_benchmark import RENDERERS, run_renderer_benchmark
+from core.serializer_benchmark import build_cases
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer with the orjson and MessagePack renderers: "
+        "render time and body size, raw and compressed, on existing rows"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Rows rendered per case")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed passes per renderer (median is reported)")
+        parser.add_argument("--only", nargs="*", choices=[case.name for case in build_cases()])
+        parser.add_argument("--output", help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        results = run_renderer_benchmark(rows=options["rows"], repeat=options["repeat"], only=options["only"])
+
+        self.stdout.write(
+            f"{'case':<14}{'renderer':<10}{'rows':>7}{'render us':>12}{'bytes':>11}{'gzip':>10}{'brotli':>10}"
+        )
+        for name, result in results.items():
+            if not result["rows"]:
+                self.stdout.write(f"{name:<14}{'':<10}{0:>7}  (no rows; seed with generate_dataset)")
+                continue
+            for renderer in RENDERERS:
+                timing = result["renderers"][renderer]
+                brotli_bytes = timing.get("brotli_bytes", "-")
+                self.stdout.write(
+                    f"{name:<14}{renderer:<10}{result['rows']:>7}{timing['render_us']:>12.1f}"
+                    f"{timing['bytes']:>11}{timing['gzip_bytes']:>10}{brotli_bytes:>10}"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.serializer_benchmark import build_cases, run_serializer_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the read-path serializers against the DRF ModelSerializers they replace, "
+        "in microseconds per row on existing rows (core/tests.py checks their JSON matches)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Rows rendered per case")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed passes per case (median is reported)")
+        parser.add_argument("--only", nargs="*", choices=[case.name for case in build_cases()])
+        parser.add_argument("--output", help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        results = run_serializer_benchmark(rows=options["rows"], repeat=options["repeat"], only=options["only"])
+
+        self.stdout.write(f"{'case':<14}{'rows':>7}{'drf us/row':>12}{'fast us/row':>13}{'speedup':>9}")
+        for name, result in results.items():
+            if not result["rows"]:
+                self.stdout.write(f"{name:<14}{0:>7}  (no rows; seed with generate_dataset)")
+                continue
+            self.stdout.write(
+                f"{name:<14}{result['rows']:>7}{result['model_serializer_us_per_row']:>12.2f}"
+                f"{result['fast_us_per_row']:>13.2f}{result['speedup']:>8.2f}x"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
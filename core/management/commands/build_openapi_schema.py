@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.openapi import render_schema, schema_path
+
+
+class Command(BaseCommand):
+    help = "Write the OpenAPI schema to static/openapi/schema-<VERSION>.yaml, or --check that it is current"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true", help="Fail if the stored schema differs from the generated one"
+        )
+
+    def handle(self, *args, **options):
+        path = schema_path()
+        content = render_schema()
+
+        if options["check"]:
+            if not path.is_file() or path.read_bytes() != content:
+                raise CommandError(f"{path} is stale; run manage.py build_openapi_schema.")
+            self.stdout.write(self.style.SUCCESS(f"{path} is up to date."))
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path} ({len(content)} bytes)."))
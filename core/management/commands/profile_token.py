@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.profiling import PROFILE_TOKEN_MAX_AGE, make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed X-Profile header value that makes ProfilingMiddleware profile a request"
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_profile_token())
+        self.stderr.write(f"Valid for {PROFILE_TOKEN_MAX_AGE} seconds, e.g. curl -H 'X-Profile: <token>' ...")
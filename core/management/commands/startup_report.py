@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.startup import TARGETS, measure_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Cold-start report for web and Celery worker processes: phase, AppConfig.ready() "
+        "and per-package import times, optionally gated by a maximum total"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=TARGETS, nargs="+", default=list(TARGETS))
+        parser.add_argument("--repeat", type=int, default=3, help="Cold starts per target (median is reported)")
+        parser.add_argument("--top", type=int, default=15, help="Packages listed by import time")
+        parser.add_argument(
+            "--lean", action="store_true",
+            help="Measure with LEAN_RUNTIME=1 and fail if docs or debug packages are still imported",
+        )
+        parser.add_argument("--max-seconds", type=float, help="Fail if a target's median total exceeds this")
+        parser.add_argument("--output", help="Write the reports to this JSON file")
+
+    def handle(self, *args, **options):
+        env = {"LEAN_RUNTIME": "1"} if options["lean"] else None
+        reports = []
+        for target in options["target"]:
+            report = measure_startup(target, repeat=options["repeat"], top=options["top"], env=env)
+            reports.append(report)
+            self.write_report(report)
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(reports, output, indent=2)
+
+        if options["lean"]:
+            leaky = [r for r in reports if r["lean_excluded_loaded"]]
+            if leaky:
+                raise CommandError("; ".join(
+                    f"{r['target']} still imports {', '.join(r['lean_excluded_loaded'])}" for r in leaky
+                ) + " under LEAN_RUNTIME=1")
+
+        limit = options["max_seconds"]
+        if limit is not None:
+            slow = [r for r in reports if r["phases"]["total"] > limit]
+            if slow:
+                raise CommandError(", ".join(
+                    f"{r['target']} starts in {r['phases']['total']:.3f}s" for r in slow
+                ) + f" (limit {limit}s)")
+            self.stdout.write(self.style.SUCCESS(f"All targets start within {limit}s."))
+
+    def write_report(self, report):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{report['target']} ({report['settings']}, median of {report['repeat']})"
+        ))
+        for phase, seconds in report["phases"].items():
+            self.stdout.write(f"  {phase:<28}{seconds * 1000:>10.1f} ms")
+        self.stdout.write("  AppConfig.ready()")
+        for label, seconds in report["ready"].items():
+            self.stdout.write(f"    {label:<26}{seconds * 1000:>10.1f} ms")
+        self.stdout.write("  Imports (self time by package)")
+        for package, seconds in report["imports"].items():
+            self.stdout.write(f"    {package:<26}{seconds * 1000:>10.1f} ms")
+        loaded = ", ".join(report["lean_excluded_loaded"]) or "none"
+        self.stdout.write(f"  Docs/debug packages loaded: {loaded}")
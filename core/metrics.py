@@ -0,0 +1,186 @@
+"""
+Prometheus metrics.
+
+Request latency, status codes, per-request query counts and DB time are
+recorded by MetricsMiddleware (query figures come from
+core.queries.QueryInstrumentationMiddleware), cache lookups by the callers
+of record_cache_lookup(), and Celery task durations and row counts by task
+signal handlers. metrics_view serves them in the text exposition format to
+scrapers from METRICS_ALLOWED_IPS or presenting `Authorization: Bearer
+<METRICS_TOKEN>`; anyone else gets 403.
+
+With PROMETHEUS_MULTIPROC_DIR set (see docker-entrypoint.sh), every gunicorn
+worker and Celery process writes its samples to mmap-backed files in that
+directory and the view aggregates all of them, so any worker can answer a
+scrape for the whole pod.
+
+Celery workers run in their own containers, so with CELERY_METRICS_PORT set
+the main worker process serves the same aggregate on that port
+(prometheus_client's HTTP server); tasks run in prefork children, whose
+samples reach it through the worker's own PROMETHEUS_MULTIPROC_DIR. That
+server has no access control, so it binds CELERY_METRICS_ADDR (loopback by
+default; the compose files bind the container's private network and do not
+publish the port).
+"""
+import hmac
+import os
+from time import perf_counter
+
+from celery.signals import task_postrun, task_prerun, worker_init, worker_process_shutdown
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+
+METRICS_ALLOWED_IPS = getattr(settings, "METRICS_ALLOWED_IPS", ("127.0.0.1",))
+
+METRICS_TOKEN = getattr(settings, "METRICS_TOKEN", None)
+
+CELERY_METRICS_PORT = getattr(settings, "CELERY_METRICS_PORT", None)
+
+CELERY_METRICS_ADDR = getattr(settings, "CELERY_METRICS_ADDR", "127.0.0.1")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250)
+
+TASK_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 900, 1800, 3600)
+
+# Label for requests that matched no URL pattern, to keep route cardinality bounded
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUEST_LATENCY = Histogram(
+    "library_http_request_duration_seconds",
+    "Request latency by route",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    "library_http_requests_total",
+    "Requests by route and status code",
+    ["method", "route", "status"],
+)
+DB_QUERIES = Histogram(
+    "library_db_queries_per_request",
+    "Database queries run by one request",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME = Histogram(
+    "library_db_time_seconds",
+    "Database time spent by one request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "library_cache_lookups_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ["cache", "result"],
+)
+TASK_DURATION = Histogram(
+    "library_celery_task_duration_seconds",
+    "Celery task run time",
+    ["task", "state"],
+    buckets=TASK_BUCKETS,
+)
+TASK_ROWS = Counter(
+    "library_celery_task_rows_total",
+    "Rows written by Celery tasks that report them (e.g. fines.tasks.create_fines)",
+    ["task"],
+)
+
+
+def record_cache_lookup(cache_name, hit, count=1):
+    if count:
+        CACHE_LOOKUPS.labels(cache=cache_name, result="hit" if hit else "miss").inc(count)
+
+
+def request_route(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    return match.route or match.view_name or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Place before QueryInstrumentationMiddleware so its report is complete here"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = perf_counter()
+        response = self.get_response(request)
+        elapsed = perf_counter() - started
+
+        route = request_route(request)
+        REQUEST_LATENCY.labels(method=request.method, route=route).observe(elapsed)
+        REQUESTS.labels(method=request.method, route=route, status=str(response.status_code)).inc()
+        report = getattr(request, "query_report", None)
+        if report is not None:
+            DB_QUERIES.labels(route=route).observe(report.count)
+            DB_TIME.labels(route=route).observe(report.duration)
+        return response
+
+
+def metrics_registry():
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def is_metrics_scraper(request):
+    if request.META.get("REMOTE_ADDR") in METRICS_ALLOWED_IPS:
+        return True
+    authorization = request.META.get("HTTP_AUTHORIZATION", "")
+    return bool(METRICS_TOKEN) and hmac.compare_digest(authorization, f"Bearer {METRICS_TOKEN}")
+
+
+def metrics_view(request):
+    if not is_metrics_scraper(request):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+# Celery
+
+task_started = {}
+
+
+@worker_init.connect
+def start_worker_metrics_server(**kwargs):
+    if CELERY_METRICS_PORT:
+        start_http_server(int(CELERY_METRICS_PORT), addr=CELERY_METRICS_ADDR, registry=metrics_registry())
+
+
+@worker_process_shutdown.connect
+def forget_worker_process(pid=None, **kwargs):
+    # Drop the live gauges of an exiting prefork child, as config/gunicorn.py does for web workers
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, **kwargs):
+    task_started[task_id] = perf_counter()
+
+
+@task_postrun.connect
+def record_task_run(task_id=None, task=None, retval=None, state=None, **kwargs):
+    started = task_started.pop(task_id, None)
+    if started is not None:
+        TASK_DURATION.labels(task=task.name, state=state or "UNKNOWN").observe(perf_counter() - started)
+    # Accrual tasks return {"batches", "rows", "elapsed"}
+    if isinstance(retval, dict) and isinstance(retval.get("rows"), int):
+        TASK_ROWS.labels(task=task.name).inc(retval["rows"])
@@ -4,6 +4,8 @@ from django.contrib.auth.models import AbstractUser
 
 class User(AbstractUser):
     email = models.EmailField(unique=True)
+    # Bumped to revoke access tokens carrying role claims (see accounts/tokens.py)
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"{self.username}, {self.email}"
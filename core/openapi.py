@@ -0,0 +1,97 @@
+"""
+Precomputed OpenAPI schema.
+
+`manage.py build_openapi_schema` renders the drf_spectacular schema once to
+static/openapi/schema-<VERSION>.yaml (`--check` fails when that file no
+longer matches the code). schema_view serves the file with a strong ETag and
+answers If-None-Match with 304; without the file it falls back to live
+generation. drf_spectacular's views and generator are imported on first
+use, and DEFAULT_SCHEMA_CLASS is LazyAutoSchema, so loading the URLconf
+(which evaluates APIView.schema for every @api_view) does not import
+drf_spectacular either; see core/spectacular.py.
+"""
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.schemas.inspectors import ViewInspector
+
+
+OPENAPI_DIR = Path(settings.BASE_DIR) / "static" / "openapi"
+
+SCHEMA_CONTENT_TYPE = "application/vnd.oai.openapi; charset=utf-8"
+
+
+class LazyAutoSchema(ViewInspector):
+    """DEFAULT_SCHEMA_CLASS placeholder, replaced by drf_spectacular's AutoSchema during generation"""
+
+
+def schema_version():
+    return settings.SPECTACULAR_SETTINGS.get("VERSION", "0")
+
+
+def schema_path(version=None):
+    return OPENAPI_DIR / f"schema-{version or schema_version()}.yaml"
+
+
+def render_schema():
+    """The current schema as YAML bytes, generated by introspecting the views"""
+    from drf_spectacular.renderers import OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiYamlRenderer().render(schema, renderer_context={})
+
+
+class PrecomputedSchema:
+    """Schema file contents and ETag, read once per process"""
+
+    def __init__(self, path):
+        self.path = path
+        self.content = None
+        self.etag = None
+
+    def load(self):
+        if self.content is None and self.path.is_file():
+            self.content = self.path.read_bytes()
+            self.etag = f'"{hashlib.sha256(self.content).hexdigest()}"'
+        return self.content is not None
+
+
+precomputed_schema = PrecomputedSchema(schema_path())
+
+
+def lazy_spectacular_view(name, **initkwargs):
+    """A drf_spectacular view class, imported and instantiated on first request"""
+    view = None
+
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            from drf_spectacular import views
+
+            view = getattr(views, name).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return csrf_exempt(dispatch)
+
+
+live_schema_view = lazy_spectacular_view("SpectacularAPIView")
+
+
+def schema_view(request, *args, **kwargs):
+    if not precomputed_schema.load():
+        return live_schema_view(request, *args, **kwargs)
+
+    # Weak comparison: CompressionMiddleware weakens the ETag of compressed responses
+    etags = [tag.strip().replace("W/", "", 1) for tag in request.META.get("HTTP_IF_NONE_MATCH", "").split(",")]
+    if precomputed_schema.etag in etags or "*" in etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(precomputed_schema.content, content_type=SCHEMA_CONTENT_TYPE)
+    response["ETag"] = precomputed_schema.etag
+    response["Cache-Control"] = "public, max-age=0, must-revalidate"
+    return response
@@ -0,0 +1,286 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+TIE_BREAKER = "id"
+
+# Cursor values tagged as datetimes: {"dt": isoformat}
+DATETIME_KEY = "dt"
+
+
+def normalize_ordering(ordering):
+    """
+    Make an ordering usable as a keyset: plain field names only and always
+    ending in the primary key, so every row has a unique position.
+    """
+    ordering = [str(field) for field in ordering if isinstance(field, str) and field != "?"]
+    if not any(field.lstrip("-") in (TIE_BREAKER, "pk") for field in ordering):
+        ordering.append(TIE_BREAKER)
+    return tuple(ordering)
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """
+    Q object selecting the rows strictly after `values` in `ordering`
+    (strictly before when `reverse` is set), i.e. the row-value comparison
+    (a, b, id) > (x, y, z) spelled out so it works with mixed directions.
+    """
+    condition = Q()
+    equal_so_far = Q()
+    for field, value in zip(ordering, values):
+        descending = field.startswith("-")
+        name = field.lstrip("-")
+        lookup = "lt" if descending != reverse else "gt"
+        condition |= equal_so_far & Q(**{f"{name}__{lookup}": value})
+        equal_so_far &= Q(**{name: value})
+    return condition
+
+
+def get_row_value(row, field):
+    name = field.lstrip("-")
+    if isinstance(row, dict):
+        return row[name]
+    value = row
+    for part in name.split("__"):
+        value = getattr(value, part)
+    return value
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder cuts datetimes to milliseconds, which would make rows
+    created within one millisecond repeat or be skipped across pages; cursor
+    datetimes keep every digit and are tagged so they decode as datetimes.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return {DATETIME_KEY: o.isoformat()}
+        return super().default(o)
+
+
+def decode_cursor_value(obj):
+    if set(obj) == {DATETIME_KEY}:
+        value = parse_datetime(obj[DATETIME_KEY])
+        if value is None:
+            raise ValueError("Invalid cursor datetime")
+        return value
+    return obj
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps({"v": list(values), "r": reverse}, cls=CursorJSONEncoder)
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (values, reverse) or raise ValueError for a malformed cursor"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        payload = json.loads(
+            urlsafe_b64decode(padded.encode()).decode(), object_hook=decode_cursor_value
+        )
+        return list(payload["v"]), bool(payload.get("r", False))
+    except Exception as exc:  # binascii.Error, JSON and shape errors
+        raise ValueError("Invalid cursor") from exc
+
+
+def estimate_count(queryset):
+    """
+    Planner row estimate on PostgreSQL (no table scan); exact COUNT(*) elsewhere.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated queryset.
+
+    Fetches page_size + 1 rows past the cursor, so a deep page costs the same
+    index range scan as the first one and no COUNT(*) is ever needed.
+    """
+
+    def __init__(self, queryset, ordering, cursor=None, page_size=20):
+        self.ordering = normalize_ordering(ordering)
+        self.page_size = page_size
+        values, reverse = decode_cursor(cursor) if cursor else (None, False)
+        if values is not None and len(values) != len(self.ordering):
+            raise ValueError("Invalid cursor")
+
+        if reverse:
+            order_by = [
+                field[1:] if field.startswith("-") else f"-{field}" for field in self.ordering
+            ]
+        else:
+            order_by = list(self.ordering)
+        queryset = queryset.order_by(*order_by)
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, values, reverse=reverse))
+
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.object_list = rows
+        self.has_next = has_more if not reverse else values is not None
+        self.has_previous = values is not None if not reverse else has_more
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def row_cursor(self, row, reverse=False):
+        return encode_cursor([get_row_value(row, field) for field in self.ordering], reverse)
+
+    @property
+    def next_cursor(self):
+        if not self.has_next or not self.object_list:
+            return None
+        return self.row_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous or not self.object_list:
+            return None
+        return self.row_cursor(self.object_list[0], reverse=True)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the view's `ordering` columns plus `id`,
+    e.g. ("title", "id") for books or ("due_date", "id") for loans.
+
+    An explicitly ordered queryset (such as ranked search results) keeps its
+    own ordering. The total is only computed on request: ?count=exact runs
+    COUNT(*), ?count=estimate reads the PostgreSQL planner estimate.
+    """
+
+    page_size = None  # REST_FRAMEWORK["PAGE_SIZE"]
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering = ("id",)
+
+    def get_page_size(self, request):
+        page_size = self.page_size or api_settings.PAGE_SIZE or 50
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_ordering(self, queryset, view):
+        if queryset.query.order_by:
+            return queryset.query.order_by
+        return getattr(view, "ordering", None) or self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.count = None
+
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == "exact":
+            self.count = queryset.count()
+        elif count_mode == "estimate":
+            self.count = estimate_count(queryset)
+
+        try:
+            self.page = KeysetPage(
+                queryset,
+                self.get_ordering(queryset, view),
+                cursor=request.query_params.get(self.cursor_query_param),
+                page_size=self.get_page_size(request),
+            )
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound("Invalid cursor.")
+        return self.page.object_list
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self.get_link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self.get_link(self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response["count"] = self.count
+        response["next"] = self.get_next_link()
+        response["previous"] = self.get_previous_link()
+        response["results"] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include the total: 'exact' or 'estimate'.",
+                "schema": {"type": "string", "enum": ["exact", "estimate"]},
+            },
+        ]
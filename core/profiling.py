@@ -0,0 +1,152 @@
+"""
+On-demand request profiling.
+
+ProfilingMiddleware runs cProfile on a sampled fraction of requests
+(PROFILE_SAMPLE_RATE) and on requests carrying a valid signed X-Profile
+header (see the profile_token command), and writes one pstats file per
+request to PROFILE_DIR. Untriggered requests cost one random() call and a
+header lookup. Staff can browse the slowest captured profiles at
+/admin/profiles/.
+"""
+import cProfile
+import io
+import pstats
+import random
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core import signing
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+
+
+PROFILE_SAMPLE_RATE = getattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+
+PROFILE_DIR = Path(getattr(settings, "PROFILE_DIR", Path(settings.BASE_DIR) / "profiles"))
+
+# Oldest profiles are deleted beyond this many files
+PROFILE_MAX_FILES = getattr(settings, "PROFILE_MAX_FILES", 500)
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+
+PROFILE_TOKEN_MAX_AGE = getattr(settings, "PROFILE_TOKEN_MAX_AGE", 3600)
+
+PROFILE_SALT = "core.profiling"
+
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "calls")
+
+# <epoch ms>-<duration ms>-<method>-<path slug>.prof
+PROFILE_NAME_RE = re.compile(r"^(\d+)-(\d+)-([A-Z]+)-([\w.]*)\.prof$")
+
+
+def make_profile_token():
+    """Value for the X-Profile header, valid for PROFILE_TOKEN_MAX_AGE seconds"""
+    return signing.TimestampSigner(salt=PROFILE_SALT).sign("profile")
+
+
+def is_valid_profile_token(token):
+    try:
+        signing.TimestampSigner(salt=PROFILE_SALT).unsign(token, max_age=PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(request):
+    token = request.META.get(PROFILE_HEADER)
+    if token:
+        return is_valid_profile_token(token)
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def write_profile(profiler, request, duration):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^\w.]+", "_", request.path).strip("_")[:80]
+    name = f"{int(time.time() * 1000)}-{int(duration * 1000)}-{request.method}-{slug}.prof"
+    profiler.dump_stats(PROFILE_DIR / name)
+
+    profiles = sorted(PROFILE_DIR.glob("*.prof"))
+    for stale in profiles[: max(0, len(profiles) - PROFILE_MAX_FILES)]:
+        try:
+            stale.unlink()
+        except FileNotFoundError:
+            pass  # Removed by another worker
+    return name
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        response["X-Profile-Id"] = write_profile(profiler, request, time.perf_counter() - started)
+        return response
+
+
+def list_profiles():
+    """Captured profiles as dicts, slowest first"""
+    profiles = []
+    if not PROFILE_DIR.is_dir():
+        return profiles
+    for path in PROFILE_DIR.glob("*.prof"):
+        match = PROFILE_NAME_RE.match(path.name)
+        if match is None:
+            continue
+        captured_ms, duration_ms, method, slug = match.groups()
+        profiles.append({
+            "name": path.name,
+            "captured_at": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(int(captured_ms) / 1000)),
+            "duration_ms": int(duration_ms),
+            "method": method,
+            "path": slug,
+        })
+    profiles.sort(key=lambda profile: profile["duration_ms"], reverse=True)
+    return profiles
+
+
+def profile_path(name):
+    if not PROFILE_NAME_RE.match(name):
+        raise Http404("Unknown profile.")
+    path = PROFILE_DIR / name
+    if not path.is_file():
+        raise Http404("Unknown profile.")
+    return path
+
+
+@staff_member_required
+def profile_list_view(request):
+    return render(request, "admin/profiles.html", {
+        "title": "Request profiles",
+        "profiles": list_profiles()[:100],
+    })
+
+
+@staff_member_required
+def profile_detail_view(request, name):
+    path = profile_path(name)
+    if request.GET.get("download"):
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=name)
+
+    output = io.StringIO()
+    stats = pstats.Stats(str(path), stream=output)
+    sort = request.GET.get("sort")
+    stats.sort_stats(sort if sort in PROFILE_SORT_KEYS else "cumulative").print_stats(40)
+    return render(request, "admin/profiles.html", {
+        "title": f"Profile {name}",
+        "profile": name,
+        "stats": output.getvalue(),
+        "sort_keys": PROFILE_SORT_KEYS,
+    })
@@ -0,0 +1,175 @@
+"""
+Per-request query instrumentation.
+
+QueryInstrumentationMiddleware wraps every database call of a request
+(connection.execute_wrapper, so it works without DEBUG), counts queries and
+time, and groups them by shape: the SQL with parameters and IN-lists
+collapsed. Running one shape QUERY_N_PLUS_ONE_THRESHOLD times or more is
+reported as a likely N+1.
+
+Views declare budgets with `query_budget`, an int or a dict keyed by viewset
+action, e.g. {"list": 4, "retrieve": 3}. Over-budget and N+1 requests are
+logged to the "core.queries" logger as one JSON object; with
+QUERY_BUDGET_ENFORCE on (e.g. in tests) they raise QueryBudgetExceeded, so
+the test client fails the request.
+"""
+import json
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)")
+NUMBER = re.compile(r"\b\d+\b")
+STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+# The settings are read per request, so override_settings in tests applies
+def n_plus_one_threshold():
+    return getattr(settings, "QUERY_N_PLUS_ONE_THRESHOLD", 5)
+
+
+def query_budget_enforced():
+    return getattr(settings, "QUERY_BUDGET_ENFORCE", False)
+
+
+def query_instrumentation_headers():
+    return getattr(settings, "QUERY_INSTRUMENTATION_HEADERS", settings.DEBUG)
+
+
+def query_shape(sql):
+    """SQL with literals and IN-lists collapsed, so N+1 queries share a shape"""
+    sql = STRING.sub("?", sql)
+    sql = NUMBER.sub("?", sql)
+    return IN_LIST.sub("IN (...)", sql)
+
+
+class QueryReport:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.budget = None
+        self.view = None
+        self.n_plus_one_threshold = n_plus_one_threshold()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - start
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    @property
+    def duration_ms(self):
+        return round(self.duration * 1000, 2)
+
+    @property
+    def repeated(self):
+        """{shape: count} of the shapes run QUERY_N_PLUS_ONE_THRESHOLD times or more"""
+        return {
+            shape: count
+            for shape, count in self.shapes.items()
+            if count >= self.n_plus_one_threshold
+        }
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.count > self.budget
+
+    def problems(self):
+        problems = []
+        if self.over_budget:
+            problems.append(f"{self.count} queries, budget is {self.budget}")
+        for shape, count in self.repeated.items():
+            problems.append(f"N+1: {count} x {shape}")
+        return problems
+
+    def as_dict(self):
+        return {
+            "view": self.view,
+            "queries": self.count,
+            "db_time_ms": self.duration_ms,
+            "budget": self.budget,
+            "repeated": [
+                {"sql": shape, "count": count} for shape, count in self.repeated.items()
+            ],
+        }
+
+
+@contextmanager
+def capture_queries():
+    """Count the queries run inside the block on every database connection"""
+    report = QueryReport()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(report))
+        yield report
+
+
+def get_query_budget(view_func, method):
+    """Budget of a view function, resolving viewset actions from the HTTP method"""
+    view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    budget = getattr(view_class, "query_budget", getattr(view_func, "query_budget", None))
+    if isinstance(budget, dict):
+        actions = getattr(view_func, "actions", None) or {}
+        return budget.get(actions.get(method.lower(), method.lower()))
+    return budget
+
+
+def view_name(view_func):
+    view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    view = view_class or view_func
+    return f"{view.__module__}.{view.__qualname__}"
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Count the queries of each request and report them in X-Query-* headers
+    (when QUERY_INSTRUMENTATION_HEADERS, DEBUG by default) and the log.
+    Queries run while a streaming response is iterated are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with capture_queries() as report:
+            request.query_report = report
+            response = self.get_response(request)
+
+        response.query_report = report
+        if query_instrumentation_headers():
+            response["X-Query-Count"] = str(report.count)
+            response["X-Query-Time-Ms"] = str(report.duration_ms)
+            response["X-Query-Repeated"] = str(len(report.repeated))
+            if report.budget is not None:
+                response["X-Query-Budget"] = str(report.budget)
+
+        problems = report.problems()
+        if problems:
+            logger.warning(json.dumps({"path": request.path, **report.as_dict()}))
+            if query_budget_enforced():
+                raise QueryBudgetExceeded(f"{request.method} {request.path}: " + "; ".join(problems))
+        else:
+            logger.debug(json.dumps({"path": request.path, **report.as_dict()}))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        report = getattr(request, "query_report", None)
+        if report is not None:
+            report.view = view_name(view_func)
+            report.budget = get_query_budget(view_func, request.method)
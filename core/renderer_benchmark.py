@@ -0,0 +1,48 @@
+"""
+Renderer benchmark.
+
+Renders the read-path payloads of core.serializer_benchmark (the first
+`rows` rows of each case) with DRF's stock JSONRenderer, ORJSONRenderer and
+MessagePackRenderer, and reports the median render time per payload, the
+body size, and its size after gzip and (when installed) brotli, the
+compression CompressionMiddleware would apply.
+"""
+import gzip
+
+from rest_framework.renderers import JSONRenderer
+
+from core.compression import COMPRESSION_BROTLI_QUALITY, brotli
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from core.serializer_benchmark import build_cases, time_call
+
+
+RENDERERS = {
+    "drf_json": JSONRenderer(),
+    "orjson": ORJSONRenderer(),
+    "msgpack": MessagePackRenderer(),
+}
+
+
+def compressed_sizes(body):
+    sizes = {"gzip_bytes": len(gzip.compress(body))}
+    if brotli is not None:
+        sizes["brotli_bytes"] = len(brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY))
+    return sizes
+
+
+def run_renderer_benchmark(rows=1000, repeat=5, only=None):
+    results = {}
+    for case in build_cases():
+        if only and case.name not in only:
+            continue
+        data = case.fast(case.queryset, rows)
+        result = {"rows": len(data), "renderers": {}}
+        for name, renderer in RENDERERS.items():
+            seconds, body = time_call(lambda: renderer.render(data, renderer.media_type), repeat)
+            result["renderers"][name] = {
+                "render_us": round(seconds * 1_000_000, 1),
+                "bytes": len(body),
+                **compressed_sizes(body),
+            }
+        results[case.name] = result
+    return results
@@ -0,0 +1,80 @@
+"""
+Fast API renderers and the MessagePack parser.
+
+ORJSONRenderer replaces DRF's JSONRenderer for application/json. orjson
+writes dicts, lists, strings, numbers, dates and datetimes in C; what it
+does not know (Decimal, lazy translations, querysets, timedeltas) goes
+through the same fallback encoder DRF uses, except Decimals, which are
+written as strings like DecimalField does (so a raw Fine.amount reads the
+same as a serialized one). MessagePackRenderer and MessagePackParser speak
+application/msgpack, picked by the Accept and Content-Type headers.
+
+Compression of large bodies is done by core.compression.CompressionMiddleware.
+"""
+import datetime
+import decimal
+import uuid
+
+import msgpack
+import orjson
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+fallback_encoder = JSONEncoder()
+
+
+def encode_json_default(value):
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return fallback_encoder.default(value)
+
+
+def encode_msgpack_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID, Promise)):
+        return str(value)
+    return fallback_encoder.default(value)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        # The browsable API asks for `indent`; orjson indents by two spaces
+        if accepted_media_type and "indent" in accepted_media_type:
+            option |= orjson.OPT_INDENT_2
+        elif (renderer_context or {}).get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=encode_json_default, option=option)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_msgpack_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
@@ -0,0 +1,179 @@
+"""
+Tag-invalidated response cache for public read endpoints.
+
+CachedResponseMixin stores the data of list and retrieve responses of
+actions whose permissions are all AllowAny, keyed by view, URL kwargs, host
+and the normalized query string (blank parameters dropped, names and values
+sorted), so `?title=x&author__name=y` and `?author__name=y&title=x&isbn=`
+share an entry. The data is rendered again per request, so content
+negotiation still applies.
+
+Every key also carries the current generation of each model in the view's
+`cache_tags`. invalidate_tags() gives a model a new generation when its
+transaction commits, which orphans every entry depending on it; orphans
+simply expire.
+
+On a miss one request per key renders the response while holding a lock
+(single flight); concurrent requests for that key poll for its result for
+up to RESPONSE_CACHE_WAIT seconds before rendering it themselves. Lookups
+are counted as the "responses" cache in core.metrics and reported in the
+X-Cache response header.
+
+Entries, generations and locks all live in RESPONSE_CACHE_ALIAS, which has
+to be shared by every process (Redis in the docker and production settings,
+enforced by core/checks.py): with a per-process cache, invalidations made by
+another worker or a management command are never seen and the lock only
+collapses requests within one process.
+"""
+import hashlib
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from .metrics import record_cache_lookup
+
+
+RESPONSE_CACHE_ALIAS = getattr(settings, "RESPONSE_CACHE_ALIAS", "default")
+
+RESPONSE_CACHE_TTL = getattr(settings, "RESPONSE_CACHE_TTL", 5 * 60)
+
+# Seconds a render lock is held at most, and waited for by other requests
+RESPONSE_CACHE_LOCK_TIMEOUT = getattr(settings, "RESPONSE_CACHE_LOCK_TIMEOUT", 10)
+RESPONSE_CACHE_WAIT = getattr(settings, "RESPONSE_CACHE_WAIT", 2.0)
+RESPONSE_CACHE_POLL_INTERVAL = 0.05
+
+CACHED_ACTIONS = ("list", "retrieve")
+
+
+def response_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def tag_key(tag):
+    return f"responses:generation:{tag}"
+
+
+def model_tag(model):
+    return model._meta.label
+
+
+def new_generation():
+    """(started at, token); the start time doubles as Last-Modified of tagged collections"""
+    return (time.time(), secrets.token_hex(6))
+
+
+def tag_generations(models):
+    """Current generation of each model's tag, starting a generation for unseen tags"""
+    cache = response_cache()
+    keys = [tag_key(model_tag(model)) for model in models]
+    found = cache.get_many(keys)
+    generations = []
+    for key in keys:
+        if key not in found:
+            generation = new_generation()
+            if not cache.add(key, generation, timeout=None):
+                generation = cache.get(key, generation)
+            found[key] = generation
+        generations.append(found[key])
+    return generations
+
+
+def invalidate_tags(*models):
+    """Start new generations for the models' tags when the current transaction commits"""
+    keys = [tag_key(model_tag(model)) for model in models]
+    transaction.on_commit(
+        lambda: response_cache().set_many({key: new_generation() for key in keys}, timeout=None)
+    )
+
+
+def normalize_query(query_params):
+    """Sorted (name, value) pairs of the non-blank query parameters"""
+    return sorted(
+        (name, value)
+        for name in query_params
+        for value in query_params.getlist(name)
+        if value.strip()
+    )
+
+
+def response_key(request, view, models):
+    parts = [
+        f"{type(view).__module__}.{type(view).__qualname__}",
+        view.action,
+        repr(sorted(view.kwargs.items())),
+        request.get_host(),
+        repr(normalize_query(request.query_params)),
+        *(token for _, token in tag_generations(models)),
+    ]
+    digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    return f"responses:{digest}"
+
+
+def wait_for(cache, key, lock_key):
+    """The entry another request is rendering, or None if it does not appear in time"""
+    deadline = time.monotonic() + RESPONSE_CACHE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(RESPONSE_CACHE_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+        if cache.get(lock_key) is None:
+            return cache.get(key)
+    return None
+
+
+class CachedResponseMixin:
+    """Response cache for AllowAny list/retrieve actions, invalidated by `cache_tags`"""
+
+    cache_tags = ()
+
+    def is_response_cacheable(self, request):
+        return (
+            request.method == "GET"
+            and self.action in CACHED_ACTIONS
+            and all(isinstance(permission, AllowAny) for permission in self.get_permissions())
+        )
+
+    def cached_response(self, request, render):
+        if not self.is_response_cacheable(request):
+            return render()
+
+        cache = response_cache()
+        key = response_key(request, self, self.cache_tags)
+        entry = cache.get(key)
+        if entry is None:
+            lock_key = f"{key}:lock"
+            if cache.add(lock_key, 1, timeout=RESPONSE_CACHE_LOCK_TIMEOUT):
+                try:
+                    response = render()
+                    if response.status_code == 200:
+                        cache.set(key, (response.status_code, response.data), timeout=RESPONSE_CACHE_TTL)
+                finally:
+                    cache.delete(lock_key)
+                return self.mark_response(response, hit=False)
+            entry = wait_for(cache, key, lock_key)
+            if entry is None:
+                return self.mark_response(render(), hit=False)
+
+        status_code, data = entry
+        return self.mark_response(Response(data, status=status_code), hit=True)
+
+    def mark_response(self, response, hit):
+        record_cache_lookup("responses", hit)
+        response["X-Cache"] = "HIT" if hit else "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs)
+        )
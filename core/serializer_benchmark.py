@@ -0,0 +1,110 @@
+"""
+Read-path serializer benchmark.
+
+Each case renders the same rows (the first `rows` by id) with the DRF
+ModelSerializer the API used to run and with its read-path replacement (a
+core.values ValuesSerializer, or library.representations with the cache
+bypassed) and times both, queries included, reporting microseconds per
+row. core/tests.py renders the same cases to check both give identical JSON.
+"""
+from collections import namedtuple
+from statistics import median
+from time import perf_counter
+
+from django.db.models import Prefetch
+
+from borrowing.api.serializers import BorrowedBookSerializer, BorrowedBookValues
+from borrowing.models import BorrowedBook
+from fines.api.serializers import FineSerializer, FineValues
+from fines.models import Fine
+from library.api.serializers import BookItemSerializer, BookSerializer
+from library.models import Author, Book, BookItem
+from library.representations import book_item_representations, book_representations, uncached_fragments
+from reservation.api.serializers import ReservedBookSerializer, ReservedBookValues
+from reservation.models import ReservedBook
+
+
+Case = namedtuple("Case", "name queryset serializer fast")
+
+
+def values_reader(values_serializer):
+    def read(queryset, rows):
+        return values_serializer.many(queryset.order_by("id")[:rows])
+
+    return read
+
+
+def representation_reader(representations):
+    def read(queryset, rows):
+        pks = list(queryset.order_by("id").values_list("pk", flat=True)[:rows])
+        found = representations(pks, fragments=uncached_fragments)
+        return [found[pk] for pk in pks]
+
+    return read
+
+
+def build_cases():
+    # Authors in id order on both sides; the API itself leaves their order unspecified
+    authors = Author.objects.order_by("id")
+    return [
+        Case(
+            "books",
+            Book.objects.prefetch_related(Prefetch("author", queryset=authors)),
+            BookSerializer,
+            representation_reader(book_representations),
+        ),
+        Case(
+            "book_items",
+            BookItem.objects.select_related("book").prefetch_related(Prefetch("book__author", queryset=authors)),
+            BookItemSerializer,
+            representation_reader(book_item_representations),
+        ),
+        Case(
+            "loans",
+            BorrowedBook.objects.select_related("book_item"),
+            BorrowedBookSerializer,
+            values_reader(BorrowedBookValues()),
+        ),
+        Case(
+            "reservations",
+            ReservedBook.objects.select_related("book_item"),
+            ReservedBookSerializer,
+            values_reader(ReservedBookValues()),
+        ),
+        Case(
+            "fines",
+            Fine.objects.select_related("member__user", "borrowed_book__book_item"),
+            FineSerializer,
+            values_reader(FineValues()),
+        ),
+    ]
+
+
+def time_call(function, repeat):
+    """(median seconds, last result) of `repeat` calls"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = perf_counter()
+        result = function()
+        timings.append(perf_counter() - started)
+    return median(timings), result
+
+
+def run_serializer_benchmark(rows=1000, repeat=5, only=None):
+    results = {}
+    for case in build_cases():
+        if only and case.name not in only:
+            continue
+        model_seconds, model_data = time_call(
+            lambda: case.serializer(case.queryset.order_by("id")[:rows], many=True).data, repeat
+        )
+        fast_seconds, _ = time_call(lambda: case.fast(case.queryset, rows), repeat)
+        count = len(model_data)
+        results[case.name] = {
+            "rows": count,
+            "model_serializer_us_per_row": round(model_seconds / count * 1_000_000, 2) if count else None,
+            "fast_us_per_row": round(fast_seconds / count * 1_000_000, 2) if count else None,
+            "speedup": round(model_seconds / fast_seconds, 2) if count and fast_seconds else None,
+        }
+    return results
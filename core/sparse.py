@@ -0,0 +1,86 @@
+"""
+Sparse fieldsets and opt-in expansion of nested objects.
+
+`?fields=id,status` keeps only the named top-level fields. `?expand=` names
+the nested objects to embed, with dots for deeper levels
+(`?expand=member.user,borrowed_book`). A request carrying either parameter
+opts into sparse output: nested objects it does not expand are reduced to
+their id. Requests with neither keep the full default representation.
+Unknown names are ignored.
+
+Readers use the parsed Sparse to skip columns and joins, not only to trim
+the output: core.values compiles a narrower values() query, the library
+representations skip loading unexpanded books and authors, and
+narrow_queryset() defers unrequested columns of model querysets.
+"""
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def freeze(tree):
+    if tree is None:
+        return None
+    return tuple(sorted((name, freeze(subtree)) for name, subtree in tree.items()))
+
+
+class Sparse:
+    def __init__(self, fields=None, expand=None):
+        # frozenset of top-level names, or None for all of them
+        self.fields = fields
+        # {name: subtree} of nested objects to embed, or None to embed all
+        self.expand = expand
+        self.key = (fields, freeze(expand))
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return self.includes(name) and (self.expand is None or name in self.expand)
+
+    def nested(self, name):
+        """Sparse of an expanded nested object"""
+        return Sparse(expand=None if self.expand is None else self.expand.get(name, {}))
+
+    def filter(self, data):
+        if self.fields is None:
+            return data
+        return {name: value for name, value in data.items() if name in self.fields}
+
+
+FULL = Sparse()
+
+
+def split_names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def parse_sparse(request):
+    """The Sparse asked for by `?fields=` and `?expand=`, FULL without them"""
+    params = request.query_params
+    if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+        return FULL
+    fields = frozenset(split_names(params.get(FIELDS_PARAM, ""))) or None
+    expand = {}
+    for path in split_names(params.get(EXPAND_PARAM, "")):
+        tree = expand
+        for part in path.split("."):
+            tree = tree.setdefault(part, {})
+    return Sparse(fields, expand)
+
+
+def narrow_queryset(queryset, sparse, *keep):
+    """Defer the concrete columns `sparse` leaves out; `keep` lists columns still needed"""
+    if sparse.fields is None:
+        return queryset
+    names = {field.name for field in queryset.model._meta.concrete_fields}
+    return queryset.only("pk", *keep, *(name for name in sparse.fields if name in names))
+
+
+class SparseFieldsSerializerMixin:
+    """ModelSerializer that drops the fields the request's `?fields=` leaves out"""
+
+    def get_field_names(self, declared_fields, info):
+        names = super().get_field_names(declared_fields, info)
+        request = self.context.get("request")
+        sparse = parse_sparse(request) if request is not None else FULL
+        return [name for name in names if sparse.includes(name)]
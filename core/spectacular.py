@@ -0,0 +1,39 @@
+"""
+drf_spectacular hooks, imported only while a schema is generated.
+
+REST_FRAMEWORK's DEFAULT_SCHEMA_CLASS is core.openapi.LazyAutoSchema, a
+placeholder that does not import drf_spectacular; SchemaGenerator swaps in
+drf_spectacular's AutoSchema on the views it inspects, keeping the overrides
+of schemas derived from the placeholder (extend_schema and the view
+extensions of drf_spectacular.contrib build those). Undocumented routes
+are dropped by path prefix (OPENAPI_EXCLUDED_PATH_PREFIXES) instead of
+decorating the views with extend_schema, which would import drf_spectacular
+with the URLconf.
+"""
+from django.conf import settings
+from drf_spectacular.generators import SchemaGenerator as SpectacularSchemaGenerator
+from drf_spectacular.openapi import AutoSchema
+
+from .openapi import LazyAutoSchema
+
+
+def spectacular_schema(schema):
+    """drf_spectacular AutoSchema standing in for a LazyAutoSchema (or a subclass of it)"""
+    schema_class = schema.__class__  # not type(): the generator may hand out weakref proxies
+    if schema_class is LazyAutoSchema:
+        return AutoSchema()
+    return type(schema_class.__name__, (schema_class, AutoSchema), {})()
+
+
+class SchemaGenerator(SpectacularSchemaGenerator):
+    def create_view(self, callback, method, request=None):
+        view = super().create_view(callback, method, request)
+        if isinstance(view.schema, LazyAutoSchema):
+            view.schema = spectacular_schema(view.schema)
+        return view
+
+
+def exclude_undocumented_endpoints(endpoints, **kwargs):
+    """PREPROCESSING_HOOKS entry dropping the routes under OPENAPI_EXCLUDED_PATH_PREFIXES"""
+    prefixes = tuple(getattr(settings, "OPENAPI_EXCLUDED_PATH_PREFIXES", ()))
+    return [endpoint for endpoint in endpoints if not endpoint[0].startswith(prefixes)]
@@ -0,0 +1,115 @@
+"""
+Cold-start measurement.
+
+measure_startup() starts a fresh interpreter under `python -X importtime`
+that boots the web application (django.setup(), the WSGI handler with its
+middleware, the URLconf) or a Celery worker (django.setup() and task
+discovery), timing each phase and each AppConfig.ready(). The import log
+is folded into self time per top-level package, so a report shows where a
+cold start goes; repeated runs give the median used as a gate. Reports also
+list which LEAN_EXCLUDED_PACKAGES the process imported, which under
+LEAN_RUNTIME=1 should be none.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+from statistics import median
+
+
+TARGETS = ("web", "celery")
+
+# Packages LEAN_RUNTIME=1 keeps out of web and worker processes
+LEAN_EXCLUDED_PACKAGES = ("drf_spectacular", "debug_toolbar")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import django
+from django.apps import config as app_config
+
+ready_times = {}
+create = app_config.AppConfig.create.__func__
+
+def timed_create(cls, entry):
+    app = create(cls, entry)
+    ready = app.ready
+    def timed_ready():
+        began = time.perf_counter()
+        ready()
+        ready_times[app.label] = time.perf_counter() - began
+    app.ready = timed_ready
+    return app
+
+app_config.AppConfig.create = classmethod(timed_create)
+phases = {}
+began = time.perf_counter()
+django.setup()
+phases["setup"] = time.perf_counter() - began
+if sys.argv[1] == "web":
+    began = time.perf_counter()
+    from config.wsgi import application
+    phases["wsgi_handler"] = time.perf_counter() - began
+    began = time.perf_counter()
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    phases["urlconf"] = time.perf_counter() - began
+else:
+    began = time.perf_counter()
+    from config.celery import celery
+    celery.loader.import_default_modules()
+    phases["tasks"] = time.perf_counter() - began
+phases["total"] = time.perf_counter() - started
+packages = sorted({name.split(".")[0] for name in sys.modules})
+print(json.dumps({"phases": phases, "ready": ready_times, "packages": packages}))
+"""
+
+
+def parse_importtime(log):
+    """Self time in seconds per top-level package from `-X importtime` output"""
+    packages = Counter()
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, _, name = line[len("import time:"):].split("|", 2)
+            packages[name.strip().split(".")[0]] += int(self_us) / 1_000_000
+        except ValueError:
+            continue
+    return packages
+
+
+def run_probe(target, env=None):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE, target],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **(env or {})},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{target} startup probe failed:\n{result.stderr[-4000:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["imports"] = parse_importtime(result.stderr)
+    return report
+
+
+def measure_startup(target, repeat=3, top=15, env=None):
+    """Median phase, ready and import times of `repeat` cold starts of `target`"""
+    runs = [run_probe(target, env) for _ in range(repeat)]
+
+    def median_of(key):
+        names = set().union(*(run[key] for run in runs))
+        return {name: round(median(run[key].get(name, 0) for run in runs), 4) for name in names}
+
+    imports = median_of("imports")
+    loaded = set().union(*(run["packages"] for run in runs))
+    return {
+        "target": target,
+        "repeat": repeat,
+        "settings": os.environ.get("DJANGO_SETTINGS_MODULE"),
+        "phases": median_of("phases"),
+        "ready": dict(sorted(median_of("ready").items(), key=lambda item: -item[1])),
+        "imports": dict(sorted(imports.items(), key=lambda item: -item[1])[:top]),
+        "lean_excluded_loaded": [package for package in LEAN_EXCLUDED_PACKAGES if package in loaded],
+    }
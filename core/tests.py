@@ -0,0 +1,236 @@
+import json
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Librarian, Member
+from borrowing.models import BorrowedBook
+from fines.accrual import accrue_fines
+from fines.api.views import FineViewset
+from fines.models import Fine
+from library.models import Author, Book, BookItem
+from reservation.models import ReservedBook
+from .compression import accepted_encodings
+from .pagination import decode_cursor, encode_cursor
+from .queries import QueryBudgetExceeded
+from .serializer_benchmark import build_cases
+
+
+# Above QUERY_N_PLUS_ONE_THRESHOLD, so a per-row query shows up as N+1
+ROWS = 6
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True)
+class QueryBudgetTests(TestCase):
+    """
+    Every budgeted viewset, read by an admin with QUERY_BUDGET_ENFORCE on:
+    QueryInstrumentationMiddleware raises QueryBudgetExceeded out of the test
+    client when a list or retrieve runs more queries than its `query_budget`
+    or repeats one query shape per row.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser("budget-admin", "admin@example.com", "password")
+        Librarian.objects.create_librarian(
+            "budget-librarian", "password", "librarian@example.com", "Budget", "Librarian"
+        )
+
+        today = date.today()
+        for n in range(ROWS):
+            member = Member.objects.create_member(
+                f"budget-member-{n}", "password", f"member{n}@example.com", "Budget", str(n)
+            )
+            author = Author.objects.create(name=f"Author {n}")
+            book = Book.objects.create(title=f"Book {n}", isbn=f"97811111111{n:02d}", subject="Testing")
+            book.author.add(author)
+            borrowed, reserved = (
+                BookItem.objects.create(
+                    book=book, barcode=f"BUDGET{n:02d}{kind}", status=status,
+                    publication_date=date(2000, 1, 1),
+                )
+                for kind, status in (("B", BookItem.STATUS_BORROWED), ("R", BookItem.STATUS_RESERVED))
+            )
+            BorrowedBook.objects.create(
+                book_item=borrowed, borrower=member, due_date=today - timedelta(days=n + 1)
+            )
+            ReservedBook.objects.create(
+                book_item=reserved, reserver=member, due_time=timezone.now() + timedelta(days=1)
+            )
+        accrue_fines()
+
+        cls.book = Book.objects.first()
+        cls.item = cls.book.book_items.first()
+        cls.member = Member.objects.first()
+
+    def setUp(self):
+        # Cached roles and responses from earlier tests would save queries
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def assertWithinBudget(self, url):
+        # Over budget, the middleware raises instead of returning
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_lists_within_budget(self):
+        for url in (
+            "/accounts/members/",
+            "/accounts/librarians/",
+            "/library/api/books/",
+            "/library/api/authors/",
+            f"/library/api/books/{self.book.pk}/items/",
+            "/borrowing/books/",
+            "/reservation/books/",
+            "/fines/",
+            "/fines/ledger/",
+        ):
+            with self.subTest(url=url):
+                self.assertWithinBudget(url)
+
+    def test_retrieves_within_budget(self):
+        for url in (
+            f"/accounts/members/{self.member.pk}/",
+            f"/accounts/librarians/{Librarian.objects.first().pk}/",
+            f"/library/api/books/{self.book.pk}/",
+            f"/library/api/authors/{Author.objects.first().pk}/",
+            f"/library/api/books/{self.book.pk}/items/{self.item.pk}/",
+            f"/borrowing/books/{BorrowedBook.objects.first().pk}/",
+            f"/reservation/books/{ReservedBook.objects.first().pk}/",
+            f"/fines/{Fine.objects.first().pk}/",
+            f"/fines/balances/{self.member.pk}/",
+        ):
+            with self.subTest(url=url):
+                self.assertWithinBudget(url)
+
+    def test_over_budget_fails_the_request(self):
+        with mock.patch.object(FineViewset, "query_budget", {"list": 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get("/fines/")
+
+    @override_settings(QUERY_BUDGET_ENFORCE=False)
+    def test_over_budget_is_only_logged_without_enforcement(self):
+        with mock.patch.object(FineViewset, "query_budget", {"list": 1}):
+            with self.assertLogs("core.queries", "WARNING"):
+                response = self.client.get("/fines/")
+        self.assertEqual(response.status_code, 200)
+
+
+class AcceptEncodingTests(SimpleTestCase):
+    def accepted(self, header):
+        return accepted_encodings(RequestFactory().get("/", HTTP_ACCEPT_ENCODING=header))
+
+    def test_q_values(self):
+        self.assertEqual(self.accepted("gzip, br;q=0.5, deflate;q=0"), {"gzip", "br"})
+        self.assertEqual(self.accepted("gzip;q=2, br;q=-1"), {"gzip"})
+
+    def test_malformed_q_values_are_refused(self):
+        # Client controlled: must not raise, and must not select the coding
+        self.assertEqual(self.accepted("br;q=., gzip;q=1.2.3, identity;q=nan, deflate"), {"deflate"})
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser("paging-admin", "paging@example.com", "password")
+        member = Member.objects.create_member(
+            "paging-member", "password", "pm@example.com", "Paging", "Member"
+        )
+        book = Book.objects.create(title="Paged", isbn="9782222222200", subject="Testing")
+        # Microseconds apart: all within one millisecond
+        due_time = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        cls.reservations = [
+            ReservedBook.objects.create(
+                book_item=BookItem.objects.create(
+                    book=book, barcode=f"PAGING{n:02d}", status=BookItem.STATUS_RESERVED,
+                    publication_date=date(2000, 1, 1),
+                ),
+                reserver=member,
+                due_time=due_time + timedelta(microseconds=ROWS - n),
+            )
+            for n in range(ROWS)
+        ]
+
+    def test_datetime_cursor_keeps_microseconds(self):
+        moment = timezone.now().replace(microsecond=123456)
+        self.assertEqual(decode_cursor(encode_cursor([moment, 7])), ([moment, 7], False))
+
+    def test_pages_through_rows_within_one_millisecond(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        seen = []
+        url = "/reservation/books/?page_size=2"
+        while url:
+            page = client.get(url).json()
+            seen.extend(row["id"] for row in page["results"])
+            self.assertLessEqual(len(seen), ROWS)
+            url = page["next"]
+        expected = sorted(self.reservations, key=lambda reservation: (reservation.due_time, reservation.id))
+        self.assertEqual(seen, [reservation.id for reservation in expected])
+
+        # And back again from the last page
+        last_page_size = len(page["results"])
+        previous = page["previous"]
+        backwards = []
+        while previous:
+            page = client.get(previous).json()
+            backwards[:0] = [row["id"] for row in page["results"]]
+            previous = page["previous"]
+        self.assertEqual(backwards, seen[:-last_page_size])
+
+
+class SerializerParityTests(TestCase):
+    """
+    The read-path serializers (core.values, library.representations) must
+    render exactly what the DRF ModelSerializers they replace render.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        member = Member.objects.create_member(
+            "parity-member", "password", "parity@example.com", "Parity", "Member"
+        )
+        # Authors added out of id order; a book without authors; one without copies
+        second, first = Author.objects.create(name="Second"), Author.objects.create(name="First")
+        two_authors = Book.objects.create(
+            title="Two authors", isbn="9787777777700", subject="Testing", page_counts=9
+        )
+        two_authors.author.add(first, second)
+        no_authors = Book.objects.create(title="No authors", isbn="9787777777701", subject="Testing")
+        Book.objects.create(title="No copies", isbn="9787777777702", subject="Testing").author.add(first)
+
+        items = [
+            BookItem.objects.create(
+                book=book, barcode=f"PARITY{n}", status=status, publication_date=date(2000, 1, n + 1)
+            )
+            for n, (book, status) in enumerate((
+                (two_authors, BookItem.STATUS_BORROWED),
+                (two_authors, BookItem.STATUS_RESERVED),
+                (no_authors, BookItem.STATUS_BORROWED),
+                (no_authors, BookItem.STATUS_RESERVED),
+                (no_authors, BookItem.STATUS_AVAILABLE),
+            ))
+        ]
+        today = date.today()
+        BorrowedBook.objects.create(book_item=items[0], borrower=member, due_date=today - timedelta(days=3))
+        BorrowedBook.objects.create(book_item=items[2], borrower=member, due_date=today + timedelta(days=3))
+        ReservedBook.objects.create(book_item=items[1], reserver=member, due_time=timezone.now())
+        # Reserver deleted: the relation is empty
+        ReservedBook.objects.create(book_item=items[3], reserver=None, due_time=timezone.now())
+        accrue_fines()
+
+    def test_fast_serializers_match_model_serializers(self):
+        for case in build_cases():
+            with self.subTest(case=case.name):
+                queryset = case.queryset.all()
+                model_data = case.serializer(queryset.order_by("id"), many=True).data
+                fast_data = case.fast(queryset, 100)
+                self.assertTrue(model_data)
+                self.assertEqual(json.dumps(fast_data), json.dumps(model_data))
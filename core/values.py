@@ -0,0 +1,166 @@
+"""
+Read-only serializers compiled to values() lookups.
+
+A ValuesSerializer declares the output of a ModelSerializer once, as output
+names mapped to column lookups or to nested ValuesSerializers bound to a
+relation (FineValues nests MemberValues("member"), which nests
+UserValues("user")). compile() resolves the whole tree against the models
+into one flat list of columns plus a row builder that only does dict
+lookups, with Decimal, date and datetime columns formatted by the matching
+DRF field. A list page is then one values() query with the joins in SQL and
+no model instances or per-field serializer calls.
+
+ValuesReadMixin serves a view's list and retrieve this way, compiling a
+narrower query for `?fields=` and `?expand=` (see core.sparse); writes
+keep the ModelSerializer. core/tests.py checks that both produce the same
+JSON; `manage.py benchmark_serializers` times them per row.
+"""
+from django.db import models
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from .sparse import FULL, parse_sparse
+
+
+def drf_formatter(model_field):
+    """to_representation of the DRF field a ModelSerializer would use, where it is not the identity"""
+    if isinstance(model_field, models.DecimalField):
+        return serializers.DecimalField(
+            max_digits=model_field.max_digits, decimal_places=model_field.decimal_places
+        ).to_representation
+    if isinstance(model_field, models.DateTimeField):
+        return serializers.DateTimeField().to_representation
+    if isinstance(model_field, models.DateField):
+        return serializers.DateField().to_representation
+    return None
+
+
+def resolve_field(model, lookup):
+    """Model field at the end of a lookup such as "borrowed_book__due_date" """
+    *relations, name = lookup.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def make_getter(column, formatter):
+    if formatter is None:
+        return lambda row: row[column]
+
+    def get(row):
+        value = row[column]
+        return None if value is None else formatter(value)
+
+    return get
+
+
+def skip_missing(key, build):
+    """Nested builder of a nullable relation: None where the foreign key is"""
+
+    def build_or_none(row):
+        return None if row[key] is None else build(row)
+
+    return build_or_none
+
+
+class ValuesSerializer:
+    model = None
+    # Output name -> column lookup on `model`, or a ValuesSerializer bound to a relation
+    fields = {}
+
+    # Compiled shapes kept per instance, one per distinct ?fields=/?expand= combination
+    max_compiled = 64
+
+    def __init__(self, relation=None):
+        self.relation = relation
+        self.compiled = {}
+
+    def bind(self, prefix, sparse=FULL):
+        """(columns, build) for this shape with every lookup under `prefix`"""
+        columns = []
+        getters = []
+        for name, source in self.fields.items():
+            if not sparse.includes(name):
+                continue
+            if isinstance(source, ValuesSerializer):
+                if not sparse.expands(name):
+                    # Unexpanded: just the foreign key
+                    column = prefix + source.relation
+                    columns.append(column)
+                    getters.append((name, make_getter(column, None)))
+                    continue
+                nested_columns, build_nested = source.bind(f"{prefix}{source.relation}__", sparse.nested(name))
+                columns.extend(nested_columns)
+                if self.model._meta.get_field(source.relation).null:
+                    key = prefix + source.relation
+                    columns.append(key)
+                    build_nested = skip_missing(key, build_nested)
+                getters.append((name, build_nested))
+            else:
+                column = prefix + source
+                columns.append(column)
+                getters.append((name, make_getter(column, drf_formatter(resolve_field(self.model, source)))))
+
+        def build(row):
+            return {name: get(row) for name, get in getters}
+
+        return columns, build
+
+    def compile(self, sparse=FULL):
+        compiled = self.compiled.get(sparse.key)
+        if compiled is None:
+            columns, build = self.bind("", sparse)
+            compiled = (list(dict.fromkeys(columns)), build)
+            if len(self.compiled) >= self.max_compiled:
+                self.compiled.clear()
+            self.compiled[sparse.key] = compiled
+        return compiled
+
+    def rows(self, queryset, *extra_columns, sparse=FULL):
+        """values() rows carrying every column of this shape (and `extra_columns`)"""
+        columns, _ = self.compile(sparse)
+        return queryset.values(*dict.fromkeys([*columns, *extra_columns]))
+
+    def to_representation(self, row, sparse=FULL):
+        return self.compile(sparse)[1](row)
+
+    def many(self, queryset, sparse=FULL):
+        build = self.compile(sparse)[1]
+        return [build(row) for row in self.rows(queryset, sparse=sparse)]
+
+
+class ValuesReadMixin:
+    """
+    list and retrieve from `values_serializer` instead of the serializer class.
+    Object permissions are not checked on retrieve, since there is no model
+    instance; use it on views whose permissions only look at the request.
+    """
+
+    values_serializer = None
+
+    def get_values_rows(self, sparse):
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = queryset.query.order_by or getattr(self, "ordering", None) or ()
+        ordering = [field.lstrip("-") for field in ordering if isinstance(field, str)]
+        return self.values_serializer.rows(
+            queryset.select_related(None).prefetch_related(None), *ordering, sparse=sparse
+        )
+
+    def list(self, request, *args, **kwargs):
+        sparse = parse_sparse(request)
+        rows = self.get_values_rows(sparse)
+        page = self.paginate_queryset(rows)
+        build = self.values_serializer.compile(sparse)[1]
+        data = [build(row) for row in (page if page is not None else rows)]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        sparse = parse_sparse(request)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_values_rows(sparse), **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return Response(self.values_serializer.to_representation(row, sparse))
@@ -4,9 +4,16 @@
 echo "Apply database migrations"
 python manage.py migrate --noinput
 
+# Precompute the OpenAPI schema served at /api/schema/
+LEAN_RUNTIME=0 python manage.py build_openapi_schema
+
 # Collect all static files
 python manage.py collectstatic --noinput
 
+# Metrics of all gunicorn workers are aggregated through this directory (core/metrics.py)
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Start server
 echo "Starting server"
-gunicorn config.wsgi:application --bind 0.0.0.0:8000
+gunicorn config.wsgi:application --bind 0.0.0.0:8000 --config config/gunicorn.py
@@ -0,0 +1,191 @@
+import logging
+from datetime import date
+from time import perf_counter
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from borrowing.models import BorrowedBook
+from core.pagination import keyset_filter
+from .ledger import post_accrual_changes, to_amount
+from .models import Fine, AccrualWatermark
+
+
+logger = logging.getLogger(__name__)
+
+ACCRUAL_BATCH_SIZE = 10_000
+
+WATERMARK_NAME = "create_fines"
+
+
+def overdue_days_sql():
+    """SQL expression for whole days between the run date (%s) and b.due_date"""
+    if connection.vendor == "postgresql":
+        return "(%s::date - b.due_date)"
+    return "CAST(julianday(%s) - julianday(b.due_date) AS INTEGER)"
+
+
+def upsert_fines_sql(loan_filter):
+    """
+    One statement that computes the fine of every overdue loan matching
+    `loan_filter` (SQL on alias b) and inserts or updates it;
+    unchanged fines are not rewritten and changed ones are returned.
+    """
+    fine_table = connection.ops.quote_name(Fine._meta.db_table)
+    loan_table = connection.ops.quote_name(BorrowedBook._meta.db_table)
+    distinct = "IS DISTINCT FROM" if connection.vendor == "postgresql" else "IS NOT"
+    return f"""
+        INSERT INTO {fine_table} (member_id, borrowed_book_id, amount)
+        SELECT b.borrower_id, b.id, {overdue_days_sql()} * %s
+        FROM {loan_table} b
+        WHERE {loan_filter} AND b.due_date < %s
+        ON CONFLICT (borrowed_book_id) DO UPDATE
+        SET amount = EXCLUDED.amount, member_id = EXCLUDED.member_id
+        WHERE {fine_table}.amount {distinct} EXCLUDED.amount
+           OR {fine_table}.member_id {distinct} EXCLUDED.member_id
+        RETURNING member_id, borrowed_book_id, amount
+    """
+
+
+def accrue_matching_loans(loan_filter, loan_params, today):
+    """
+    Upsert the fines of overdue loans matching `loan_filter` and post the
+    changes to the fine ledger. Call inside a transaction; returns rows written.
+    """
+    fine_table = connection.ops.quote_name(Fine._meta.db_table)
+    loan_table = connection.ops.quote_name(BorrowedBook._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT f.borrowed_book_id, f.amount
+            FROM {fine_table} f INNER JOIN {loan_table} b ON b.id = f.borrowed_book_id
+            WHERE {loan_filter} AND b.due_date < %s
+            """,
+            [*loan_params, today],
+        )
+        old_amounts = {loan_id: to_amount(amount) for loan_id, amount in cursor.fetchall()}
+        cursor.execute(
+            upsert_fines_sql(loan_filter),
+            [today, Fine.DAILY_RATE, *loan_params, today],
+        )
+        changed_fines = cursor.fetchall()
+    post_accrual_changes(old_amounts, changed_fines)
+    return len(changed_fines)
+
+
+def accrue_fines_in_range(low_id, high_id, today=None):
+    """Upsert the fines of overdue loans with low_id < id <= high_id; returns rows written"""
+    return accrue_matching_loans(
+        "b.id > %s AND b.id <= %s", [low_id, high_id], today or date.today()
+    )
+
+
+def accrue_fines_for_loans(loan_ids, today=None):
+    """Upsert the fines of the given overdue loans; returns rows written"""
+    if not loan_ids:
+        return 0
+    if connection.vendor == "postgresql":
+        loan_filter, loan_params = "b.id = ANY(%s)", [list(loan_ids)]
+    else:
+        loan_filter, loan_params = f"b.id IN ({', '.join(['%s'] * len(loan_ids))})", list(loan_ids)
+    return accrue_matching_loans(loan_filter, loan_params, today or date.today())
+
+
+def loan_id_bounds():
+    """(low, high) loan ids such that low < id <= high covers every loan, or None"""
+    bounds = BorrowedBook.objects.aggregate(low=Min("id"), high=Max("id"))
+    if bounds["low"] is None:
+        return None
+    return bounds["low"] - 1, bounds["high"]
+
+
+def split_id_range(low_id, high_id, shards):
+    """Split low < id <= high into at most `shards` contiguous (low, high) ranges"""
+    size = max(1, -(-(high_id - low_id) // shards))
+    return [
+        (start, min(start + size, high_id)) for start in range(low_id, high_id, size)
+    ]
+
+
+def accrue_fines_between(low_id, high_id, batch_size=ACCRUAL_BATCH_SIZE, today=None):
+    """
+    Accrue fines of loans with low_id < id <= high_id in primary key windows of
+    `batch_size`, committing each window on its own so locks on the loan table
+    are held for one batch at a time. Returns (batches, rows).
+    """
+    today = today or date.today()
+    batches = rows = 0
+    for window_low in range(low_id, high_id, batch_size):
+        with transaction.atomic():
+            rows += accrue_fines_in_range(window_low, min(window_low + batch_size, high_id), today)
+        batches += 1
+    return batches, rows
+
+
+def accrue_fines(batch_size=ACCRUAL_BATCH_SIZE, today=None):
+    """Set-based fine accrual over every loan"""
+    today = today or date.today()
+    started = perf_counter()
+    batches = rows = 0
+
+    bounds = loan_id_bounds()
+    if bounds is not None:
+        batches, rows = accrue_fines_between(*bounds, batch_size=batch_size, today=today)
+
+    set_watermark(today)
+    stats = {
+        "batches": batches,
+        "rows": rows,
+        "elapsed": round(perf_counter() - started, 3),
+    }
+    logger.info("Fine accrual finished", extra={"accrual": stats})
+    return stats
+
+
+def accrue_fines_incremental(batch_size=ACCRUAL_BATCH_SIZE, today=None):
+    """
+    Accrue only what changed since the stored watermark.
+
+    Fines grow per whole day, so a run on the same date as the previous one
+    has nothing to do. On a new date, only loans past their due date have a
+    new day count; they are read through the (due_date, id) index in keyset
+    batches instead of scanning every loan ever created.
+    """
+    today = today or date.today()
+    if is_accrued_through(today):
+        return {"batches": 0, "rows": 0, "elapsed": 0.0, "skipped": True}
+
+    started = perf_counter()
+    batches = rows = 0
+    last = None
+    while True:
+        overdue = BorrowedBook.objects.filter(due_date__lt=today)
+        if last is not None:
+            overdue = overdue.filter(keyset_filter(("due_date", "id"), last))
+        keys = list(overdue.order_by("due_date", "id").values_list("due_date", "id")[:batch_size])
+        if not keys:
+            break
+        with transaction.atomic():
+            rows += accrue_fines_for_loans([loan_id for _, loan_id in keys], today)
+        batches += 1
+        last = keys[-1]
+
+    set_watermark(today)
+    stats = {
+        "batches": batches,
+        "rows": rows,
+        "elapsed": round(perf_counter() - started, 3),
+    }
+    logger.info("Incremental fine accrual finished", extra={"accrual": stats})
+    return stats
+
+
+def is_accrued_through(today):
+    watermark = AccrualWatermark.objects.filter(name=WATERMARK_NAME).first()
+    return watermark is not None and watermark.accrued_through >= today
+
+
+def set_watermark(accrued_through):
+    AccrualWatermark.objects.update_or_create(
+        name=WATERMARK_NAME, defaults={"accrued_through": accrued_through}
+    )
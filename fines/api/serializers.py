@@ -1,10 +1,13 @@
+from decimal import Decimal
 from rest_framework import serializers
 
-from accounts.api.serializers import MemberSerializer
-from borrowing.api.serializers import BorrowedBookSerializer
+from accounts.api.serializers import MemberSerializer, MemberValues
+from borrowing.api.serializers import BorrowedBookSerializer, BorrowedBookValues
+from core.sparse import SparseFieldsSerializerMixin
+from core.values import ValuesSerializer
 
 from library.models import BookItem
-from ..models import Fine
+from ..models import Fine, FineLedgerEntry
 
 
 class BookItemSerializer(serializers.ModelSerializer):
@@ -20,3 +23,36 @@ class FineSerializer(serializers.ModelSerializer):
 
     member = MemberSerializer()
     borrowed_book = BorrowedBookSerializer()
+
+
+class FineValues(ValuesSerializer):
+    """Read-only FineSerializer"""
+    model = Fine
+    fields = {
+        "id": "id",
+        "member": MemberValues("member"),
+        "borrowed_book": BorrowedBookValues("borrowed_book"),
+        "amount": "amount",
+    }
+
+
+class FineLedgerEntrySerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = FineLedgerEntry
+        fields = ("id", "member", "borrowed_book", "kind", "amount", "note", "created_at")
+
+
+class FineLedgerEntryCreateSerializer(serializers.ModelSerializer):
+    """Payments and waivers posted at the circulation desk; accruals come from fines.tasks"""
+
+    kind = serializers.ChoiceField(
+        choices=(
+            (FineLedgerEntry.KIND_PAYMENT, "Payment"),
+            (FineLedgerEntry.KIND_WAIVER, "Waiver"),
+        )
+    )
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal("0.01"))
+
+    class Meta:
+        model = FineLedgerEntry
+        fields = ("member", "borrowed_book", "kind", "amount", "note")
@@ -1,14 +1,26 @@
+from django.db import transaction
 from rest_framework.viewsets import GenericViewSet
 from rest_framework import mixins
-from drf_spectacular.utils import extend_schema
+from rest_framework.response import Response
 
-from accounts.api.permissions import IsAdminOrLibrarian
-from ..models import Fine
-from .serializers import FineSerializer
+from accounts.api.permissions import IsAdminOrLibrarian, IsMemberOrAdminOrLibrarian
+from accounts.models import Member
+from accounts.roles import get_roles
+from core.exports import ExportView
+from core.sparse import narrow_queryset, parse_sparse
+from core.values import ValuesReadMixin
+from ..ledger import get_balance, record_payment, record_waiver
+from ..models import Fine, FineLedgerEntry
+from .serializers import (
+    FineSerializer,
+    FineValues,
+    FineLedgerEntrySerializer,
+    FineLedgerEntryCreateSerializer,
+)
 
 
-@extend_schema(exclude=True)  # Hide from API documentation
 class FineViewset(
+    ValuesReadMixin,
     mixins.RetrieveModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -21,4 +33,95 @@ class FineViewset(
         "borrowed_book__book_item"
     ).all()    
     serializer_class = FineSerializer
+    values_serializer = FineValues()
     permission_classes = [IsAdminOrLibrarian]
+    role_claims = True
+    ordering = ("id",)
+    query_budget = {"list": 4, "retrieve": 4}
+
+    def perform_destroy(self, instance):
+        # Keep the ledger in step: removing a fine waives what it had accrued
+        with transaction.atomic():
+            if instance.amount:
+                record_waiver(
+                    instance.member,
+                    instance.amount,
+                    borrowed_book=instance.borrowed_book,
+                    note="Fine deleted",
+                )
+            instance.delete()
+
+
+class FineLedgerEntryViewset(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    """Append-only ledger: list entries, post payments and waivers"""
+    queryset = FineLedgerEntry.objects.all()
+    permission_classes = [IsAdminOrLibrarian]
+    role_claims = True
+    filterset_fields = ["member", "kind"]
+    ordering = ("-created_at", "-id")
+    query_budget = {"list": 4}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            return narrow_queryset(queryset, parse_sparse(self.request), "created_at")
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return FineLedgerEntryCreateSerializer
+        return FineLedgerEntrySerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if data["kind"] == FineLedgerEntry.KIND_PAYMENT:
+            entry = record_payment(data["member"], data["amount"], note=data.get("note", ""))
+        else:
+            entry = record_waiver(
+                data["member"],
+                data["amount"],
+                borrowed_book=data.get("borrowed_book"),
+                note=data.get("note", ""),
+            )
+        return Response(FineLedgerEntrySerializer(entry).data, status=201)
+
+
+class MemberBalanceViewset(GenericViewSet):
+    """
+    What a member owes, read from one MemberBalance row.
+    Members can only read their own balance.
+    """
+    permission_classes = [IsMemberOrAdminOrLibrarian]
+    role_claims = True
+    lookup_field = "member_id"
+    query_budget = {"retrieve": 4}
+    lookup_value_regex = "[0-9]+"
+
+    def retrieve(self, request, member_id=None):
+        roles = get_roles(request)
+        if not roles.is_admin_or_librarian:
+            if not Member.objects.filter(pk=member_id, user_id=request.user.pk).exists():
+                return Response({"detail": "Not found."}, status=404)
+        return Response({"member": int(member_id), "balance": str(get_balance(member_id))})
+
+
+class FineExportView(ExportView):
+    """Stream all fines as NDJSON or CSV, admin/librarian only"""
+    queryset = Fine.objects.all()
+    permission_classes = [IsAdminOrLibrarian]
+    role_claims = True
+    filterset_fields = ["member"]
+    filename = "fines"
+    columns = {
+        "id": "id",
+        "member": "member_id",
+        "borrowed_book": "borrowed_book_id",
+        "due_date": "borrowed_book__due_date",
+        "amount": "amount",
+    }
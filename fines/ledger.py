@@ -0,0 +1,106 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import FineLedgerEntry, MemberBalance
+
+
+CENT = Decimal("0.01")
+
+
+def to_amount(value):
+    """Normalize a database value (Decimal, float or str on SQLite) to cents"""
+    return Decimal(str(value)).quantize(CENT)
+
+
+def apply_balance_deltas(deltas):
+    """
+    Add {member_id: delta} to the materialized balances with a single upsert.
+    Must run inside the transaction that wrote the ledger entries.
+    """
+    deltas = {member_id: delta for member_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    table = connection.ops.quote_name(MemberBalance._meta.db_table)
+    now = timezone.now()
+    rows = ", ".join(["(%s, %s, %s)"] * len(deltas))
+    params = []
+    # Sorted, so concurrent accrual shards lock balance rows in the same order
+    for member_id, delta in sorted(deltas.items()):
+        params.extend((member_id, delta, now))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (member_id, balance, updated_at) VALUES {rows}
+            ON CONFLICT (member_id) DO UPDATE
+            SET balance = {table}.balance + EXCLUDED.balance, updated_at = EXCLUDED.updated_at
+            """,
+            params,
+        )
+
+
+def post_entries(entries):
+    """Append ledger entries and move the matching balances in one transaction"""
+    deltas = defaultdict(Decimal)
+    for entry in entries:
+        deltas[entry.member_id] += entry.amount
+    with transaction.atomic():
+        if len(entries) == 1:
+            entries[0].save()  # sets the primary key on every backend
+        else:
+            FineLedgerEntry.objects.bulk_create(entries)
+        apply_balance_deltas(deltas)
+    return entries
+
+
+def post_accrual_changes(old_amounts, new_fines):
+    """
+    Turn a batch of recomputed fines into accrual entries.
+    `old_amounts` maps borrowed_book_id to the previous amount,
+    `new_fines` holds (member_id, borrowed_book_id, amount) rows.
+    """
+    entries = []
+    for member_id, borrowed_book_id, amount in new_fines:
+        delta = to_amount(amount) - old_amounts.get(borrowed_book_id, Decimal("0.00"))
+        if delta:
+            entries.append(
+                FineLedgerEntry(
+                    member_id=member_id,
+                    borrowed_book_id=borrowed_book_id,
+                    kind=FineLedgerEntry.KIND_ACCRUAL,
+                    amount=delta,
+                )
+            )
+    return post_entries(entries)
+
+
+def record_payment(member, amount, note=""):
+    (entry,) = post_entries([
+        FineLedgerEntry(
+            member_id=member.pk, kind=FineLedgerEntry.KIND_PAYMENT, amount=-amount, note=note
+        )
+    ])
+    return entry
+
+
+def record_waiver(member, amount, borrowed_book=None, note=""):
+    (entry,) = post_entries([
+        FineLedgerEntry(
+            member_id=member.pk,
+            borrowed_book=borrowed_book,
+            kind=FineLedgerEntry.KIND_WAIVER,
+            amount=-amount,
+            note=note,
+        )
+    ])
+    return entry
+
+
+def get_balance(member_id):
+    """Constant-time lookup of what a member owes"""
+    balance = (
+        MemberBalance.objects.filter(member_id=member_id).values_list("balance", flat=True).first()
+    )
+    return balance if balance is not None else Decimal("0.00")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from fines.accrual import ACCRUAL_BATCH_SIZE
+from fines.tasks import create_fines
+
+
+class Command(BaseCommand):
+    help = "Accrue fines of overdue loans now (incremental unless --full)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full", action="store_true", help="Recompute every loan, ignoring the watermark"
+        )
+        parser.add_argument("--batch-size", type=int, default=ACCRUAL_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        stats = create_fines(full=options["full"], batch_size=options["batch_size"])
+        if stats.get("skipped"):
+            self.stdout.write("Fines are already accrued through today.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {stats['rows']} fines in {stats['batches']} batches ({stats['elapsed']}s)."
+        ))
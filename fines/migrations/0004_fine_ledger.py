@@ -0,0 +1,75 @@
+# Generated by Django 3.2.13 on 2026-10-17 16:21
+
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def open_ledger_from_fines(apps, schema_editor):
+    # Existing fines become the opening accrual entries of the ledger
+    Fine = apps.get_model("fines", "Fine")
+    FineLedgerEntry = apps.get_model("fines", "FineLedgerEntry")
+    MemberBalance = apps.get_model("fines", "MemberBalance")
+
+    FineLedgerEntry.objects.bulk_create(
+        (
+            FineLedgerEntry(
+                member_id=fine.member_id,
+                borrowed_book_id=fine.borrowed_book_id,
+                kind="A",
+                amount=fine.amount,
+                note="Opening balance",
+            )
+            for fine in Fine.objects.exclude(amount=0).iterator()
+        ),
+        batch_size=1000,
+    )
+    MemberBalance.objects.bulk_create(
+        (
+            MemberBalance(member_id=row["member_id"], balance=row["total"])
+            for row in FineLedgerEntry.objects.values("member_id").annotate(total=Sum("amount"))
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('borrowing', '0004_one_copy_per_member'),
+        ('fines', '0003_accrual_watermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberBalance',
+            fields=[
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fine_balance', serialize=False, to='accounts.member')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='fine',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=10),
+        ),
+        migrations.CreateModel(
+            name='FineLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('A', 'Accrual'), ('P', 'Payment'), ('W', 'Waiver')], max_length=1)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('borrowed_book', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='borrowing.borrowedbook')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fine_ledger_entries', to='accounts.member')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='fineledgerentry',
+            index=models.Index(fields=['member', 'created_at'], name='fines_ledger_member_idx'),
+        ),
+        migrations.RunPython(open_ledger_from_fines, migrations.RunPython.noop),
+    ]
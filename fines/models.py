@@ -3,16 +3,84 @@ from django.db import models
 
 
 class Fine(models.Model):
+    DAILY_RATE = Decimal("5.00")
+
     member = models.ForeignKey("accounts.Member", on_delete=models.CASCADE)
     borrowed_book = models.OneToOneField(
         "borrowing.BorrowedBook", on_delete=models.CASCADE, unique=True
     )
-    amount = models.DecimalField(max_digits=4, decimal_places=2, default=0.00)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
     @staticmethod
     def calculate_fine(borrowed_book) -> Decimal:
         past_days_count = borrowed_book.how_many_days_past_from_due_date()
-        return Decimal(past_days_count * 5.00)
+        return past_days_count * Fine.DAILY_RATE
 
     def __str__(self) -> str:
         return f"Fine: {self.amount} for {self.member}"
+
+
+class AccrualWatermark(models.Model):
+    """Date through which fines have been accrued, one row per accrual job"""
+
+    name = models.CharField(max_length=63, unique=True)
+    accrued_through = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name}: accrued through {self.accrued_through}"
+
+
+class FineLedgerEntry(models.Model):
+    """
+    Append-only record of every change to what a member owes.
+    Accruals are positive (or negative when a fine is recomputed lower),
+    payments and waivers are negative.
+    """
+
+    KIND_ACCRUAL = "A"
+    KIND_PAYMENT = "P"
+    KIND_WAIVER = "W"
+
+    KIND_CHOICES = (
+        (KIND_ACCRUAL, "Accrual"),
+        (KIND_PAYMENT, "Payment"),
+        (KIND_WAIVER, "Waiver"),
+    )
+    member = models.ForeignKey(
+        "accounts.Member", on_delete=models.CASCADE, related_name="fine_ledger_entries"
+    )
+    # Kept as NULL once the loan is returned, the entry itself stays
+    borrowed_book = models.ForeignKey(
+        "borrowing.BorrowedBook", on_delete=models.SET_NULL, null=True, blank=True
+    )
+    kind = models.CharField(max_length=1, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["member", "created_at"], name="fines_ledger_member_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Fine ledger entries are append-only.")
+        super().save(*args, **kwargs)
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()}: {self.amount} for {self.member}"
+
+
+class MemberBalance(models.Model):
+    """Materialized sum of a member's ledger entries, updated in the same transaction"""
+
+    member = models.OneToOneField(
+        "accounts.Member", on_delete=models.CASCADE, primary_key=True, related_name="fine_balance"
+    )
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Balance: {self.balance} for member {self.member_id}"
@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TransactionTestCase
+
+from accounts.models import Member
+from borrowing.models import BorrowedBook
+from config.celery import celery
+from library.models import Book, BookItem
+from .models import AccrualWatermark, Fine, FineLedgerEntry, MemberBalance
+from .tasks import create_fines, create_fines_sharded
+
+
+# Days past due of each loan; zero and negative loans must not be fined
+OVERDUE_DAYS = (1, 2, 3, 5, 8, 13, 0, -4)
+
+
+class ShardedFineAccrualTests(TransactionTestCase):
+    """
+    create_fines_sharded run through the chord with CELERY_TASK_ALWAYS_EAGER,
+    compared with the unsharded create_fines on the same loans. A
+    TransactionTestCase, since every accrual batch commits on its own.
+    """
+
+    def setUp(self):
+        conf = celery.conf
+        eager = conf.task_always_eager, conf.task_eager_propagates
+        conf.task_always_eager = conf.task_eager_propagates = True
+        self.addCleanup(setattr, conf, "task_always_eager", eager[0])
+        self.addCleanup(setattr, conf, "task_eager_propagates", eager[1])
+
+        today = date.today()
+        members = [
+            Member.objects.create_member(
+                f"fines-member-{n}", "password", f"member{n}@example.com", "Fine", str(n)
+            )
+            for n in range(3)
+        ]
+        for n, days in enumerate(OVERDUE_DAYS):
+            book = Book.objects.create(title=f"Book {n}", isbn=f"97800000000{n:02d}", subject="Testing")
+            item = BookItem.objects.create(
+                book=book, barcode=f"FINES{n:05d}", status=BookItem.STATUS_BORROWED,
+                publication_date=date(2000, 1, 1),
+            )
+            BorrowedBook.objects.create(
+                book_item=item, borrower=members[n % len(members)], due_date=today - timedelta(days=days)
+            )
+
+    def accrued(self):
+        """The fine of each loan, what the ledger holds and the balance of each member"""
+        return (
+            dict(Fine.objects.values_list("borrowed_book_id", "amount")),
+            sorted(FineLedgerEntry.objects.values_list("member_id", "borrowed_book_id", "kind", "amount")),
+            dict(MemberBalance.objects.values_list("member_id", "balance")),
+        )
+
+    def forget_accrual(self):
+        FineLedgerEntry.objects.all().delete()
+        MemberBalance.objects.all().delete()
+        Fine.objects.all().delete()
+        AccrualWatermark.objects.all().delete()
+
+    def test_sharded_accrual_matches_create_fines(self):
+        create_fines.delay(full=True)
+        fines, ledger, balances = self.accrued()
+        self.assertEqual(
+            sorted(fines.values()),
+            sorted(days * Fine.DAILY_RATE for days in OVERDUE_DAYS if days > 0),
+        )
+
+        self.forget_accrual()
+        # Several shards, each accrued in batches smaller than the shard
+        result = create_fines_sharded.delay(shards=3, full=True, batch_size=2).get()
+
+        self.assertEqual(result["shards"], 3)
+        self.assertEqual(self.accrued(), (fines, ledger, balances))
+        self.assertEqual(sum(balances.values()), sum(fines.values()))
+        self.assertEqual(
+            AccrualWatermark.objects.get(name="create_fines").accrued_through, date.today()
+        )
+
+    def test_rerun_writes_nothing(self):
+        create_fines_sharded.delay(shards=4, full=True, batch_size=3)
+        fines_before = self.accrued()
+
+        create_fines_sharded.delay(shards=2, full=True)
+        self.assertEqual(self.accrued(), fines_before)
+        # Incremental runs on the same day skip the chord entirely
+        self.assertEqual(create_fines_sharded.delay().get(), {"shards": 0, "skipped": True})
+
+    def test_more_shards_than_loans(self):
+        create_fines_sharded.delay(shards=50, full=True)
+        total = sum(Fine.objects.values_list("amount", flat=True), Decimal("0"))
+        self.assertEqual(total, sum(days for days in OVERDUE_DAYS if days > 0) * Fine.DAILY_RATE)
@@ -1,12 +1,21 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 
-from .api.views import FineViewset
+from core.exports import EXPORT_FORMAT_REGEX
+from .api.views import FineViewset, FineLedgerEntryViewset, MemberBalanceViewset, FineExportView
 
 
 router = DefaultRouter()
+# Prefixed routes first: the empty prefix below would capture them as a fine pk
+router.register("ledger", FineLedgerEntryViewset, basename="fine-ledger")
+router.register("balances", MemberBalanceViewset, basename="member-balances")
 router.register("", FineViewset, basename="fines")
 
 urlpatterns = [
+    re_path(
+        rf"^export/fines\.(?P<export_format>{EXPORT_FORMAT_REGEX})$",
+        FineExportView.as_view(),
+        name="fines-export",
+    ),
     path("", include(router.urls)),
 ]
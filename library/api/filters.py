@@ -1,6 +1,7 @@
 from django_filters import rest_framework as filters
 
 from ..models import Book, Author, BookItem
+from ..search import search_books
 
 
 class AuthorFilter(filters.FilterSet):
@@ -14,10 +15,14 @@ class AuthorFilter(filters.FilterSet):
 class BookFilter(filters.FilterSet):
     title = filters.CharFilter(lookup_expr="icontains")
     author__name = filters.CharFilter(lookup_expr="icontains")
+    search = filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Book
-        fields = ["title", "isbn", "author", "author__name"]
+        fields = ["title", "isbn", "author", "author__name", "search"]
+
+    def filter_search(self, queryset, name, value):
+        return search_books(queryset, value)
 
 
 class BookItemFilter(filters.FilterSet):
@@ -1,7 +1,25 @@
+import io
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import OuterRef, Subquery
+from django.http import Http404
+from rest_framework import status
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+
+from core.conditional import ConditionalGetMixin
+from core.exports import ExportView
+from core.response_cache import CachedResponseMixin
+from core.sparse import parse_sparse
 
+from ..importing import FORMATS, CatalogFormatError, guess_format, import_catalog
 from ..models import Book, BookItem, Author
+from ..representations import author_representations, book_item_representations, book_representations
 from accounts.api.permissions import IsMemberOrReadOnly, IsAdminOrLibrarian
 from .filters import AuthorFilter, BookFilter, BookItemFilter
 from .serializers import (
@@ -14,10 +32,76 @@ from .serializers import (
 )
 
 
-class BookViewset(ModelViewSet):
+class CachedRepresentationMixin:
+    """
+    Answer list and retrieve from library.representations: the database
+    only returns the ids of the page (plus the ordering columns for the
+    cursor) and the bodies are assembled from cached fragments, trimmed to
+    the request's `?fields=` and `?expand=`.
+
+    Views name the builder from library.representations as
+    `build_representations`; it is called with the page's ids, the sparse
+    fieldset and `get_representation_options()`.
+    """
+
+    build_representations = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.build_representations is None:
+            raise ImproperlyConfigured(f"{cls.__qualname__} must set build_representations.")
+
+    def get_representation_options(self):
+        return {}
+
+    def representations_in_order(self, pks):
+        representations = self.build_representations(
+            pks, sparse=parse_sparse(self.request), **self.get_representation_options()
+        )
+        return [representations[pk] for pk in pks if pk in representations]
+
+    def get_row_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = queryset.query.order_by or self.ordering or ()
+        names = {field.name for field in queryset.model._meta.concrete_fields}
+        fields = [field.lstrip("-") for field in ordering if isinstance(field, str)]
+        return (
+            queryset.select_related(None)
+            .prefetch_related(None)
+            .only("pk", *[field for field in fields if field in names])
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_row_queryset()
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        data = self.representations_in_order([row.pk for row in rows])
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = get_object_or_404(
+            self.get_row_queryset(), **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, instance)
+        data = self.representations_in_order([instance.pk])
+        if not data:
+            raise Http404
+        return Response(data[0])
+
+
+class BookViewset(ConditionalGetMixin, CachedResponseMixin, CachedRepresentationMixin, ModelViewSet):
     queryset = Book.objects.prefetch_related("author").all()
+    cache_tags = (Book, Author)
+    collection_tags = (Book, Author)
     filterset_class = BookFilter
+    ordering = ("title", "id")
     permission_classes = [IsMemberOrReadOnly]
+    role_claims = True
+    query_budget = {"list": 5, "retrieve": 6}
+    build_representations = staticmethod(book_representations)
 
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update"):
@@ -33,13 +117,18 @@ class BookViewset(ModelViewSet):
         return [IsAdminOrLibrarian()]  # Only admin/librarian can modify
 
 
-class AuthorViewset(ModelViewSet):
+class AuthorViewset(CachedResponseMixin, CachedRepresentationMixin, ModelViewSet):
     filterset_class = AuthorFilter
+    cache_tags = (Author, Book)
+    ordering = ("name", "id")
     permission_classes = [IsMemberOrReadOnly]
+    role_claims = True
+    query_budget = {"list": 4, "retrieve": 3}
+    build_representations = staticmethod(author_representations)
 
     def get_queryset(self):
         if self.action == "list":
-            Author.objects.prefetch_related("books").all()
+            return Author.objects.prefetch_related("books").all()
         return Author.objects.all()
 
     def get_serializer_class(self):
@@ -47,6 +136,9 @@ class AuthorViewset(ModelViewSet):
             return AuthorListSerializer
         return AuthorSerializer
 
+    def get_representation_options(self):
+        return {"with_books": self.action == "list"}
+
     def get_permissions(self):
         """
         Allow anyone to read (list/retrieve), but only admin/librarian to create/update/delete
@@ -56,9 +148,16 @@ class AuthorViewset(ModelViewSet):
         return [IsAdminOrLibrarian()]  # Only admin/librarian can modify
 
 
-class BookItemViewSet(ModelViewSet):
+class BookItemViewSet(ConditionalGetMixin, CachedResponseMixin, CachedRepresentationMixin, ModelViewSet):
     filterset_class = BookItemFilter
+    cache_tags = (BookItem, Book, Author)
+    collection_tags = (BookItem, Book, Author)
+    last_modified_fields = ("updated_at", "book__updated_at")
+    ordering = ("barcode", "id")
     permission_classes = [IsMemberOrReadOnly]
+    role_claims = True
+    query_budget = {"list": 6, "retrieve": 7}
+    build_representations = staticmethod(book_item_representations)
 
     def get_queryset(self):
         return (
@@ -82,4 +181,80 @@ class BookItemViewSet(ModelViewSet):
         """
         if self.action in ["list", "retrieve"]:
             return [AllowAny()]  # Allow anonymous users to browse book items
-        return [IsAdminOrLibrarian()]  # Only admin/librarian can modify
\ No newline at end of file
+        return [IsAdminOrLibrarian()]  # Only admin/librarian can modify
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+@parser_classes([MultiPartParser])
+def import_catalog_view(request):
+    """
+    Admin-only bulk catalog import.
+    Upload a CSV, JSON Lines or MARC feed as `file`; `format` defaults to the file extension.
+    """
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response({"file": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST)
+    format = request.data.get("format") or guess_format(upload.name)
+    if format not in FORMATS:
+        return Response(
+            {"format": [f"Must be one of: {', '.join(FORMATS)}."]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    stream = upload if format == "marc" else io.TextIOWrapper(upload, encoding="utf-8", newline="")
+    try:
+        stats = import_catalog(stream, format)
+    except CatalogFormatError as exc:
+        # Batches before the failing record are already committed
+        return Response(
+            {"detail": str(exc), "record": exc.record, "committed_records": exc.committed},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(stats, status=status.HTTP_201_CREATED)
+
+
+class BookExportView(ExportView):
+    """Stream the catalog as NDJSON or CSV; accepts the BookViewset filters"""
+    filterset_class = BookFilter
+    permission_classes = [IsAuthenticated]
+    role_claims = True
+    filename = "books"
+    columns = {
+        "id": "id",
+        "isbn": "isbn",
+        "title": "title",
+        "subject": "subject",
+        "page_counts": "page_counts",
+        "authors": "author_names",
+        "total_copies": "total_copies",
+        "available_copies": "available_copies",
+    }
+
+    def get_queryset(self):
+        # Correlated subquery rather than a join, so books are never grouped
+        author_names = (
+            Book.author.through.objects.filter(book=OuterRef("pk"))
+            .order_by()
+            .values("book")
+            .annotate(names=ArrayAgg("author__name", ordering="author__name"))
+            .values("names")
+        )
+        return Book.objects.annotate(author_names=Subquery(author_names))
+
+
+class BookItemExportView(ExportView):
+    """Stream every copy as NDJSON or CSV; accepts the BookItemViewSet filters"""
+    queryset = BookItem.objects.all()
+    filterset_class = BookItemFilter
+    permission_classes = [IsAuthenticated]
+    role_claims = True
+    filename = "book-items"
+    columns = {
+        "id": "id",
+        "barcode": "barcode",
+        "status": "status",
+        "publication_date": "publication_date",
+        "book": "book_id",
+        "isbn": "book__isbn",
+    }
@@ -4,4 +4,6 @@ from django.apps import AppConfig
 class LibraryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'library'
-    
\ No newline at end of file
+
+    def ready(self) -> None:
+        import library.signals.handlers
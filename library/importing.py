@@ -0,0 +1,442 @@
+"""
+Streaming catalog import.
+
+Readers turn CSV, JSON Lines or MARC 21 (ISO 2709) input into plain record
+dicts one at a time; CatalogImporter writes them in batches with a handful of
+set-based queries per batch, so memory stays flat whatever the feed size.
+
+A record looks like:
+    {"isbn": "...", "title": "...", "subject": "...", "page_counts": 320,
+     "authors": ["..."], "items": [{"barcode": "...", "status": "A",
+     "publication_date": "2020-01-31"}]}
+"""
+import csv
+import json
+import re
+from datetime import date
+from itertools import islice
+from time import perf_counter
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.response_cache import invalidate_tags
+
+from .models import Author, Book, BookItem
+from .representations import invalidate_representations
+from .search import update_search_vectors
+
+
+IMPORT_BATCH_SIZE = 1000
+
+AUTHOR_CACHE_SIZE = 100_000
+
+FORMATS = ("csv", "jsonl", "marc")
+
+ITEM_STATUSES = {status for status, _ in BookItem.STATUS_CHOICES}
+
+
+class CatalogFormatError(ValueError):
+    """A feed record could not be read; `record` is its 1-based number in the feed"""
+
+    def __init__(self, record, error):
+        self.record = record
+        # Records imported (and committed) in the batches before the failing one
+        self.committed = 0
+        super().__init__(f"Record {record}: {error}")
+
+
+# Readers
+
+
+def read_csv(lines):
+    """
+    One row per copy (or per book without copies). Columns: isbn, title,
+    subject, page_counts, authors (";"-separated), barcode, status,
+    publication_date. Rows of the same ISBN are merged within a batch.
+    """
+    for row in csv.DictReader(lines):
+        item = None
+        if row.get("barcode"):
+            item = {
+                "barcode": row["barcode"],
+                "status": row.get("status"),
+                "publication_date": row.get("publication_date"),
+            }
+        yield {
+            "isbn": row.get("isbn"),
+            "title": row.get("title"),
+            "subject": row.get("subject"),
+            "page_counts": row.get("page_counts"),
+            "authors": (row.get("authors") or "").split(";"),
+            "items": [item] if item else [],
+        }
+
+
+def read_jsonl(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+MARC_FIELD_TERMINATOR = b"\x1e"
+MARC_SUBFIELD_DELIMITER = b"\x1f"
+
+
+def read_marc_fields(stream):
+    """Yield {tag: [{code: value}]} for each ISO 2709 record in a binary stream"""
+    while True:
+        length = stream.read(5)
+        if len(length) < 5 or not length.strip(b"\x1a\r\n "):
+            return
+        record = length + stream.read(int(length) - 5)
+        base_address = int(record[12:17])
+        directory = record[24:record.index(MARC_FIELD_TERMINATOR)]
+
+        fields = {}
+        for offset in range(0, len(directory) - 11, 12):
+            entry = directory[offset:offset + 12]
+            tag = entry[:3].decode()
+            field_length, start = int(entry[3:7]), int(entry[7:12])
+            data = record[base_address + start:base_address + start + field_length]
+            data = data.rstrip(MARC_FIELD_TERMINATOR)
+            if tag < "010":
+                continue  # control fields carry no subfields we use
+            subfields = {}
+            for chunk in data.split(MARC_SUBFIELD_DELIMITER)[1:]:
+                if chunk:
+                    subfields.setdefault(chr(chunk[0]), chunk[1:].decode("utf-8", "replace"))
+            fields.setdefault(tag, []).append(subfields)
+        yield fields
+
+
+def first_subfield(fields, tag, code):
+    for subfields in fields.get(tag, []):
+        if subfields.get(code):
+            return subfields[code]
+    return None
+
+
+def read_marc(stream):
+    """
+    MARC 21 bibliographic records: 020$a ISBN, 245$a$b title, 100$a/700$a
+    authors, 650$a subject, 300$a pages, 876$p item barcodes.
+    """
+    for fields in read_marc_fields(stream):
+        title = " ".join(
+            part for part in (first_subfield(fields, "245", "a"), first_subfield(fields, "245", "b")) if part
+        )
+        pages = re.search(r"\d+", first_subfield(fields, "300", "a") or "")
+        yield {
+            "isbn": re.sub(r"[^0-9Xx]", "", (first_subfield(fields, "020", "a") or "").split(" ")[0]),
+            "title": title.rstrip(" /:;,."),
+            "subject": (first_subfield(fields, "650", "a") or "").rstrip(" ."),
+            "page_counts": int(pages.group()) if pages else None,
+            "authors": [
+                subfields["a"].rstrip(" ,.")
+                for tag in ("100", "700")
+                for subfields in fields.get(tag, [])
+                if subfields.get("a")
+            ],
+            "items": [
+                {"barcode": subfields["p"]}
+                for subfields in fields.get("876", [])
+                if subfields.get("p")
+            ],
+        }
+
+
+def numbered(records):
+    """Re-raise reader errors (bad encoding, JSON or MARC structure) as CatalogFormatError"""
+    iterator = iter(records)
+    number = 0
+    while True:
+        number += 1
+        try:
+            record = next(iterator)
+        except StopIteration:
+            return
+        except (ValueError, IndexError, csv.Error) as exc:
+            raise CatalogFormatError(number, exc) from exc
+        if not isinstance(record, dict):
+            raise CatalogFormatError(number, "expected an object")
+        yield record
+
+
+def read_records(stream, format):
+    """`stream` is a text stream for csv/jsonl and a binary stream for marc"""
+    if format == "csv":
+        return numbered(read_csv(stream))
+    if format == "jsonl":
+        return numbered(read_jsonl(stream))
+    if format == "marc":
+        return numbered(read_marc(stream))
+    raise ValueError(f"Unknown catalog format: {format}")
+
+
+def guess_format(filename):
+    extension = filename.rsplit(".", 1)[-1].lower()
+    return {"ndjson": "jsonl", "mrc": "marc"}.get(extension, extension)
+
+
+# Writer
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_date(value):
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return date.today()
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def record_text(record, field, number):
+    """A string field of a record, stripped; missing or null is empty"""
+    value = record.get(field)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise CatalogFormatError(number, f"{field} must be a string")
+    return value.strip()
+
+
+def record_list(record, field, number, item_type, item_description):
+    value = record.get(field)
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(entry, item_type) for entry in value):
+        raise CatalogFormatError(number, f"{field} must be a list of {item_description}")
+    return value
+
+
+class CatalogImporter:
+    """
+    Upserts books on ISBN and items on barcode, batch by batch.
+
+    Authors are resolved by name through an in-memory cache shared by all
+    batches; each batch runs in its own transaction, so a failure only rolls
+    back the batch that caused it.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.author_ids = {}
+        self.stats = {
+            "records": 0,
+            "skipped": 0,
+            "books_created": 0,
+            "books_updated": 0,
+            "authors_created": 0,
+            "items_created": 0,
+            "items_updated": 0,
+        }
+
+    def run(self, records):
+        started = perf_counter()
+        committed = 0
+        try:
+            for batch in batched(records, self.batch_size):
+                with transaction.atomic():
+                    self.import_batch(batch)
+                committed = self.stats["records"]
+        except CatalogFormatError as exc:
+            exc.committed = committed
+            raise
+        elapsed = perf_counter() - started
+        self.stats["elapsed"] = round(elapsed, 3)
+        self.stats["records_per_second"] = round(self.stats["records"] / elapsed, 1) if elapsed else 0.0
+        return self.stats
+
+    def merge_batch(self, batch):
+        """
+        Validate and collapse records of the same ISBN (e.g. one CSV row per
+        copy). Records without an ISBN or title are skipped; fields of the
+        wrong JSON type raise CatalogFormatError.
+        """
+        books = {}
+        for record in batch:
+            self.stats["records"] += 1
+            number = self.stats["records"]
+            isbn = record_text(record, "isbn", number)[:13]
+            title = record_text(record, "title", number)[:255]
+            subject = record_text(record, "subject", number)[:127]
+            authors = record_list(record, "authors", number, str, "strings")
+            items = record_list(record, "items", number, dict, "objects")
+            for item in items:
+                for field in ("barcode", "status"):
+                    if not isinstance(item.get(field), (str, type(None))):
+                        raise CatalogFormatError(number, f"item {field} must be a string")
+            if not isbn or not title:
+                self.stats["skipped"] += 1
+                continue
+            book = books.setdefault(isbn, {"authors": [], "items": []})
+            book.update(title=title, subject=subject, page_counts=parse_int(record.get("page_counts")))
+            for name in authors:
+                name = name.strip()[:255]
+                if name and name not in book["authors"]:
+                    book["authors"].append(name)
+            book["items"].extend(items)
+        return books
+
+    def resolve_authors(self, names):
+        missing = [name for name in names if name not in self.author_ids]
+        if not missing:
+            return
+        if len(self.author_ids) > AUTHOR_CACHE_SIZE:
+            self.author_ids.clear()  # keep memory bounded on huge feeds
+
+        for name, author_id in Author.objects.filter(name__in=missing).values_list("name", "id"):
+            self.author_ids.setdefault(name, author_id)
+        new_names = [name for name in missing if name not in self.author_ids]
+        if new_names:
+            Author.objects.bulk_create(Author(name=name) for name in new_names)
+            self.stats["authors_created"] += len(new_names)
+            for name, author_id in Author.objects.filter(name__in=new_names).values_list("name", "id"):
+                self.author_ids.setdefault(name, author_id)
+
+    def upsert_books(self, books):
+        book_ids = dict(Book.objects.filter(isbn__in=books).values_list("isbn", "id"))
+        now = timezone.now()
+        existing = [
+            Book(
+                id=book_ids[isbn], isbn=isbn, title=data["title"], subject=data["subject"],
+                page_counts=data["page_counts"], updated_at=now,
+            )
+            for isbn, data in books.items()
+            if isbn in book_ids
+        ]
+        new = [
+            Book(isbn=isbn, title=data["title"], subject=data["subject"], page_counts=data["page_counts"])
+            for isbn, data in books.items()
+            if isbn not in book_ids
+        ]
+        if existing:
+            Book.objects.bulk_update(existing, ["title", "subject", "page_counts", "updated_at"])
+            self.stats["books_updated"] += len(existing)
+        if new:
+            Book.objects.bulk_create(new, ignore_conflicts=True)
+            self.stats["books_created"] += len(new)
+            book_ids.update(
+                Book.objects.filter(isbn__in=[book.isbn for book in new]).values_list("isbn", "id")
+            )
+        return book_ids
+
+    def replace_authors(self, books, book_ids):
+        """Returns the ids of authors that gained or lost books"""
+        Through = Book.author.through
+        links = Through.objects.filter(book_id__in=book_ids.values())
+        author_ids = set(links.values_list("author_id", flat=True))
+        links.delete()
+        new_links = [
+            Through(book_id=book_ids[isbn], author_id=self.author_ids[name])
+            for isbn, data in books.items()
+            for name in data["authors"]
+        ]
+        Through.objects.bulk_create(new_links, ignore_conflicts=True)
+        return author_ids.union(link.author_id for link in new_links)
+
+    def upsert_items(self, books, book_ids):
+        """
+        Returns the ids of books that copies were moved away from.
+
+        A feed status is written on new copies, and on existing copies only
+        when given explicitly; copies without one are created available and
+        keep their status otherwise. Copies on loan or reserved keep both
+        their status and their book, which the loan or reservation refers to.
+        """
+        items = {}
+        explicit_status = set()
+        for isbn, data in books.items():
+            for item in data["items"]:
+                barcode = (item.get("barcode") or "").strip()[:15]
+                if not barcode:
+                    continue
+                status = item.get("status")
+                if status in ITEM_STATUSES:
+                    explicit_status.add(barcode)
+                else:
+                    explicit_status.discard(barcode)
+                items[barcode] = BookItem(
+                    book_id=book_ids[isbn],
+                    barcode=barcode,
+                    status=status if status in ITEM_STATUSES else BookItem.STATUS_AVAILABLE,
+                    publication_date=parse_date(item.get("publication_date")),
+                )
+        if not items:
+            return set()
+
+        current = {
+            barcode: (item_id, book_id)
+            for barcode, item_id, book_id in BookItem.objects.filter(barcode__in=items)
+            .values_list("barcode", "id", "book_id")
+        }
+        held = set(
+            BookItem.objects.filter(pk__in=[item_id for item_id, _ in current.values()])
+            .filter(Q(borrowedbook__isnull=False) | Q(reservedbook__isnull=False))
+            .values_list("pk", flat=True)
+        )
+        # One bulk_update per set of written fields
+        updates = {}
+        now = timezone.now()
+        for barcode, item in items.items():
+            if barcode in current:
+                item.id = current[barcode][0]
+                item.updated_at = now
+                fields = ("publication_date", "updated_at")
+                if item.id not in held:
+                    fields += ("book",)
+                    if barcode in explicit_status:
+                        fields += ("status",)
+                updates.setdefault(fields, []).append(item)
+        new = [item for barcode, item in items.items() if barcode not in current]
+        for fields, updated in updates.items():
+            BookItem.objects.bulk_update(updated, list(fields))
+            self.stats["items_updated"] += len(updated)
+        if new:
+            BookItem.objects.bulk_create(new, ignore_conflicts=True)
+            self.stats["items_created"] += len(new)
+        return {book_id for _, book_id in current.values()}
+
+    def import_batch(self, batch):
+        books = self.merge_batch(batch)
+        if not books:
+            return
+        self.resolve_authors({name for data in books.values() for name in data["authors"]})
+        book_ids = self.upsert_books(books)
+        author_ids = self.replace_authors(books, book_ids)
+        previous_book_ids = self.upsert_items(books, book_ids)
+
+        # Bulk writes skip model signals, so refresh derived columns per batch
+        Book.rebuild_counters(
+            Book.objects.filter(pk__in=previous_book_ids.union(book_ids.values()))
+        )
+        update_search_vectors(list(book_ids.values()))
+        invalidate_representations(Book, book_ids.values())
+        invalidate_representations(Author, author_ids)
+        invalidate_representations(
+            BookItem, BookItem.objects.filter(book_id__in=book_ids.values()).values_list("pk", flat=True)
+        )
+        invalidate_tags(Author, Book, BookItem)
+
+
+def import_catalog(stream, format, batch_size=IMPORT_BATCH_SIZE):
+    return CatalogImporter(batch_size=batch_size).run(read_records(stream, format))
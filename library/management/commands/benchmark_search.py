@@ -0,0 +1,48 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from library.models import Book
+from library.search import (
+    is_full_text_search_available,
+    legacy_search_books,
+    search_books,
+)
+
+
+class Command(BaseCommand):
+    help = "Compare the legacy icontains catalog search with the full-text search"
+
+    def add_arguments(self, parser):
+        parser.add_argument("terms", nargs="+", help="Search terms to benchmark")
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--limit", type=int, default=12, help="Rows fetched per query (one catalog page)")
+
+    def time_query(self, build_queryset, term, repeat, limit):
+        """Median milliseconds to fetch the first page of results"""
+        timings = []
+        for _ in range(repeat):
+            started = perf_counter()
+            list(build_queryset(term)[:limit])
+            timings.append((perf_counter() - started) * 1000)
+        return median(timings)
+
+    def handle(self, *args, **options):
+        if not is_full_text_search_available():
+            self.stdout.write(self.style.WARNING(
+                "Not running on PostgreSQL: both columns use the icontains search."
+            ))
+
+        self.stdout.write(f"{'term':<30}{'legacy ms':>12}{'full-text ms':>15}{'speedup':>10}")
+        for term in options["terms"]:
+            legacy = self.time_query(
+                lambda text: legacy_search_books(Book.objects.all(), text).order_by("title"),
+                term, options["repeat"], options["limit"],
+            )
+            full_text = self.time_query(
+                lambda text: search_books(Book.objects.all(), text),
+                term, options["repeat"], options["limit"],
+            )
+            speedup = legacy / full_text if full_text else 0
+            self.stdout.write(f"{term:<30}{legacy:>12.2f}{full_text:>15.2f}{speedup:>9.1f}x")
@@ -0,0 +1,41 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.importing import FORMATS, IMPORT_BATCH_SIZE, CatalogFormatError, guess_format, import_catalog
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV, JSON Lines or MARC catalog feed into books, authors and items"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format = options["format"] or (guess_format(path) if path != "-" else None)
+        if format not in FORMATS:
+            raise CommandError("Cannot tell the feed format, pass --format.")
+
+        try:
+            if path == "-":
+                stream = sys.stdin.buffer
+                if format != "marc":
+                    stream = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+                stats = import_catalog(stream, format, batch_size=options["batch_size"])
+            else:
+                mode, encoding = ("rb", None) if format == "marc" else ("r", "utf-8")
+                with open(path, mode, encoding=encoding, newline=None if format == "marc" else "") as stream:
+                    stats = import_catalog(stream, format, batch_size=options["batch_size"])
+        except CatalogFormatError as exc:
+            raise CommandError(f"{exc} ({exc.committed} earlier records were imported)")
+
+        self.stdout.write(self.style.SUCCESS(
+            "Imported {records} records ({records_per_second}/s, {elapsed}s): "
+            "{books_created} books created, {books_updated} updated, "
+            "{authors_created} authors created, {items_created} items created, "
+            "{items_updated} updated, {skipped} skipped.".format(**stats)
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from library.models import Book
+from library.search import is_full_text_search_available, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search vectors of all books in primary key chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not is_full_text_search_available():
+            raise CommandError("Full-text search requires PostgreSQL.")
+
+        chunk_size = options["chunk_size"]
+        max_id = Book.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+        updated = 0
+        for start in range(0, max_id, chunk_size):
+            updated += update_search_vectors(
+                Book.objects.filter(id__gt=start, id__lte=start + chunk_size).values("pk")
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search vectors of {updated} books."))
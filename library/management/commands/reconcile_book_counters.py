@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from library.models import Book
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-book copy counters from BookItem rows in primary key chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        max_id = Book.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+        rebuilt = 0
+        for start in range(0, max_id, chunk_size):
+            # One short transaction per chunk keeps row locks brief
+            with transaction.atomic():
+                rebuilt += Book.rebuild_counters(
+                    Book.objects.filter(id__gt=start, id__lte=start + chunk_size)
+                )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt copy counters of {rebuilt} books."))
@@ -0,0 +1,58 @@
+# Generated by Django 3.2.13 on 2026-10-17 16:15
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_copy_counters(apps, schema_editor):
+    Book = apps.get_model("library", "Book")
+    BookItem = apps.get_model("library", "BookItem")
+
+    def count_items(**filters):
+        items = (
+            BookItem.objects.filter(book=OuterRef("pk"), **filters)
+            .order_by()
+            .values("book")
+            .annotate(copies=Count("pk"))
+            .values("copies")
+        )
+        return Coalesce(Subquery(items), 0)
+
+    Book.objects.update(
+        total_copies=count_items(),
+        available_copies=count_items(status="A"),
+        borrowed_copies=count_items(status="B"),
+        reserved_copies=count_items(status="R"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0012_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='available_copies',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='borrowed_copies',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='reserved_copies',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='total_copies',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_copy_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.13 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0013_book_copy_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='bookitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,10 +1,19 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 
 class Author(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order of AuthorViewset
+            models.Index(fields=["name", "id"], name="library_author_name_id_idx"),
+        ]
+
     def __str__(self):
         return f"Author: {self.name}"
 
@@ -15,6 +24,82 @@ class Book(models.Model):
     author = models.ManyToManyField(Author, related_name="books")
     subject = models.CharField(max_length=127)
     page_counts = models.IntegerField(null=True, blank=True)
+    # Maintained by library.search.update_search_vectors (see library/signals/handlers.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Copy counters, kept in step with BookItem rows by BookItem.save()
+    # and the BookItem post_delete handler; rebuilt by reconcile_book_counters
+    total_copies = models.IntegerField(default=0, editable=False)
+    available_copies = models.IntegerField(default=0, editable=False)
+    borrowed_copies = models.IntegerField(default=0, editable=False)
+    reserved_copies = models.IntegerField(default=0, editable=False)
+    # Last change to the API representation, author changes included (see
+    # library/signals/handlers.py); stamps conditional GETs in core.conditional
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Only ever written by UPDATE statements (the methods below and
+    # update_search_vectors), never from an instance that may be stale
+    DERIVED_FIELDS = frozenset(
+        ("search_vector", "total_copies", "available_copies", "borrowed_copies", "reserved_copies")
+    )
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order of the catalog
+            models.Index(fields=["title", "id"], name="library_book_title_id_idx"),
+        ]
+
+    @staticmethod
+    def adjust_counters(book_id, removed_status=None, added_status=None):
+        """
+        Move one copy between counters, e.g. from available to borrowed.
+        `removed_status=None` means a new copy, `added_status=None` a deleted one.
+        """
+        counters = {}
+        if removed_status is None:
+            counters["total_copies"] = 1
+        if added_status is None:
+            counters["total_copies"] = counters.get("total_copies", 0) - 1
+        for status, delta in ((removed_status, -1), (added_status, 1)):
+            field = BookItem.STATUS_COUNTER_FIELDS.get(status)
+            if field:
+                counters[field] = counters.get(field, 0) + delta
+
+        updates = {field: F(field) + delta for field, delta in counters.items() if delta}
+        if updates:
+            Book.objects.filter(pk=book_id).update(**updates)
+
+    @staticmethod
+    def rebuild_counters(queryset):
+        """Recompute the counters of the given books from their BookItem rows"""
+
+        def count_items(**filters):
+            items = (
+                BookItem.objects.filter(book=OuterRef("pk"), **filters)
+                .order_by()
+                .values("book")
+                .annotate(copies=Count("pk"))
+                .values("copies")
+            )
+            return Coalesce(Subquery(items), 0)
+
+        return queryset.update(
+            total_copies=count_items(),
+            available_copies=count_items(status=BookItem.STATUS_AVAILABLE),
+            borrowed_copies=count_items(status=BookItem.STATUS_BORROWED),
+            reserved_copies=count_items(status=BookItem.STATUS_RESERVED),
+        )
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get("force_insert"):
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields if not field.primary_key
+                ]
+            kwargs["update_fields"] = [
+                field for field in update_fields if field not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Book: {self.title}"
@@ -32,17 +117,51 @@ class BookItem(models.Model):
         (STATUS_RESERVED, "Reserved"),
         (STATUS_LOST, "Lost"),
     )
+    STATUS_COUNTER_FIELDS = {
+        STATUS_AVAILABLE: "available_copies",
+        STATUS_BORROWED: "borrowed_copies",
+        STATUS_RESERVED: "reserved_copies",
+    }
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="book_items")
     barcode = models.CharField(max_length=15, unique=True)
     status = models.CharField(max_length=1, choices=STATUS_CHOICES)
     publication_date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def is_available(self):
         return self.status == self.STATUS_AVAILABLE
 
     def change_status(self, to: str):
         self.status = to
-        self.save(update_fields=["status"])
+        self.save(update_fields=["status", "updated_at"])
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        tracks_counters = update_fields is None or {"status", "book"}.intersection(update_fields)
+
+        with transaction.atomic():
+            previous = None
+            if tracks_counters and not self._state.adding:
+                # Lock the row so concurrent status changes move the counters in order
+                previous = (
+                    BookItem.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list("book_id", "status")
+                    .first()
+                )
+            super().save(*args, **kwargs)
+
+            if not tracks_counters:
+                return
+            if previous is None:
+                Book.adjust_counters(self.book_id, added_status=self.status)
+            elif previous != (self.book_id, self.status):
+                previous_book_id, previous_status = previous
+                if previous_book_id == self.book_id:
+                    Book.adjust_counters(self.book_id, previous_status, self.status)
+                else:
+                    Book.adjust_counters(previous_book_id, removed_status=previous_status)
+                    Book.adjust_counters(self.book_id, added_status=self.status)
 
     def __str__(self):
         return f"BookItem: {self.book.title}"
@@ -0,0 +1,189 @@
+"""
+Cached API representations of authors, books and book items.
+
+Each object has a version token in the representation cache; its fragment
+is stored under (model, pk, version). Saves, deletes and author links bump
+the token once the transaction commits (see library/signals/handlers.py,
+and CatalogImporter for bulk writes), so a fragment rendered from data that
+was being changed concurrently is written under a version nobody reads.
+
+Fragments hold an object's own fields plus the ids of related objects:
+a book fragment lists author ids and an item fragment its book id, and the
+nested representations are assembled from the related fragments on read.
+Changing an author therefore touches one entry, not every book and copy.
+The output matches AuthorSerializer, AuthorListSerializer, BookSerializer
+and BookItemSerializer; bump REPRESENTATION_VERSION when those change.
+Sparse requests (core.sparse) leave unexpanded books and authors as ids and
+never load their fragments.
+"""
+import secrets
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from core.cache import TieredCache
+from core.sparse import FULL
+from .models import Author, Book, BookItem
+
+
+REPRESENTATION_VERSION = 2
+
+representation_cache = TieredCache(
+    "representations",
+    alias=getattr(settings, "REPRESENTATION_CACHE_ALIAS", "default"),
+    timeout=getattr(settings, "REPRESENTATION_CACHE_TTL", 24 * 60 * 60),
+    local_max_entries=getattr(settings, "REPRESENTATION_LOCAL_MAX_ENTRIES", 10_000),
+    local_ttl=getattr(settings, "REPRESENTATION_LOCAL_TTL", 5),
+)
+
+date_field = serializers.DateField()
+
+
+def version_key(model, pk):
+    return f"library:repr:{model._meta.model_name}:{pk}"
+
+
+def representation_key(model, pk, version):
+    return f"library:repr:{model._meta.model_name}:{pk}:{version}:v{REPRESENTATION_VERSION}"
+
+
+def new_version():
+    return secrets.token_hex(6)
+
+
+def current_versions(model, pks):
+    keys = {pk: version_key(model, pk) for pk in pks}
+    found = representation_cache.get_many(list(keys.values()))
+    return {
+        pk: found[key] if key in found else representation_cache.add(key, new_version())
+        for pk, key in keys.items()
+    }
+
+
+def invalidate_representations(model, pks):
+    """Give the objects new versions when the current transaction commits"""
+    keys = [version_key(model, pk) for pk in set(pks)]
+    if keys:
+        transaction.on_commit(
+            lambda: representation_cache.set_many({key: new_version() for key in keys})
+        )
+
+
+def cached_fragments(model, pks, load):
+    """{pk: fragment} from the cache, loading and storing misses with load(pks)"""
+    pks = list(dict.fromkeys(pks))
+    if not pks:
+        return {}
+    versions = current_versions(model, pks)
+    keys = {pk: representation_key(model, pk, versions[pk]) for pk in pks}
+    found = representation_cache.get_many(list(keys.values()))
+    fragments = {pk: found[key] for pk, key in keys.items() if key in found}
+
+    missing = [pk for pk in pks if pk not in fragments]
+    if missing:
+        loaded = load(missing)
+        representation_cache.set_many({keys[pk]: fragment for pk, fragment in loaded.items()})
+        fragments.update(loaded)
+    return fragments
+
+
+def uncached_fragments(model, pks, load):
+    """Same as cached_fragments, straight from the database (benchmarks and parity tests)"""
+    return load(list(dict.fromkeys(pks)))
+
+
+def load_authors(pks):
+    fragments = {
+        row["id"]: {**row, "book_ids": []}
+        for row in Author.objects.filter(pk__in=pks).values("id", "name", "description")
+    }
+    links = (
+        Book.author.through.objects.filter(author_id__in=fragments)
+        .order_by("book_id")
+        .values_list("author_id", "book_id")
+    )
+    for author_id, book_id in links:
+        fragments[author_id]["book_ids"].append(book_id)
+    return fragments
+
+
+def load_books(pks):
+    fragments = {
+        row["id"]: {**row, "author_ids": []}
+        for row in Book.objects.filter(pk__in=pks).values("id", "title", "isbn", "subject", "page_counts")
+    }
+    links = (
+        Book.author.through.objects.filter(book_id__in=fragments)
+        .order_by("author_id")
+        .values_list("book_id", "author_id")
+    )
+    for book_id, author_id in links:
+        fragments[book_id]["author_ids"].append(author_id)
+    return fragments
+
+
+def load_book_items(pks):
+    return {
+        row["id"]: {**row, "publication_date": date_field.to_representation(row["publication_date"])}
+        for row in BookItem.objects.filter(pk__in=pks)
+        .values("id", "book_id", "barcode", "status", "publication_date")
+    }
+
+
+def author_representations(pks, with_books=False, sparse=FULL, fragments=cached_fragments):
+    """{pk: AuthorSerializer data}, or AuthorListSerializer data `with_books`"""
+    representations = {}
+    for pk, fragment in fragments(Author, pks, load_authors).items():
+        data = {"id": fragment["id"], "name": fragment["name"], "description": fragment["description"]}
+        if with_books:
+            data["books"] = fragment["book_ids"]
+        representations[pk] = sparse.filter(data)
+    return representations
+
+
+def book_representations(pks, sparse=FULL, fragments=cached_fragments):
+    """{pk: BookSerializer data}; authors are ids unless `sparse` expands them"""
+    books = fragments(Book, pks, load_books)
+    expand_authors = sparse.expands("author")
+    if expand_authors:
+        authors = author_representations(
+            (author_id for book in books.values() for author_id in book["author_ids"]),
+            sparse=sparse.nested("author"),
+            fragments=fragments,
+        )
+    return {
+        pk: sparse.filter({
+            "id": book["id"],
+            "title": book["title"],
+            "isbn": book["isbn"],
+            "author": (
+                [authors[author_id] for author_id in book["author_ids"] if author_id in authors]
+                if expand_authors
+                else book["author_ids"]
+            ),
+            "subject": book["subject"],
+            "page_counts": book["page_counts"],
+        })
+        for pk, book in books.items()
+    }
+
+
+def book_item_representations(pks, sparse=FULL, fragments=cached_fragments):
+    """{pk: BookItemSerializer data}; the book is an id unless `sparse` expands it"""
+    items = fragments(BookItem, pks, load_book_items)
+    expand_book = sparse.expands("book")
+    if expand_book:
+        books = book_representations(
+            (item["book_id"] for item in items.values()), sparse=sparse.nested("book"), fragments=fragments
+        )
+    return {
+        pk: sparse.filter({
+            "id": item["id"],
+            "book": books.get(item["book_id"]) if expand_book else item["book_id"],
+            "barcode": item["barcode"],
+            "status": item["status"],
+            "publication_date": item["publication_date"],
+        })
+        for pk, item in items.items()
+    }
@@ -0,0 +1,117 @@
+import re
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, TextField
+from django.db.models.functions import Cast
+
+from .models import Book
+
+
+# "simple" keeps ISBNs, names and short words intact instead of stemming them
+SEARCH_CONFIG = "simple"
+
+SEARCH_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Ranks are compared exactly when paging (keyset cursors carry the last rank),
+# which a float real cannot survive a JSON round trip for, so they are cast
+# to a fixed-scale numeric
+SEARCH_RANK_FIELD = DecimalField(max_digits=12, decimal_places=6)
+
+
+def is_full_text_search_available():
+    """Full-text search needs PostgreSQL (tsvector, GIN and pg_trgm)"""
+    return connection.vendor == "postgresql"
+
+
+def book_search_vector():
+    """
+    Weighted tsvector expression for a Book row:
+    title and ISBN (A), author names (B), subject (C).
+    """
+    author_names = (
+        Book.author.through.objects.filter(book_id=OuterRef("pk"))
+        .values("book_id")
+        .annotate(names=StringAgg("author__name", delimiter=" "))
+        .values("names")
+    )
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("isbn", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(author_names, output_field=TextField()),
+            weight="B",
+            config=SEARCH_CONFIG,
+        )
+        + SearchVector("subject", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(book_ids=None):
+    """
+    Recompute the stored search vector for the given books (all books if None).
+    `book_ids` may be a list of ids or a values("pk") queryset.
+    """
+    if not is_full_text_search_available():
+        return 0
+    queryset = Book.objects.all()
+    if book_ids is not None:
+        queryset = queryset.filter(pk__in=book_ids)
+    return queryset.update(search_vector=book_search_vector())
+
+
+def build_search_query(text):
+    """
+    Turn free text typed into the search box into a prefix tsquery,
+    so "harr pot" matches "Harry Potter" while the user is still typing.
+    """
+    tokens = SEARCH_TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return None
+    raw_query = " & ".join(f"{token}:*" for token in tokens)
+    return SearchQuery(raw_query, search_type="raw", config=SEARCH_CONFIG)
+
+
+def legacy_search_books(queryset, text):
+    """The original icontains search, kept for non-PostgreSQL databases and benchmarks"""
+    return queryset.filter(
+        Q(title__icontains=text) |
+        Q(isbn__icontains=text) |
+        Q(subject__icontains=text) |
+        Q(author__name__icontains=text)
+    ).distinct()
+
+
+def search_books(queryset, text):
+    """
+    Filter a Book queryset by free text and order it by relevance.
+
+    Matches go through the GIN-indexed search vector; titles with typos are
+    caught by the trigram fallback on the title index.
+    """
+    text = (text or "").strip()
+    if not text:
+        return queryset
+    if not is_full_text_search_available():
+        return legacy_search_books(queryset, text)
+
+    search_query = build_search_query(text)
+    if search_query is None:
+        return queryset.none()
+
+    return (
+        queryset.filter(Q(search_vector=search_query) | Q(title__trigram_similar=text))
+        .annotate(
+            search_rank=Cast(
+                SearchRank(F("search_vector"), search_query) + TrigramSimilarity("title", text),
+                output_field=SEARCH_RANK_FIELD,
+            )
+        )
+        .order_by("-search_rank", "title", "id")
+    )
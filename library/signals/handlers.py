@@ -0,0 +1,114 @@
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.response_cache import invalidate_tags
+
+from ..models import Book, Author, BookItem
+from ..representations import invalidate_representations
+from ..search import update_search_vectors
+
+
+SEARCHABLE_BOOK_FIELDS = {"title", "isbn", "subject"}
+
+
+@receiver(post_save, sender=Book)
+def update_search_vector_of_book(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not SEARCHABLE_BOOK_FIELDS.intersection(update_fields):
+        return
+    update_search_vectors([instance.pk])
+
+
+@receiver(m2m_changed, sender=Book.author.through)
+def update_search_vector_of_book_authors(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # author.books.clear(): remember the books before the links are gone
+        instance._search_book_ids = list(instance.books.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        update_search_vectors([instance.pk])
+    elif action == "post_clear":
+        update_search_vectors(getattr(instance, "_search_book_ids", []))
+    else:
+        update_search_vectors(list(pk_set))
+
+
+@receiver(post_save, sender=Author)
+def update_search_vector_of_author_books(sender, instance, created, **kwargs):
+    if not created:
+        update_search_vectors(instance.books.values("pk"))
+
+
+@receiver(pre_delete, sender=Author)
+def remember_books_of_deleted_author(sender, instance, **kwargs):
+    instance._search_book_ids = list(instance.books.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Author)
+def update_search_vector_of_deleted_author_books(sender, instance, **kwargs):
+    update_search_vectors(getattr(instance, "_search_book_ids", []))
+
+
+@receiver(post_delete, sender=BookItem)
+def update_copy_counters_of_deleted_item(sender, instance, **kwargs):
+    Book.adjust_counters(instance.book_id, removed_status=instance.status)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=BookItem)
+def invalidate_representation(sender, instance, **kwargs):
+    invalidate_representations(sender, [instance.pk])
+    invalidate_tags(sender)
+
+
+@receiver(pre_delete, sender=Book)
+def remember_authors_of_deleted_book(sender, instance, **kwargs):
+    instance._representation_author_ids = list(instance.author.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Author)
+def remember_books_of_deleted_author_for_representations(sender, instance, **kwargs):
+    instance._representation_book_ids = list(instance.books.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=BookItem)
+def invalidate_representation_of_deleted(sender, instance, **kwargs):
+    # Deleting a book or author drops its links without m2m_changed
+    invalidate_representations(sender, [instance.pk])
+    invalidate_tags(sender)
+    invalidate_representations(Book, getattr(instance, "_representation_book_ids", []))
+    invalidate_representations(Author, getattr(instance, "_representation_author_ids", []))
+    touch_books(getattr(instance, "_representation_book_ids", []))
+
+
+@receiver(m2m_changed, sender=Book.author.through)
+def invalidate_representations_of_book_authors(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action == "pre_clear":
+        related = instance.books if reverse else instance.author
+        instance._representation_related_ids = list(related.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    related_ids = pk_set if action != "post_clear" else getattr(instance, "_representation_related_ids", [])
+    invalidate_representations(type(instance), [instance.pk])
+    invalidate_representations(model, related_ids)
+    invalidate_tags(Book, Author)
+    touch_books(related_ids if reverse else [instance.pk])
+
+
+def touch_books(book_ids):
+    """Bump updated_at of books whose authors changed; no Book save does it for them"""
+    Book.objects.filter(pk__in=book_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Author)
+def touch_books_of_author(sender, instance, created, **kwargs):
+    if not created:
+        touch_books(instance.books.values("pk"))
@@ -0,0 +1,117 @@
+import io
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import Member
+from borrowing.models import BorrowedBook
+from .importing import CatalogFormatError, import_catalog
+from .models import Author, Book, BookItem
+
+
+class BooksListViewTests(TestCase):
+    def test_page_links_keep_filters_url_encoded(self):
+        for n in range(13):  # one more than a page
+            Book.objects.create(title=f"Book {n:02d}", isbn=f"97833333333{n:02d}", subject="c++ & more")
+
+        response = self.client.get("/library/books/", {"subject": "c++ & more"})
+
+        self.assertEqual(len(response.context["books"]), 12)
+        self.assertContains(response, "&subject=c%2B%2B%20%26%20more")
+        self.assertNotContains(response, "&subject=c++")
+
+    def test_book_with_several_matching_authors_is_listed_once(self):
+        book = Book.objects.create(title="Pair", isbn="9784444444400", subject="Testing")
+        book.author.add(Author.objects.create(name="Ann Smith"), Author.objects.create(name="Bob Smith"))
+        Book.objects.create(title="Other", isbn="9784444444401", subject="Testing")
+
+        for params in ({"author": "Smith"}, {"author": "Smith", "search": "Pair"}):
+            with self.subTest(params=params):
+                response = self.client.get("/library/books/", params)
+                self.assertEqual([listed.pk for listed in response.context["books"]], [book.pk])
+
+
+class BookCounterTests(TestCase):
+    def test_saving_a_stale_book_keeps_its_counters(self):
+        book = Book.objects.create(title="T1", isbn="9785555555500", subject="Testing")
+        for n in range(2):
+            BookItem.objects.create(
+                book=book, barcode=f"COUNTER{n}", status=BookItem.STATUS_AVAILABLE,
+                publication_date=date(2000, 1, 1),
+            )
+        self.assertEqual((book.total_copies, book.available_copies), (0, 0))  # in memory only
+
+        book.title = "T2"
+        book.save()
+
+        book.refresh_from_db()
+        self.assertEqual(book.title, "T2")
+        self.assertEqual((book.total_copies, book.available_copies), (2, 2))
+
+    def test_explicit_update_fields_skip_counters(self):
+        book = Book.objects.create(title="T1", isbn="9785555555501", subject="Testing")
+        Book.objects.filter(pk=book.pk).update(total_copies=3)
+        book.save(update_fields=["title", "total_copies"])
+        book.refresh_from_db()
+        self.assertEqual(book.total_copies, 3)
+
+
+def jsonl(*records):
+    return io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+
+
+class CatalogImportTests(TestCase):
+    BOOK = {"isbn": "9786666666600", "title": "Imported", "subject": "Testing", "authors": ["Jane Doe"]}
+
+    def test_fields_of_the_wrong_type_are_format_errors(self):
+        for field, value in (
+            ("isbn", 9786666666600),
+            ("title", 42),
+            ("authors", "Jane Doe"),
+            ("items", {"barcode": "IMPORT0"}),
+            ("items", ["IMPORT0"]),
+            ("items", [{"barcode": 7}]),
+            ("items", [{"barcode": "IMPORT0", "status": ["A"]}]),
+        ):
+            with self.subTest(field=field, value=value):
+                with self.assertRaises(CatalogFormatError) as raised:
+                    import_catalog(jsonl(self.BOOK, {**self.BOOK, field: value}), "jsonl", batch_size=1)
+                self.assertEqual((raised.exception.record, raised.exception.committed), (2, 1))
+        self.assertFalse(Author.objects.filter(name="J").exists())
+
+    def test_malformed_upload_is_a_bad_request(self):
+        admin = get_user_model().objects.create_superuser("import-admin", "import@example.com", "password")
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = SimpleUploadedFile("feed.jsonl", json.dumps({**self.BOOK, "isbn": 1}).encode())
+
+        response = client.post("/library/api/import/", {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["record"], 1)
+
+    def test_held_copies_keep_their_book_and_status(self):
+        import_catalog(jsonl({**self.BOOK, "items": [{"barcode": "IMPORT1"}]}), "jsonl")
+        item = BookItem.objects.get(barcode="IMPORT1")
+        member = Member.objects.create_member(
+            "import-member", "password", "im@example.com", "Import", "Member"
+        )
+        loan = BorrowedBook.objects.create(
+            book_item=item, borrower=member, due_date=date.today() + timedelta(days=7)
+        )
+        item.change_status(BookItem.STATUS_BORROWED)
+
+        moved = {
+            "isbn": "9786666666601", "title": "Other", "subject": "Testing",
+            "items": [{"barcode": "IMPORT1", "status": "A", "publication_date": "2001-02-03"}],
+        }
+        import_catalog(jsonl(moved), "jsonl")
+
+        item.refresh_from_db()
+        loan.refresh_from_db()
+        self.assertEqual((item.book_id, item.status), (loan.book_id, BookItem.STATUS_BORROWED))
+        self.assertEqual(item.publication_date, date(2001, 2, 3))
@@ -1,7 +1,15 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework_nested.routers import DefaultRouter, NestedDefaultRouter
 
-from .api.views import BookViewset, AuthorViewset, BookItemViewSet
+from core.exports import EXPORT_FORMAT_REGEX
+from .api.views import (
+    BookViewset,
+    AuthorViewset,
+    BookItemViewSet,
+    BookExportView,
+    BookItemExportView,
+    import_catalog_view,
+)
 from .views import books_list_view, book_detail_view, borrow_book_view
 
 
@@ -18,6 +26,17 @@ urlpatterns = [
     path("books/<int:book_id>/", book_detail_view, name="library-book-detail"),
     path("books/<int:book_id>/borrow/", borrow_book_view, name="library-borrow-book"),
     # API endpoints
+    path("api/import/", import_catalog_view, name="library-import-catalog"),
+    re_path(
+        rf"^api/export/books\.(?P<export_format>{EXPORT_FORMAT_REGEX})$",
+        BookExportView.as_view(),
+        name="library-export-books",
+    ),
+    re_path(
+        rf"^api/export/items\.(?P<export_format>{EXPORT_FORMAT_REGEX})$",
+        BookItemExportView.as_view(),
+        name="library-export-items",
+    ),
     path("api/", include(router.urls)),
     path("api/", include(books_router.urls)),
 ]
@@ -1,12 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.core.paginator import Paginator
-from django.db.models import Q, Count, Prefetch
 from django.contrib import messages
-from django.utils import timezone
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef
 from django.views.decorators.http import require_http_methods
-from datetime import timedelta
 
+from accounts.roles import get_roles
+from core.pagination import KeysetPage
 from .models import Book, BookItem, Author
+from .search import search_books
 
 
 def books_list_view(request):
@@ -18,37 +19,32 @@ def books_list_view(request):
     author_filter = request.GET.get('author', '')
     subject_filter = request.GET.get('subject', '')
     
-    # Base queryset with prefetch for performance
-    queryset = Book.objects.prefetch_related(
-        'author',
-        Prefetch(
-            'book_items',
-            queryset=BookItem.objects.select_related('book')
-        )
-    ).annotate(
-        total_copies=Count('book_items'),
-        available_copies=Count('book_items', filter=Q(book_items__status=BookItem.STATUS_AVAILABLE))
-    ).order_by('title')
+    # Base queryset; copy counts are read from the Book counter columns
+    queryset = Book.objects.prefetch_related('author').order_by('title')
     
-    # Apply filters
+    # Apply filters (full-text search results are ordered by relevance)
     if search_query:
-        queryset = queryset.filter(
-            Q(title__icontains=search_query) |
-            Q(isbn__icontains=search_query) |
-            Q(subject__icontains=search_query) |
-            Q(author__name__icontains=search_query)
-        ).distinct()
+        queryset = search_books(queryset, search_query)
     
     if author_filter:
-        queryset = queryset.filter(author__name__icontains=author_filter)
+        # EXISTS rather than a join: a book with several matching authors
+        # would otherwise be listed (and advance the cursor) once per author
+        queryset = queryset.filter(Exists(
+            Book.author.through.objects.filter(
+                book_id=OuterRef('pk'), author__name__icontains=author_filter
+            )
+        ))
     
     if subject_filter:
         queryset = queryset.filter(subject__icontains=subject_filter)
     
-    # Pagination
-    paginator = Paginator(queryset, 12)  # Show 12 books per page
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: every page costs the same, no COUNT(*) over the catalog
+    try:
+        page_obj = KeysetPage(
+            queryset, queryset.query.order_by, cursor=request.GET.get('cursor'), page_size=12
+        )
+    except (ValueError, TypeError, ValidationError):
+        page_obj = KeysetPage(queryset, queryset.query.order_by, page_size=12)
     
     # Get all authors and subjects for filter dropdowns
     all_authors = Author.objects.all().order_by('name')
@@ -70,15 +66,7 @@ def books_list_view(request):
 def book_detail_view(request, book_id):
     """User-friendly HTML view for displaying a single book's details"""
     try:
-        book = Book.objects.prefetch_related(
-            'author',
-            'book_items'
-        ).annotate(
-            total_copies=Count('book_items'),
-            available_copies=Count('book_items', filter=Q(book_items__status=BookItem.STATUS_AVAILABLE)),
-            borrowed_copies=Count('book_items', filter=Q(book_items__status=BookItem.STATUS_BORROWED)),
-            reserved_copies=Count('book_items', filter=Q(book_items__status=BookItem.STATUS_RESERVED))
-        ).get(id=book_id)
+        book = Book.objects.prefetch_related('author').get(id=book_id)
         
         # Get available book items
         available_items = book.book_items.filter(status=BookItem.STATUS_AVAILABLE)
@@ -92,19 +80,15 @@ def book_detail_view(request, book_id):
         # Check if user is a member and has already borrowed this book
         is_member = False
         has_borrowed = False
-        if request.user.is_authenticated:
-            from accounts.models import Member
-            try:
-                member = Member.objects.get(user=request.user)
-                is_member = True
-                # Check if member has already borrowed any copy of this book
-                from borrowing.models import BorrowedBook
-                has_borrowed = BorrowedBook.objects.filter(
-                    borrower=member,
-                    book_item__book=book
-                ).exists()
-            except Member.DoesNotExist:
-                pass
+        roles = get_roles(request)
+        if roles.is_member:
+            is_member = True
+            # Check if member has already borrowed any copy of this book
+            from borrowing.models import BorrowedBook
+            has_borrowed = BorrowedBook.objects.filter(
+                borrower_id=roles.member_id,
+                book_item__book=book
+            ).exists()
         
         context['is_member'] = is_member
         context['has_borrowed'] = has_borrowed
@@ -123,45 +107,26 @@ def borrow_book_view(request, book_id):
         return redirect('account-login')
     
     # Check if user is a member
-    from accounts.models import Member
-    try:
-        member = Member.objects.get(user=request.user)
-    except Member.DoesNotExist:
+    member = get_roles(request).member
+    if member is None:
         messages.error(request, "You must be a registered member to borrow books.")
         return redirect('account-register')
     
     # Get the book
     book = get_object_or_404(Book, id=book_id)
     
-    # Check if member has already borrowed this book
-    from borrowing.models import BorrowedBook
-    if BorrowedBook.objects.filter(borrower=member, book_item__book=book).exists():
-        messages.warning(request, f"You have already borrowed '{book.title}'. Please return it before borrowing again.")
-        return redirect('library-book-detail', book_id=book_id)
-    
-    # Find an available book item
-    available_item = book.book_items.filter(status=BookItem.STATUS_AVAILABLE).first()
-    
-    if not available_item:
-        messages.error(request, f"Sorry, '{book.title}' is currently not available. All copies are borrowed.")
-        return redirect('library-book-detail', book_id=book_id)
-    
-    # Calculate due date (default 14 days from now)
-    due_date = timezone.now().date() + timedelta(days=14)
-    
-    # Create borrow record
+    # Lock and lend an available copy (due date defaults to 14 days from now)
+    from borrowing.services import checkout, AlreadyBorrowedError, NoCopyAvailableError
     try:
-        BorrowedBook.objects.create(
-            book_item=available_item,
-            borrower=member,
-            due_date=due_date
-        )
+        loan = checkout(member, book=book)
         messages.success(
             request, 
-            f"Successfully borrowed '{book.title}'! Due date: {due_date.strftime('%B %d, %Y')}"
+            f"Successfully borrowed '{book.title}'! Due date: {loan.due_date.strftime('%B %d, %Y')}"
         )
-    except Exception as e:
-        messages.error(request, f"Error borrowing book: {str(e)}")
+    except AlreadyBorrowedError:
+        messages.warning(request, f"You have already borrowed '{book.title}'. Please return it before borrowing again.")
+    except NoCopyAvailableError:
+        messages.error(request, f"Sorry, '{book.title}' is currently not available. All copies are borrowed.")
     
     return redirect('library-book-detail', book_id=book_id)
 
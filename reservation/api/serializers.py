@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from borrowing.api.serializers import BookItemValues
+from core.values import ValuesSerializer
 from library.models import BookItem
 from ..models import ReservedBook
 
@@ -18,6 +20,18 @@ class ReservedBookSerializer(serializers.ModelSerializer):
     book_item = BookItemSerializer()
 
 
+class ReservedBookValues(ValuesSerializer):
+    """Read-only ReservedBookSerializer"""
+    model = ReservedBook
+    fields = {
+        "id": "id",
+        "book_item": BookItemValues("book_item"),
+        "reserver": "reserver",
+        "reserved_at": "reserved_at",
+        "due_time": "due_time",
+    }
+
+
 class ReservedBookCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReservedBook
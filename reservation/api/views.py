@@ -1,15 +1,15 @@
 from rest_framework.viewsets import GenericViewSet
 from rest_framework import mixins
-from drf_spectacular.utils import extend_schema
 
 from accounts.api.permissions import IsAdminOrLibrarian
+from core.values import ValuesReadMixin
 
 from ..models import ReservedBook
-from .serializers import ReservedBookSerializer, ReservedBookCreateSerializer
+from .serializers import ReservedBookSerializer, ReservedBookCreateSerializer, ReservedBookValues
 
 
-@extend_schema(exclude=True)  # Hide from API documentation
 class ReservedBookViewset(
+    ValuesReadMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.DestroyModelMixin,
@@ -18,6 +18,10 @@ class ReservedBookViewset(
 ):
     queryset = ReservedBook.objects.select_related("book_item").all()
     permission_classes = [IsAdminOrLibrarian]
+    role_claims = True
+    ordering = ("due_time", "id")
+    values_serializer = ReservedBookValues()
+    query_budget = {"list": 4, "retrieve": 4}
 
     def get_serializer_class(self):
         if self.action in ("create"):
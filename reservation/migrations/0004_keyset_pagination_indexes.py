@@ -0,0 +1,17 @@
+# Generated by Django 3.2.13 on 2026-10-17 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservation', '0003_alter_reservedbook_due_time'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservedbook',
+            index=models.Index(fields=['due_time', 'id'], name='reservation_due_time_id_idx'),
+        ),
+    ]
@@ -9,6 +9,12 @@ class ReservedBook(models.Model):
     reserved_at = models.DateTimeField(auto_now_add=True)
     due_time = models.DateTimeField(validators=[MinValueValidator(timezone.now)])
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order of ReservedBookViewset
+            models.Index(fields=["due_time", "id"], name="reservation_due_time_id_idx"),
+        ]
+
     def __str__(self):
         return (
             f"{self.id}"